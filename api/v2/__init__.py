@@ -9,6 +9,8 @@ from .routers import (
     downloads,
     reviews,
     help,
+    uploads,
+    jobs,
 )
 
 router = APIRouter()
@@ -23,3 +25,5 @@ router.include_router(watch.router, prefix="/watch", tags=["watch lessons"])
 router.include_router(downloads.router, prefix="/downloads", tags=["downloads"])
 router.include_router(reviews.router, prefix="/reviews", tags=["reviews"])
 router.include_router(help.router, prefix="/help", tags=["help"])
+router.include_router(uploads.router, prefix="/uploads", tags=["uploads"])
+router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
@@ -1,5 +1,11 @@
 # imports for easier access
-from .permissions import check_user_permission, Resources, Actions
+from .permissions import (
+    check_user_permission,
+    check_user_permission_async,
+    request_for_user,
+    Resources,
+    Actions,
+)
 from .auth import login_required, guest_required
 from .pagintor import *
 from .platforms import get_user_platform
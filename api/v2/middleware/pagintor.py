@@ -1,12 +1,28 @@
 from fastapi import Request, Query
+from typing import Optional
+from helpers.types import responses
+from db import aggregations
 
 
 def pagintor(
-    request: Request, page: int = Query(0, gt=-1), limit: int = Query(10, gt=0, lt=101)
+    request: Request,
+    page: int = Query(0, gt=-1),
+    limit: int = Query(10, gt=0, lt=101),
+    cursor: Optional[str] = Query(
+        None, description="the next_cursor of the previous page, replaces page"
+    ),
 ):
     """
     pass this function to the dependencies parameter of a route to set the pagination parameters
+    routes that support cursors return next_cursor, pass it back to get the next page without skipping
     """
     request.state.page = page
     request.state.limit = limit
     request.state.offset = page * limit
+    request.state.cursor = None
+
+    if cursor:
+        try:
+            request.state.cursor = aggregations.decode_cursor(cursor)
+        except ValueError:
+            return responses.ApiRaiseError(code=400, message="invalid cursor")
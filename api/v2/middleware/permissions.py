@@ -1,14 +1,61 @@
+from fastapi import Request
 from helpers.exceptions.redirect import RedirectException
-from db import queries
-from db.models import Actions, Resources
+from db import queries, aio
+from db.models import Actions, Resources, Users
 from helpers.types import (
-    UserPopulateOptions,
     RequestWithUserId,
+    QueryResults,
     Cookeys,
     RediractsPaths,
     responses,
 )
-from typing import Callable
+from typing import Callable, Awaitable
+
+
+def _set_user_permissions(
+    request: RequestWithUserId,
+    user_res: QueryResults[Users],
+    needed_resources: dict[Resources, list[Actions]],
+):
+    if user_res.failure:
+        if user_res.not_found:
+            raise RedirectException(
+                RediractsPaths.LOGIN.value,
+                remove_cookies=[Cookeys.ACCESS_TOKEN.value],
+            )
+        return responses.ApiRaiseError(message="Error while getting user data")
+
+    user = user_res.value
+
+    request.state.user = user
+
+    resources_permissions = [
+        permission
+        for permission in user.role.permissions
+        if permission.resource in needed_resources
+    ]
+
+    if not resources_permissions:
+        return responses.ApiRaiseError(
+            message="You don't have permission to access this page", code=403
+        )
+
+    if not len(resources_permissions) == len(needed_resources):
+        return responses.ApiRaiseError(
+            message="Not enough permissions to access this route", code=403
+        )
+
+    request.state.permissions = {}
+    for permission in resources_permissions:
+        if not all(
+            action in permission.actions
+            for action in needed_resources[permission.resource]
+        ):
+            return responses.ApiRaiseError(
+                message="Not enough permissions to access this route", code=403
+            )
+
+        request.state.permissions[permission.resource] = permission
 
 
 def check_user_permission(
@@ -16,49 +63,40 @@ def check_user_permission(
 ) -> Callable[[RequestWithUserId], None]:
     def real_func(request: RequestWithUserId):
 
-        user_res = queries.get_user_by_id(
-            user_id=request.state.user_id,
-            populate=UserPopulateOptions(role=True, account=True),
-        )
-
-        if user_res.failure:
-            if user_res.not_found:
-                raise RedirectException(
-                    RediractsPaths.LOGIN.value,
-                    remove_cookies=[Cookeys.ACCESS_TOKEN.value],
-                )
-            return responses.ApiRaiseError(message="Error while getting user data")
+        user_res = queries.get_user_for_permissions(request.state.user_id)
 
-        user = user_res.value
+        _set_user_permissions(request, user_res, needed_resources)
 
-        request.state.user = user
+    return real_func
 
-        resources_permissions = [
-            permission
-            for permission in user.role.permissions
-            if permission.resource in needed_resources
-        ]
 
-        if not resources_permissions:
-            return responses.ApiRaiseError(
-                message="You don't have permission to access this page", code=403
-            )
+def check_user_permission_async(
+    needed_resources: dict[Resources, list[Actions]]
+) -> Callable[[RequestWithUserId], Awaitable[None]]:
+    """
+    same as `check_user_permission` but uses the async db layer,
+    use it in `async def` routes so the dependency doesn't need a threadpool worker
+    """
 
-        if not len(resources_permissions) == len(needed_resources):
-            return responses.ApiRaiseError(
-                message="Not enough permissions to access this route", code=403
-            )
+    async def real_func(request: RequestWithUserId):
 
-        request.state.permissions = {}
-        for permission in resources_permissions:
-            if not all(
-                action in permission.actions
-                for action in needed_resources[permission.resource]
-            ):
-                return responses.ApiRaiseError(
-                    message="Not enough permissions to access this route", code=403
-                )
+        user_res = await aio.queries.get_user_for_permissions(request.state.user_id)
 
-            request.state.permissions[permission.resource] = permission
+        _set_user_permissions(request, user_res, needed_resources)
 
     return real_func
+
+
+def request_for_user(
+    user_id: str, needed_resources: dict[Resources, list[Actions]]
+) -> RequestWithUserId:
+    """
+    a request of the user outside of a route (jobs), with the state `check_user_permission` sets
+    raises like the dependency when the user doesn't have the permissions anymore
+    """
+    request = Request({"type": "http", "headers": []})
+    request.state.user_id = str(user_id)
+
+    check_user_permission(needed_resources)(request)
+
+    return request
@@ -1,5 +1,5 @@
-from fastapi import APIRouter, Depends, Path, BackgroundTasks, Query
-from db import queries, updates, inserts, transactions
+from fastapi import APIRouter, Depends, Path, Query
+from db import queries, updates, inserts
 from ...middleware import (
     login_required,
     check_user_permission,
@@ -8,15 +8,14 @@ from ...middleware import (
     pagintor,
 )
 from helpers.files import get_file_extension_from_mime_type
-from services.gcp import GCP_MANAGER
-from services.sendgrid import EMAIL_SERVICE
-from . import models
+from services.gcp import GCP_MANAGER, UploadAssets
+from . import models, jobs as account_jobs
+from services import jobs
 from helpers.types import (
     responses,
     RequestWithPaginationAndFullUser,
     RequestWithFullUser,
 )
-from helpers.secuirty import passwords, tokens
 from helpers import fields
 from typing import Optional
 
@@ -41,16 +40,26 @@ router = APIRouter(dependencies=[Depends(login_required)])
 def create_new_account(
     request: RequestWithFullUser,
     payload: models.CreateAccountPayload,
-    background_tasks: BackgroundTasks,
 ):
 
     content_type = None
     file_type = None
     logo_file = None
 
-    if payload.logo is not None:
+    logo = payload.logo
 
-        logo_file, content_type = payload.logo
+    # a logo uploaded with an upload link is verified, and moved instead of uploaded
+    if payload.logo_upload is not None:
+        logo = GCP_MANAGER.get_staged_upload(
+            UploadAssets.ACCOUNT_LOGO, payload.logo_upload, request.state.user_id
+        )
+
+        if logo is None:
+            return responses.ApiError(code=400, message="invalid logo upload")
+
+    if logo is not None:
+
+        logo_file, content_type = logo
 
         file_type = get_file_extension_from_mime_type(content_type)
 
@@ -107,47 +116,19 @@ def create_new_account(
 
         updates.update_account_by_id(new_account.id, logo=logo_url)
 
-    def create_new_account_manager(
-        data: models.CreateAccountPayload,
-        new_account,
-    ):
-
-        account_manager_role = queries.get_account_manager_role()
-
-        if not account_manager_role.success:
-            # TODO log error
-            return
-
-        # create the new user
-        new_user = inserts.insert_new_account_manager_user(
-            account_manager_role.value,
-            new_account.id,
-            email=data.email,
-            password=passwords.hash_password(passwords.generate_password()),
-            first_name=data.contact_man_first_name,
-            last_name=data.contact_man_last_name,
-            phone_number=data.phone,
-        )
-
-        if not new_user.success:
-            # TODO log error
-            return
-
-        new_user = new_user.value
-
-        if updates.update_account_current_users_count(new_user.account, 1).failure:
-            # TODO log error
-            pass
-
-        token = tokens.generate_first_login_token(str(new_user.id))
-
-        EMAIL_SERVICE.send_regstration_email(
-            new_user.email, new_user.email, new_user.full_name, token
-        )
-
-        updates.set_user_registration_token(new_user.id, token)
-
-    background_tasks.add_task(create_new_account_manager, payload, new_account)
+    # the manager is created (and the registration email sent) by the jobs workers
+    jobs.enqueue(
+        account_jobs.CREATE_ACCOUNT_MANAGER,
+        {
+            "account_id": new_account.id,
+            "email": payload.email,
+            "first_name": payload.contact_man_first_name,
+            "last_name": payload.contact_man_last_name,
+            "phone": payload.phone,
+        },
+        idempotency_key=f"{account_jobs.CREATE_ACCOUNT_MANAGER}:{new_account.id}",
+        creator=request.state.user_id,
+    )
 
     return responses.ApiSuccess(
         message="account created successfully", data=new_account
@@ -235,7 +216,6 @@ def get_account_by_id(
 def update_account_by_id(
     request: RequestWithFullUser,
     payload: models.UpdateAccountPayload,
-    background_tasks: BackgroundTasks,
     # we use query param beacuse we want to allow to update their own account
     # without knowing the account id
     account_id: Optional[fields.ObjectIdField] = Query(None),
@@ -250,9 +230,20 @@ def update_account_by_id(
     file_type = None
     logo_file = None
 
-    if payload.logo is not None:
+    logo = payload.logo
+
+    # a logo uploaded with an upload link is verified, and moved instead of uploaded
+    if payload.logo_upload is not None:
+        logo = GCP_MANAGER.get_staged_upload(
+            UploadAssets.ACCOUNT_LOGO, payload.logo_upload, request.state.user_id
+        )
+
+        if logo is None:
+            return responses.ApiError(code=400, message="invalid logo upload")
 
-        logo_file, content_type = payload.logo
+    if logo is not None:
+
+        logo_file, content_type = logo
 
         file_type = get_file_extension_from_mime_type(content_type)
 
@@ -299,24 +290,22 @@ def update_account_by_id(
             return responses.ApiError(code=409, message="duplicate data")
         return responses.ApiError(code=500, message="error while updating account")
 
-    # If in the future some users cant update the logo
-    # we need to remove this from background tasks and add it to the update_account_by_id
-    def update_the_logo(
-        account_id: str,
-        logo_file: bytes,
-        file_type: str,
-        content_type: str,
-    ):
-        logo_url = GCP_MANAGER.upload_account_logo(
-            logo_file, account_id, file_type, content_type
+    if file_type and logo_file and content_type:
+        # If in the future some users cant update the logo
+        # we need to upload it in the route and pass it to update_account_by_id
+        job = jobs.enqueue(
+            account_jobs.UPDATE_ACCOUNT_LOGO,
+            account_jobs.logo_payload(
+                str(account_id), logo_file, file_type, content_type
+            ),
+            creator=request.state.user_id,
         )
-        # If the update was successful, there is no need to pass the request
-        # because the update was alredy validated
-        updates.update_account_by_id(account_id, logo=logo_url)
 
-    if file_type and logo_file and content_type:
-        background_tasks.add_task(
-            update_the_logo, str(account_id), logo_file, file_type, content_type
+        if job is None:
+            return responses.ApiError(code=500, message="error while updating logo")
+
+        return responses.ApiSuccess(
+            message="account updated successfully", data={"job_id": job.id}
         )
 
     return responses.ApiSuccess(message="account updated successfully")
@@ -336,7 +325,6 @@ def update_account_by_id(
 )
 def delete_account_by_id(
     request: RequestWithFullUser,
-    background_tasks: BackgroundTasks,
     account_id: fields.ObjectIdField = Path(...),
 ):
 
@@ -356,6 +344,16 @@ def delete_account_by_id(
             return responses.ApiError(code=404, message="account not found")
         return responses.ApiError(code=500, message="error while getting account")
 
-    background_tasks.add_task(transactions.fully_delete_account, account_id, request)
+    job = jobs.enqueue(
+        account_jobs.DELETE_ACCOUNT,
+        {"account_id": account_id, "user_id": request.state.user_id},
+        idempotency_key=f"{account_jobs.DELETE_ACCOUNT}:{account_id}",
+        creator=request.state.user_id,
+    )
+
+    if job is None:
+        return responses.ApiError(code=500, message="error while deleting account")
 
-    return responses.ApiSuccess(message="account deleted successfully")
+    return responses.ApiSuccess(
+        message="account deleted successfully", data={"job_id": job.id}
+    )
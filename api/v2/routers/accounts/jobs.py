@@ -0,0 +1,142 @@
+"""
+The accounts jobs, enqueued by the accounts routes and run by the jobs workers (`services.jobs`)
+"""
+from io import BytesIO
+from bson import ObjectId
+from db import queries, updates, inserts, transactions
+from services import jobs
+from services.gcp import GCP_MANAGER, StagedUpload
+from services.sendgrid import EMAIL_SERVICE
+from helpers.secuirty import passwords, tokens
+from ...middleware import request_for_user, Resources, Actions
+
+DELETE_ACCOUNT = "accounts.delete"
+CREATE_ACCOUNT_MANAGER = "accounts.create_manager"
+UPDATE_ACCOUNT_LOGO = "accounts.update_logo"
+
+# the permissions the delete route checks
+DELETE_ACCOUNT_RESOURCES = {Resources.ACCOUNTS: [Actions.DELETE]}
+
+
+@jobs.handler(DELETE_ACCOUNT)
+def delete_account(payload: dict):
+    account_id = payload["account_id"]
+
+    # a retry of a deletion that was done
+    if queries.get_account_by_id(account_id).not_found:
+        return
+
+    request = request_for_user(payload["user_id"], DELETE_ACCOUNT_RESOURCES)
+
+    res = transactions.fully_delete_account(account_id, request)
+
+    if not res.success:
+        raise jobs.JobError(res.message)
+
+
+@jobs.handler(CREATE_ACCOUNT_MANAGER)
+def create_account_manager(payload: dict):
+    account_id = ObjectId(payload["account_id"])
+
+    account_manager_role = queries.get_account_manager_role()
+
+    if not account_manager_role.success:
+        raise jobs.JobError("failed to get the account manager role")
+
+    existing_user = queries.get_user_by_email(payload["email"])
+
+    if existing_user.success:
+        new_user = existing_user.value
+
+        # a retry only if the previous attempt created it, else the email is taken
+        if not (
+            new_user.account == account_id
+            and new_user.role == account_manager_role.value.id
+        ):
+            raise jobs.JobError("a user with this email already exists")
+    else:
+        if not existing_user.not_found:
+            raise jobs.JobError("failed to check the email")
+
+        # create the new user
+        new_user = inserts.insert_new_account_manager_user(
+            account_manager_role.value,
+            account_id,
+            email=payload["email"],
+            password=passwords.hash_password(passwords.generate_password()),
+            first_name=payload["first_name"],
+            last_name=payload["last_name"],
+            phone_number=payload["phone"],
+        )
+
+        if not new_user.success:
+            raise jobs.JobError("failed to create the account manager")
+
+        new_user = new_user.value
+
+        if updates.update_account_current_users_count(account_id, 1).failure:
+            # TODO log error
+            pass
+
+    token = tokens.generate_first_login_token(str(new_user.id))
+
+    EMAIL_SERVICE.send_regstration_email(
+        new_user.email, new_user.email, new_user.full_name, token
+    )
+
+    updates.set_user_registration_token(new_user.id, token)
+
+    return {"user_id": new_user.id}
+
+
+@jobs.handler(UPDATE_ACCOUNT_LOGO)
+def update_account_logo(payload: dict):
+    if payload.get("upload_path"):
+        logo_file = StagedUpload(payload["upload_path"], payload["content_type"])
+
+        # the staged upload is deleted only after the logo was saved, a retry of a saved logo
+        if not GCP_MANAGER.staged_upload_exists(logo_file):
+            return
+    else:
+        logo_file = BytesIO(payload["logo"])
+
+    # the staged upload is kept until the logo is saved, so a failed save can be retried
+    logo_url = GCP_MANAGER.upload_account_logo(
+        logo_file,
+        payload["account_id"],
+        payload["file_type"],
+        payload["content_type"],
+        keep_source=True,
+    )
+
+    # If the update was successful, there is no need to pass the request
+    # because the update was alredy validated
+    if updates.update_account_by_id(payload["account_id"], logo=logo_url).failure:
+        raise jobs.JobError("failed to save the logo")
+
+    if isinstance(logo_file, StagedUpload):
+        GCP_MANAGER.delete_staged_upload(logo_file)
+
+
+def logo_payload(
+    account_id: str,
+    logo_file,
+    file_type: str,
+    content_type: str,
+) -> dict:
+    """
+    the logo file (uploaded or staged) as a job payload
+    """
+    payload = {
+        "account_id": account_id,
+        "file_type": file_type,
+        "content_type": content_type,
+    }
+
+    if isinstance(logo_file, StagedUpload):
+        payload["upload_path"] = logo_file.path
+    else:
+        logo_file.seek(0)
+        payload["logo"] = logo_file.read()
+
+    return payload
@@ -11,6 +11,8 @@ class CreateAccountPayload(BaseModel):
     email: fields.EmailField = Field(...)
     phone: fields.PhoneField = Field(...)
     logo: Optional[fields.Base64ImageField] = Field(None)
+    # the upload path of a logo uploaded with an upload link, instead of the base64 logo
+    logo_upload: Optional[fields.UploadPathField] = Field(None)
     allowed_users: int = Field(..., ge=1, le=69420)
     lessons: Optional[set[fields.ObjectIdField]] = Field(None)
     categories: Optional[set[fields.ObjectIdField]] = Field(None)
@@ -33,6 +35,7 @@ class UpdateAccountPayload(BaseModel):
     phone: Optional[fields.PhoneField] = Field(None)
     allowed_users: Optional[int] = Field(None, ge=1, le=69420)
     logo: Optional[fields.Base64ImageField] = Field(None)
+    logo_upload: Optional[fields.UploadPathField] = Field(None)
     city: Optional[str] = Field(None, min_length=1, max_length=100)
     institution_name: Optional[str] = Field(None, min_length=1, max_length=100)
     contact_man_name: Optional[str] = Field(None, min_length=1, max_length=200)
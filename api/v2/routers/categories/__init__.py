@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Path, BackgroundTasks
+from fastapi import APIRouter, Depends, Path
 from ...middleware import (
     check_user_permission,
     login_required,
@@ -6,7 +6,8 @@ from ...middleware import (
     Actions,
     Resources,
 )
-from . import models
+from . import models, jobs as category_jobs
+from services import jobs
 from db.models import RolesInternalNames
 from helpers.types import (
     RequestWithPaginationAndFullUser,
@@ -14,7 +15,7 @@ from helpers.types import (
     responses,
 )
 from helpers import fields
-from db import queries, inserts, transactions, updates
+from db import queries, inserts, updates, causal_session
 
 router = APIRouter(dependencies=[Depends(login_required)])
 
@@ -31,6 +32,10 @@ def get_all_categories(
     query: models.GetCategoriesQueryParams = Depends(),
 ):
 
+    # the categories of a guest or a viewer come from their lessons,
+    # there is no stamp for them and the etag is a hash of the response
+    etag = None
+
     if request.state.user.role.internal_name in [
         RolesInternalNames.GUEST,
         RolesInternalNames.VIEWER,
@@ -39,7 +44,19 @@ def get_all_categories(
             query.free_text, request
         )
     else:
-        categoires_res = queries.get_categories_for_external(query.free_text, request)
+        with causal_session() as session:
+            stamp_res = queries.get_categories_stamp(session)
+
+            if stamp_res.success:
+                etag = responses.make_etag(stamp_res.value, request.url.query)
+                not_modified = responses.not_modified(request, etag)
+
+                if not_modified is not None:
+                    return not_modified
+
+            categoires_res = queries.get_categories_for_external(
+                query.free_text, request, session
+            )
 
     if categoires_res.failure:
         return responses.ApiError(
@@ -47,7 +64,10 @@ def get_all_categories(
         )
 
     return responses.PaginationResponse(
-        data=categoires_res.value[0], count=categoires_res.value[1]
+        data=categoires_res.value[0],
+        count=categoires_res.value[1],
+        request=request,
+        etag=etag,
     )
 
 
@@ -86,13 +106,22 @@ def create_new_category(
 )
 def delete_category(
     request: RequestWithFullUser,
-    background_tasks: BackgroundTasks,
     category_id: fields.ObjectIdField = Path(...),
 ):
 
-    background_tasks.add_task(transactions.fully_delete_category, category_id, request)
+    job = jobs.enqueue(
+        category_jobs.DELETE_CATEGORY,
+        {"category_id": category_id, "user_id": request.state.user_id},
+        idempotency_key=f"{category_jobs.DELETE_CATEGORY}:{category_id}",
+        creator=request.state.user_id,
+    )
+
+    if job is None:
+        return responses.ApiError(code=500, message="error while deleting category")
 
-    return responses.ApiSuccess(code=200, message="category deleted successfully")
+    return responses.ApiSuccess(
+        code=200, message="category deleted successfully", data={"job_id": job.id}
+    )
 
 
 @router.put(
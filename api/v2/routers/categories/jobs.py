@@ -0,0 +1,27 @@
+"""
+The categories jobs, enqueued by the categories routes and run by the jobs workers (`services.jobs`)
+"""
+from db import queries, transactions
+from services import jobs
+from ...middleware import request_for_user, Resources, Actions
+
+DELETE_CATEGORY = "categories.delete"
+
+# the permissions the delete route checks
+DELETE_CATEGORY_RESOURCES = {Resources.CATEGORIES: [Actions.DELETE]}
+
+
+@jobs.handler(DELETE_CATEGORY)
+def delete_category(payload: dict):
+    category_id = payload["category_id"]
+
+    # a retry of a deletion that was done
+    if queries.get_category_by_id(category_id).not_found:
+        return
+
+    request = request_for_user(payload["user_id"], DELETE_CATEGORY_RESOURCES)
+
+    res = transactions.fully_delete_category(category_id, request)
+
+    if not res.success:
+        raise jobs.JobError(res.message)
@@ -11,10 +11,10 @@ from helpers.types import (
     RequestWithFullUser,
     RequestWithPagination,
 )
-from db import queries, transactions, queries, updates
+from db import queries, transactions, queries, updates, causal_session
 from helpers import fields
 from . import categories, models
-from services.gcp import GCP_MANAGER
+from services.gcp import GCP_MANAGER, UploadAssets
 from helpers.files import get_file_extension_from_mime_type
 
 router = APIRouter(
@@ -37,11 +37,24 @@ def get_all_site_help(
     query: models.GetSiteHelpQueryParams = Depends(),
 ):
 
-    site_help_res = queries.get_site_helps_for_external(
-        category_id=query.category,
-        list_view=query.list_view,
-        request=request,
-    )
+    etag = None
+
+    with causal_session() as session:
+        stamp_res = queries.get_site_helps_stamp(session)
+
+        if stamp_res.success:
+            etag = responses.make_etag(stamp_res.value, request.url.query)
+            not_modified = responses.not_modified(request, etag)
+
+            if not_modified is not None:
+                return not_modified
+
+        site_help_res = queries.get_site_helps_for_external(
+            category_id=query.category,
+            list_view=query.list_view,
+            request=request,
+            session=session,
+        )
 
     if site_help_res.failure:
         return responses.ApiError(
@@ -51,6 +64,8 @@ def get_all_site_help(
     return responses.PaginationResponse(
         data=site_help_res.value[0],
         count=site_help_res.value[1],
+        request=request,
+        etag=etag,
     )
 
 
@@ -76,10 +91,34 @@ def create_site_help(
             code=500, message="failed to get category with this id"
         )
 
+    background_image = payload.background_image
+    pdf = payload.pdf
+
+    # files uploaded with an upload link are verified, and moved instead of uploaded
+    if payload.background_image_upload:
+        background_image = GCP_MANAGER.get_staged_upload(
+            UploadAssets.SITE_HELP_BACKGROUND_IMAGE,
+            payload.background_image_upload,
+            request.state.user_id,
+        )
+
+        if background_image is None:
+            return responses.ApiError(
+                code=400, message="invalid background image upload"
+            )
+
+    if payload.pdf_upload:
+        pdf = GCP_MANAGER.get_staged_upload(
+            UploadAssets.SITE_HELP_PDF, payload.pdf_upload, request.state.user_id
+        )
+
+        if pdf is None:
+            return responses.ApiError(code=400, message="invalid pdf upload")
+
     add_res = transactions.add_new_site_help(
-        background_image=payload.background_image,
+        background_image=background_image,
         title=payload.title,
-        pdf=payload.pdf,
+        pdf=pdf,
         youtube_link=payload.youtube_link,
         category=payload.category,
         description=payload.description,
@@ -179,18 +218,42 @@ def edit_site_help(
             code=500, message="something went wrong while getting site help"
         )
 
-    if payload.pdf:
+    background_image = payload.background_image
+    pdf = payload.pdf
+
+    # files uploaded with an upload link are verified, and moved instead of uploaded
+    if payload.background_image_upload:
+        background_image = GCP_MANAGER.get_staged_upload(
+            UploadAssets.SITE_HELP_BACKGROUND_IMAGE,
+            payload.background_image_upload,
+            request.state.user_id,
+        )
+
+        if background_image is None:
+            return responses.ApiError(
+                code=400, message="invalid background image upload"
+            )
+
+    if payload.pdf_upload:
+        pdf = GCP_MANAGER.get_staged_upload(
+            UploadAssets.SITE_HELP_PDF, payload.pdf_upload, request.state.user_id
+        )
+
+        if pdf is None:
+            return responses.ApiError(code=400, message="invalid pdf upload")
+
+    if pdf:
         GCP_MANAGER.upload_site_help_pdf(
-            payload.pdf[0],
+            pdf[0],
             site_help_id,
         )
 
-    if payload.background_image:
-        payload.background_image = GCP_MANAGER.upload_site_help_background_image(
-            payload.background_image[0],
+    if background_image:
+        background_image = GCP_MANAGER.upload_site_help_background_image(
+            background_image[0],
             site_help_id,
-            get_file_extension_from_mime_type(payload.background_image[1]),
-            payload.background_image[1],
+            get_file_extension_from_mime_type(background_image[1]),
+            background_image[1],
         )
 
     update_res = updates.update_site_help_by_id(
@@ -199,7 +262,7 @@ def edit_site_help(
         description=payload.description,
         youtube_link=payload.youtube_link,
         category=payload.category,
-        background_image=payload.background_image,
+        background_image=background_image,
         return_document=True,
     )
 
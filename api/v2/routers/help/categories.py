@@ -10,7 +10,7 @@ from helpers.types import (
     RequestWithPagination,
     RequestWithFullUser,
 )
-from db import queries, inserts, updates, transactions
+from db import queries, inserts, updates, transactions, causal_session
 from helpers import fields
 from . import models
 
@@ -22,7 +22,19 @@ def get_all_help_categories(
     request: RequestWithPagination,
 ):
 
-    categoires_res = queries.get_site_help_categories_for_external(request)
+    etag = None
+
+    with causal_session() as session:
+        stamp_res = queries.get_site_help_categories_stamp(session)
+
+        if stamp_res.success:
+            etag = responses.make_etag(stamp_res.value, request.url.query)
+            not_modified = responses.not_modified(request, etag)
+
+            if not_modified is not None:
+                return not_modified
+
+        categoires_res = queries.get_site_help_categories_for_external(request, session)
 
     if categoires_res.failure:
         return responses.ApiError(
@@ -30,7 +42,10 @@ def get_all_help_categories(
         )
 
     return responses.PaginationResponse(
-        data=categoires_res.value[0], count=categoires_res.value[1]
+        data=categoires_res.value[0],
+        count=categoires_res.value[1],
+        request=request,
+        etag=etag,
     )
 
 
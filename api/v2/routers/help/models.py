@@ -9,12 +9,24 @@ class GetSiteHelpQueryParams(BaseModel):
 
 
 class NewSiteHelpPayload(BaseModel):
-    background_image: fields.Base64ImageField = Field(...)
+    background_image: Optional[fields.Base64ImageField] = Field(None)
     title: str = Field(...)
     pdf: Optional[fields.Base64PdfField] = Field(None)
     youtube_link: Optional[fields.URLField] = Field(None)
     category: fields.ObjectIdField = Field(...)
     description: str = Field(...)
+    # the upload paths of files uploaded with an upload link, instead of the base64 files
+    background_image_upload: Optional[fields.UploadPathField] = Field(None)
+    pdf_upload: Optional[fields.UploadPathField] = Field(None)
+
+    @root_validator
+    def need_background_image(cls, values):
+        if not values.get("background_image") and not values.get(
+            "background_image_upload"
+        ):
+            raise ValueError("background image is required")
+
+        return values
 
 
 class NewSiteHelpCategoryPayload(BaseModel):
@@ -41,6 +53,8 @@ class EditSiteHelpPayload(BaseModel):
     youtube_link: Optional[Union[Literal[""], fields.URLField]] = Field(None)
     description: Optional[str] = Field(None)
     category: Optional[fields.ObjectIdField] = Field(None)
+    background_image_upload: Optional[fields.UploadPathField] = Field(None)
+    pdf_upload: Optional[fields.UploadPathField] = Field(None)
 
     @root_validator
     def need_some_value(cls, values):
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, Path
+from ..middleware import login_required
+from db import queries
+from helpers import fields
+from helpers.types import responses, RequestWithUserId
+
+router = APIRouter(dependencies=[Depends(login_required)])
+
+
+@router.get("/{job_id}")
+def get_job_status(
+    request: RequestWithUserId,
+    job_id: fields.ObjectIdField = Path(...),
+):
+    """
+    the status of a job the user started (returned as job_id by the routes that enqueue work),
+    poll it until the status is succeeded or failed
+    """
+    job_res = queries.get_job_by_id(job_id)
+
+    if job_res.failure:
+        if job_res.not_found:
+            return responses.ApiError(code=404, message="job not found")
+        return responses.ApiError(code=500, message="error while getting job")
+
+    job = job_res.value
+
+    if not str(job.creator) == request.state.user_id:
+        return responses.ApiError(code=404, message="job not found")
+
+    return responses.ApiSuccess(
+        data=job.dict(
+            include={
+                "id",
+                "name",
+                "status",
+                "attempts",
+                "max_attempts",
+                "error",
+                "result",
+                "created_at",
+                "run_at",
+                "finished_at",
+            }
+        )
+    )
@@ -1,6 +1,10 @@
 from fastapi import APIRouter, Depends, Query
 from ...middleware import login_required, check_user_permission, Resources, Actions
-from services.gcp import GCP_MANAGER, FoldersNames as GCPFoldersNames
+from services.gcp import (
+    GCP_MANAGER,
+    FoldersNames as GCPFoldersNames,
+    UploadAssets,
+)
 from helpers.files import (
     get_video_mime_type,
     get_image_mime_type,
@@ -44,16 +48,18 @@ def get_draft_lesson(request: RequestWithUserId):
         return responses.ApiError()
 
     draft = draft_res.value
-    
+
+    urls = GCP_MANAGER.bucket_manager.generate_files_download_urls(
+        [part.gcp_path for part in draft.parts if part.gcp_path]
+    )
+
     for part in draft.parts:
         if part.gcp_path:
-            part.gcp_path = GCP_MANAGER.bucket_manager.generate_file_download_url(
-                part.gcp_path
-            )
-    
+            part.gcp_path = urls[part.gcp_path]
+
     draft_data = draft_res.value.dict()
 
-    return responses.ApiSuccess(data=draft_data)
+    return responses.ApiSuccess(data=draft_data, request=request)
 
 
 @router.put(
@@ -85,22 +91,44 @@ def edit_draft_lesson_basic_info(
             if not category_res.value:
                 return responses.ApiError(message="invalid categories")
 
-    if data.thumbnail:
-        file_type = get_file_extension_from_mime_type(data.thumbnail[1])
+    thumbnail_source = data.thumbnail
+    description_file_source = data.description_file
+
+    # files uploaded with an upload link are verified, and moved instead of uploaded
+    if data.thumbnail_upload:
+        thumbnail_source = GCP_MANAGER.get_staged_upload(
+            UploadAssets.LESSON_THUMBNAIL, data.thumbnail_upload, request.state.user_id
+        )
+
+        if thumbnail_source is None:
+            return responses.ApiError(message="invalid thumbnail upload")
+
+    if data.description_file_upload:
+        description_file_source = GCP_MANAGER.get_staged_upload(
+            UploadAssets.LESSON_DESCRIPTION_FILE,
+            data.description_file_upload,
+            request.state.user_id,
+        )
+
+        if description_file_source is None:
+            return responses.ApiError(message="invalid description file upload")
+
+    if thumbnail_source:
+        file_type = get_file_extension_from_mime_type(thumbnail_source[1])
 
         if file_type is None:
             return responses.ApiError(message="invalid file type")
 
         # upload the image to the bucket and get the url (publicly accessible)
         url = GCP_MANAGER.upload_lesson_thumbnail(
-            data.thumbnail[0], str(draft.id), file_type, data.thumbnail[1]
+            thumbnail_source[0], str(draft.id), file_type, thumbnail_source[1]
         )
 
         thumbnail = url
 
-    if data.description_file:
+    if description_file_source:
         file_name = GCP_MANAGER.upload_lesson_description_file(
-            data.description_file[0], str(draft.id)
+            description_file_source[0], str(draft.id)
         )
 
         description_file = file_name
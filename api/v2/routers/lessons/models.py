@@ -10,6 +10,9 @@ class EditDraftLessonBasicInfoPayload(BaseModel):
     categories: Optional[list[fields.ObjectIdField]] = Field(None)
     thumbnail: Optional[fields.Base64ImageField] = Field(None)
     description_file: Optional[fields.Base64PdfField] = Field(None)
+    # the upload paths of files uploaded with an upload link, instead of the base64 files
+    thumbnail_upload: Optional[fields.UploadPathField] = Field(None)
+    description_file_upload: Optional[fields.UploadPathField] = Field(None)
     credit: Optional[str] = Field(None, max_length=41)
 
     @root_validator
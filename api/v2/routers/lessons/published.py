@@ -1,12 +1,19 @@
 from fastapi import APIRouter, Depends, Path, Query
-from ...middleware import pagintor, check_user_permission, Actions, Resources
+from fastapi.concurrency import run_in_threadpool
+from ...middleware import (
+    pagintor,
+    check_user_permission,
+    check_user_permission_async,
+    Actions,
+    Resources,
+)
 from helpers import fields
 from helpers.types import (
     RequestWithPaginationAndFullUser,
     responses,
     RequestWithFullUser,
 )
-from db import queries, transactions
+from db import queries, transactions, aio
 from services.gcp import GCP_MANAGER
 from typing import Optional
 
@@ -18,39 +25,48 @@ router = APIRouter()
     dependencies=[
         Depends(pagintor),
         Depends(
-            check_user_permission({Resources.PUBLISHED_LESSONS: [Actions.READ_MANY]})
+            check_user_permission_async(
+                {Resources.PUBLISHED_LESSONS: [Actions.READ_MANY]}
+            )
         ),
     ],
 )
-def get_all_published_lessons(
+async def get_all_published_lessons(
     request: RequestWithPaginationAndFullUser,
     category: Optional[fields.ObjectIdField] = Query(None),
 ):
 
-    lessons_res = queries.get_published_lessons_for_external(request, category=category)
+    lessons_res = await aio.queries.get_published_lessons_for_external(
+        request, category=category
+    )
 
     if lessons_res.failure:
+        if lessons_res.not_valid:
+            return responses.ApiError(message="invalid cursor", code=400)
         return responses.ApiError(message="failed to get published lessons", code=500)
 
-    lessons, count = lessons_res.value
+    lessons, count, next_cursor = lessons_res.value
 
     return responses.PaginationResponse(
         data=lessons,
         count=count,
+        next_cursor=next_cursor,
     )
 
 
 @router.get(
     "/description-file/{lesson_id}",
     dependencies=[
-        Depends(check_user_permission({Resources.PUBLISHED_LESSONS: [Actions.READ]})),
+        Depends(
+            check_user_permission_async({Resources.PUBLISHED_LESSONS: [Actions.READ]})
+        ),
     ],
 )
-def get_published_lesson_description_file_by_id(
+async def get_published_lesson_description_file_by_id(
     request: RequestWithFullUser, lesson_id: fields.ObjectIdField = Path(...)
 ):
 
-    lesson_res = queries.get_published_lesson_by_id(lesson_id, request)
+    lesson_res = await aio.queries.get_published_lesson_by_id(lesson_id, request)
 
     if lesson_res.failure:
         if lesson_res.not_found:
@@ -62,7 +78,9 @@ def get_published_lesson_description_file_by_id(
     if not lesson.description_file:
         return responses.ApiError(message="lesson has no description file", code=404)
 
-    url = GCP_MANAGER.bucket_manager.generate_file_download_url(lesson.description_file)
+    url = await run_in_threadpool(
+        GCP_MANAGER.bucket_manager.generate_file_download_url, lesson.description_file
+    )
 
     return responses.ApiSuccess(data={"url": url})
 
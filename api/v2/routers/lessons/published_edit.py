@@ -17,7 +17,11 @@ import time
 from db import queries, updates, transactions
 from db.models import ScreensTypes, LessonPart, LessonScreen
 from . import models
-from services.gcp import GCP_MANAGER, FoldersNames as GCPFoldersNames
+from services.gcp import (
+    GCP_MANAGER,
+    FoldersNames as GCPFoldersNames,
+    UploadAssets,
+)
 from google.cloud.exceptions import NotFound
 
 router = APIRouter(
@@ -147,19 +151,22 @@ def get_edit_data_of_published_lesson_by_id(
     }
 
     parts = edit_data.pop("parts", [])
-    
+
+    urls = GCP_MANAGER.bucket_manager.generate_files_download_urls(
+        [part["gcp_path"] for part in parts if part.get("gcp_path")]
+    )
+
     for part in parts:
         if part.get("gcp_path"):
-            part["gcp_path"] = GCP_MANAGER.bucket_manager.generate_file_download_url(
-                part["gcp_path"]
-            )
-    
+            part["gcp_path"] = urls[part["gcp_path"]]
+
     return responses.ApiSuccess(
         data={
             **lesson,
             **edit_data,
             "parts": parts
-        }
+        },
+        request=request,
     )
 
 
@@ -204,22 +211,48 @@ def edit_published_lesson_basic_info_by_id(
             if not category_res.value:
                 return responses.ApiError(message="invalid categories")
 
-    if data.thumbnail:
-        file_type = get_file_extension_from_mime_type(data.thumbnail[1])
+    thumbnail_source = data.thumbnail
+    description_file_source = data.description_file
+
+    # files uploaded with an upload link are verified, and moved instead of uploaded
+    if data.thumbnail_upload:
+        thumbnail_source = GCP_MANAGER.get_staged_upload(
+            UploadAssets.LESSON_THUMBNAIL, data.thumbnail_upload, request.state.user_id
+        )
+
+        if thumbnail_source is None:
+            return responses.ApiError(message="invalid thumbnail upload")
+
+    if data.description_file_upload:
+        description_file_source = GCP_MANAGER.get_staged_upload(
+            UploadAssets.LESSON_DESCRIPTION_FILE,
+            data.description_file_upload,
+            request.state.user_id,
+        )
+
+        if description_file_source is None:
+            return responses.ApiError(message="invalid description file upload")
+
+    if thumbnail_source:
+        file_type = get_file_extension_from_mime_type(thumbnail_source[1])
 
         if file_type is None:
             return responses.ApiError(message="invalid file type")
 
         # upload the image to the bucket and get the url (publicly accessible)
         url = GCP_MANAGER.upload_lesson_thumbnail(
-            data.thumbnail[0], str(lesson_id), file_type, data.thumbnail[1], edit=True
+            thumbnail_source[0],
+            str(lesson_id),
+            file_type,
+            thumbnail_source[1],
+            edit=True,
         )
 
         thumbnail = url
 
-    if data.description_file:
+    if description_file_source:
         file_name = GCP_MANAGER.upload_lesson_description_file(
-            data.description_file[0], str(lesson_id), edit=True
+            description_file_source[0], str(lesson_id), edit=True
         )
 
         description_file = file_name
@@ -5,13 +5,12 @@ from helpers.types import responses, RequestWithFullUser
 from helpers import fields
 from helpers.secuirty import tokens
 from . import models
-from db import inserts, queries, updates
+from db import queries, updates, aio
 
 router = APIRouter()
 
 
-@router.get("/metadata")
-def reviews_meta_data(_: Request):
+def _reviews_meta_data() -> dict:
 
     ratings_fields = []
 
@@ -23,13 +22,29 @@ def reviews_meta_data(_: Request):
     for position in Positions:
         positions_fields.append({"key": position.value, "label": position.label()})
 
+    return {"ratings": ratings_fields, "positions": positions_fields}
+
+
+# the metadata only changes with a deploy
+_REVIEWS_META_DATA = _reviews_meta_data()
+_REVIEWS_META_DATA_ETAG = responses.make_etag(_REVIEWS_META_DATA)
+
+
+@router.get("/metadata")
+def reviews_meta_data(request: Request):
+
+    not_modified = responses.not_modified(request, _REVIEWS_META_DATA_ETAG)
+
+    if not_modified is not None:
+        return not_modified
+
     return responses.ApiSuccess(
-        data={"ratings": ratings_fields, "positions": positions_fields}
+        data=_REVIEWS_META_DATA, request=request, etag=_REVIEWS_META_DATA_ETAG
     )
 
 
 @router.post("")
-def create_review(_: Request, payload: models.CreateReviewPayload):
+async def create_review(_: Request, payload: models.CreateReviewPayload):
 
     token_res = tokens.decode_watch_token(payload.token)
 
@@ -50,7 +65,7 @@ def create_review(_: Request, payload: models.CreateReviewPayload):
             )
         )
 
-    review_res = inserts.insert_new_lesson_review(
+    review_res = await aio.inserts.insert_new_lesson_review(
         ratings=ratings,
         lesson=token_data.lesson_id,
         user=token_data.issuer,
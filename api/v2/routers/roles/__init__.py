@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, Query
 from ...middleware import check_user_permission, login_required, Resources, Actions
 from helpers.types import RequestWithFullUser, responses
-from db import queries, updates
+from db import queries, updates, causal_session
 from . import models
 
 router = APIRouter(dependencies=[Depends(login_required)])
@@ -25,7 +25,23 @@ def get_roles(
     ),
 ):
 
-    roles_res = queries.get_roles_for_external(request, accountable, not_accountable)
+    etag = None
+
+    with causal_session() as session:
+        stamp_res = queries.get_roles_stamp(
+            request, accountable, not_accountable, session
+        )
+
+        if stamp_res.success:
+            etag = responses.make_etag(stamp_res.value)
+            not_modified = responses.not_modified(request, etag)
+
+            if not_modified is not None:
+                return not_modified
+
+        roles_res = queries.get_roles_for_external(
+            request, accountable, not_accountable, session
+        )
 
     if roles_res.failure:
         return responses.ApiError(
@@ -33,7 +49,7 @@ def get_roles(
             code=500,
         )
 
-    return responses.ApiSuccess(data=roles_res.value)
+    return responses.ApiSuccess(data=roles_res.value, request=request, etag=etag)
 
 
 @router.put(
@@ -86,4 +102,4 @@ def get_guest_role_full_extarnel(
             code=500,
         )
 
-    return responses.ApiSuccess(data=query_res.value)
+    return responses.ApiSuccess(data=query_res.value, request=request)
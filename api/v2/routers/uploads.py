@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, Query
+from ..middleware import login_required
+from services.gcp import GCP_MANAGER, UploadAssets
+from helpers.types import responses, RequestWithUserId
+
+router = APIRouter(dependencies=[Depends(login_required)])
+
+
+@router.get("/link")
+def get_upload_link(
+    request: RequestWithUserId,
+    asset: UploadAssets = Query(...),
+    file_type: str = Query(...),
+):
+    """
+    a signed url to upload a file directly to the bucket, upload it with a PUT request
+    and the returned content type, then send the upload path in the payload of the asset
+    (thumbnail_upload, description_file_upload, logo_upload, background_image_upload, pdf_upload).
+    the permissions are checked by the route that uses the upload
+    """
+    upload = GCP_MANAGER.generate_staged_upload_url(
+        asset, request.state.user_id, file_type.lower()
+    )
+
+    if upload is None:
+        return responses.ApiError(message="invalid file type")
+
+    return responses.ApiSuccess(data=upload)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Path, BackgroundTasks
+from fastapi import APIRouter, Depends, Path
 from ...middleware import (
     login_required,
     check_user_permission,
@@ -13,8 +13,9 @@ from helpers.types import (
     RequestWithPaginationAndFullUser,
     UserPopulateOptions,
 )
-from db import queries, updates, transactions
-from . import register, login, password, models, logout
+from db import queries, updates
+from . import register, login, password, models, logout, jobs as user_jobs
+from services import jobs
 from helpers import fields
 
 router = APIRouter()
@@ -194,7 +195,6 @@ def update_user_by_id(
 )
 def delete_user_by_id(
     request: RequestWithFullUser,
-    background_tasks: BackgroundTasks,
     user_id: fields.ObjectIdField = Path(...),
 ):
     if request.state.user_id == str(user_id):
@@ -213,6 +213,16 @@ def delete_user_by_id(
             return responses.ApiError(code=404, message="user not found")
         return responses.ApiError(code=500, message="error while getting user")
 
-    background_tasks.add_task(transactions.fully_delete_user, user_id, request)
+    job = jobs.enqueue(
+        user_jobs.DELETE_USER,
+        {"user_id": user_id, "deleted_by": request.state.user_id},
+        idempotency_key=f"{user_jobs.DELETE_USER}:{user_id}",
+        creator=request.state.user_id,
+    )
+
+    if job is None:
+        return responses.ApiError(code=500, message="error while deleting user")
 
-    return responses.ApiSuccess(message="user deleted successfully")
+    return responses.ApiSuccess(
+        message="user deleted successfully", data={"job_id": job.id}
+    )
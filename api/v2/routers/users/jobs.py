@@ -0,0 +1,51 @@
+"""
+The users jobs, enqueued by the users routes and run by the jobs workers (`services.jobs`)
+"""
+from db import queries, updates, transactions
+from services import jobs
+from services.sendgrid import EMAIL_SERVICE
+from helpers.secuirty import tokens
+from ...middleware import request_for_user, Resources, Actions
+
+DELETE_USER = "users.delete"
+SEND_REGISTRATION_EMAIL = "users.send_registration_email"
+
+# the permissions the delete route checks
+DELETE_USER_RESOURCES = {Resources.USERS: [Actions.DELETE]}
+
+
+@jobs.handler(DELETE_USER)
+def delete_user(payload: dict):
+    user_id = payload["user_id"]
+
+    # a retry of a deletion that was done
+    if queries.get_user_by_id(user_id).not_found:
+        return
+
+    request = request_for_user(payload["deleted_by"], DELETE_USER_RESOURCES)
+
+    res = transactions.fully_delete_user(user_id, request)
+
+    if not res.success:
+        raise jobs.JobError(res.message)
+
+
+@jobs.handler(SEND_REGISTRATION_EMAIL)
+def send_registration_email(payload: dict):
+    user_res = queries.get_user_by_id(payload["user_id"])
+
+    if user_res.not_found:
+        # deleted before the email was sent
+        return
+
+    if user_res.failure:
+        raise jobs.JobError("failed to get the user")
+
+    user = user_res.value
+
+    token = tokens.generate_first_login_token(str(user.id))
+
+    if updates.set_user_registration_token(user.id, token).failure:
+        raise jobs.JobError("failed to save the registration token")
+
+    EMAIL_SERVICE.send_regstration_email(user.email, user.email, user.full_name, token)
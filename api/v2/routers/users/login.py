@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends
-from db import queries, updates
+from fastapi import APIRouter, Depends, BackgroundTasks
+from bson import ObjectId
+from db import aio
 from ...middleware import (
     guest_required,
 )
@@ -12,10 +13,23 @@ from helpers import cookies
 router = APIRouter(dependencies=[Depends(guest_required)])
 
 
+async def _rehash_password(user_id: ObjectId, old_password: str, password: str):
+    """
+    hash the password again with the current parameters, after the login response is sent
+    """
+    try:
+        new_password = await passwords.hash_password_async(password)
+    except passwords.PasswordEngineBusy:
+        # rehashed on a next login
+        return
+
+    await aio.updates.rehash_user_password(user_id, old_password, new_password)
+
+
 @router.post("")
-def login(data: models.UserLoginPayload):
+async def login(data: models.UserLoginPayload, background_tasks: BackgroundTasks):
 
-    user_res = queries.get_user_by_email(data.email)
+    user_res = await aio.queries.get_user_by_email(data.email)
 
     user_not_found_response = responses.ApiError(
         message="wrong email or password",
@@ -29,10 +43,15 @@ def login(data: models.UserLoginPayload):
 
     user = user_res.value
 
-    if not passwords.check_password(user.password, data.password):
+    if not await passwords.check_password_async(user.password, data.password):
         return user_not_found_response
 
-    get_me_res = queries.get_user_for_get_me(user.id)
+    if passwords.needs_rehash(user.password):
+        background_tasks.add_task(
+            _rehash_password, user.id, user.password, data.password
+        )
+
+    get_me_res = await aio.queries.get_user_for_get_me(user.id)
 
     if get_me_res.failure:
         if get_me_res.not_found:
@@ -47,7 +66,7 @@ def login(data: models.UserLoginPayload):
 
 
 @router.post("/first")
-def first_login(data: models.FirstLoginPayload):
+async def first_login(data: models.FirstLoginPayload):
 
     token_res = tokens.decode_first_login_token(data.token)
 
@@ -58,10 +77,10 @@ def first_login(data: models.FirstLoginPayload):
 
     token_data = token_res.value
 
-    user_res = updates.set_user_registration_completed(
+    user_res = await aio.updates.set_user_registration_completed(
         token_data.user_id,
         data.token,
-        passwords.hash_password(data.password),
+        await passwords.hash_password_async(data.password),
     )
 
     if user_res.failure:
@@ -71,7 +90,7 @@ def first_login(data: models.FirstLoginPayload):
 
     user = user_res.value
 
-    get_me_res = queries.get_user_for_get_me(user.id)
+    get_me_res = await aio.queries.get_user_for_get_me(user.id)
 
     if get_me_res.failure:
         return responses.ApiError(message="something went wrong", code=500)
@@ -84,7 +103,7 @@ def first_login(data: models.FirstLoginPayload):
 
 
 @router.post("/reset")
-def login_with_reset_password_token(payload: models.ResetPasswordPayload):
+async def login_with_reset_password_token(payload: models.ResetPasswordPayload):
 
     token_res = tokens.decode_reset_password_token(payload.token)
 
@@ -95,10 +114,10 @@ def login_with_reset_password_token(payload: models.ResetPasswordPayload):
 
     token_data = token_res.value
 
-    user_res = updates.change_user_password_with_token(
+    user_res = await aio.updates.change_user_password_with_token(
         token_data.user_id,
         payload.token,
-        password=passwords.hash_password(payload.password),
+        password=await passwords.hash_password_async(payload.password),
     )
 
     if user_res.failure:
@@ -108,7 +127,7 @@ def login_with_reset_password_token(payload: models.ResetPasswordPayload):
 
     user = user_res.value
 
-    get_me_res = queries.get_user_for_get_me(user.id)
+    get_me_res = await aio.queries.get_user_for_get_me(user.id)
 
     if get_me_res.failure:
         return responses.ApiError(message="something went wrong", code=500)
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
 from . import models
-from db import queries, updates
+from db import queries, updates, aio
 from ...middleware import login_required, guest_required
 from helpers.secuirty import passwords
 from helpers.types import responses, RequestWithUserId
@@ -11,20 +12,22 @@ router = APIRouter()
 
 
 @router.put("/change", dependencies=[Depends(login_required)])
-def change_password(req: RequestWithUserId, data: models.ChangePasswordPayload):
+async def change_password(req: RequestWithUserId, data: models.ChangePasswordPayload):
 
-    user = queries.get_user_by_id(req.state.user_id)
+    user = await aio.queries.get_user_by_id(req.state.user_id)
 
     if not user.success:
         return responses.ApiError(code=400, message="user not found")
 
     user = user.value
 
-    if not passwords.check_password(user.password, data.old_password):
+    if not await passwords.check_password_async(user.password, data.old_password):
         return responses.ApiError(code=403, message="wrong password")
 
-    db_res = updates.update_user_by_id(
-        user.id, password=passwords.hash_password(data.new_password)
+    db_res = await run_in_threadpool(
+        updates.update_user_by_id,
+        user.id,
+        password=await passwords.hash_password_async(data.new_password),
     )
 
     if not db_res.success:
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, BackgroundTasks
+from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
 from ...middleware import (
     guest_required,
     login_required,
@@ -6,28 +7,29 @@ from ...middleware import (
     Actions,
     Resources,
 )
-from . import models
-from db import queries, inserts, updates
+from . import models, jobs as user_jobs
+from services import jobs
+from db import queries, inserts, updates, aio
 from helpers.types import responses, RequestWithFullUser
 from helpers.secuirty import tokens, passwords
-from services.sendgrid import EMAIL_SERVICE
 from helpers import cookies
 
 router = APIRouter()
 
 
 @router.post("/guest", dependencies=[Depends(guest_required)])
-def register_as_guest(data: models.RegisterAsGuestPayload):
+async def register_as_guest(data: models.RegisterAsGuestPayload):
 
-    guest_role = queries.get_guest_role()
+    guest_role = await run_in_threadpool(queries.get_guest_role)
 
     if guest_role.failure or guest_role.not_found:
         return guest_role.into_response()
 
-    user_res = inserts.insert_new_guest_user(
+    user_res = await run_in_threadpool(
+        inserts.insert_new_guest_user,
         guest_role=guest_role.value,
         email=data.email,
-        password=passwords.hash_password(data.password),
+        password=await passwords.hash_password_async(data.password),
         first_name=data.first_name,
         last_name=data.last_name,
     )
@@ -48,7 +50,7 @@ def register_as_guest(data: models.RegisterAsGuestPayload):
     #     user.email, user.email, user.full_name, token, True
     # )
 
-    get_me_res = queries.get_user_for_get_me(user.id)
+    get_me_res = await aio.queries.get_user_for_get_me(user.id)
 
     if get_me_res.failure:
         if get_me_res.not_found:
@@ -101,16 +103,15 @@ def verify_registration(data: models.VerifyRegistrationPayload):
         Depends(check_user_permission({Resources.USERS: [Actions.CREATE]})),
     ],
 )
-def register_new_user(
+async def register_new_user(
     request: RequestWithFullUser,
     data: models.RegisterUserPayload,
-    background_tasks: BackgroundTasks,
 ):
 
     account = data.account or request.state.user.account
 
     if account:
-        account_res = queries.check_account_user_limit(account)
+        account_res = await run_in_threadpool(queries.check_account_user_limit, account)
 
         if account_res.failure:
             return responses.ApiError(
@@ -124,7 +125,7 @@ def register_new_user(
                 code=400,
             )
 
-    role_res = queries.get_role_by_id(data.role, request)
+    role_res = await run_in_threadpool(queries.get_role_by_id, data.role, request)
 
     if role_res.failure:
         if not role_res.not_found:
@@ -148,10 +149,11 @@ def register_new_user(
             code=400,
         )
 
-    user_res = inserts.insert_new_user(
+    user_res = await run_in_threadpool(
+        inserts.insert_new_user,
         request=request,
         email=data.email,
-        password=passwords.hash_password(passwords.generate_password()),
+        password=await passwords.hash_password_async(passwords.generate_password()),
         first_name=data.first_name,
         last_name=data.last_name,
         role=data.role,
@@ -178,24 +180,20 @@ def register_new_user(
 
     user = user_res.value
 
-    def send_user_created_mail(user):
-
-        if updates.update_account_current_users_count(user.account, 1).failure:
-            # TODO log error
-            pass
-
-        token = tokens.generate_first_login_token(str(user.id))
-
-        update_res = updates.set_user_registration_token(user.id, token)
-
-        if update_res.failure:
-            # TODO log error
-            return
-
-        EMAIL_SERVICE.send_regstration_email(
-            user.email, user.email, user.full_name, token
+    if (
+        await run_in_threadpool(
+            updates.update_account_current_users_count, user.account, 1
         )
-
-    background_tasks.add_task(send_user_created_mail, user)
+    ).failure:
+        # TODO log error
+        pass
+
+    await run_in_threadpool(
+        jobs.enqueue,
+        user_jobs.SEND_REGISTRATION_EMAIL,
+        {"user_id": user.id},
+        idempotency_key=f"{user_jobs.SEND_REGISTRATION_EMAIL}:{user.id}",
+        creator=request.state.user_id,
+    )
 
     return responses.ApiSuccess()
@@ -1,8 +1,14 @@
-from fastapi import APIRouter, Path, Depends, Query, BackgroundTasks
-from ..middleware import check_user_permission, login_required, Actions, Resources
+from fastapi import APIRouter, Path, Depends, Query, BackgroundTasks, Request
+from fastapi.concurrency import run_in_threadpool
+from ..middleware import (
+    check_user_permission_async,
+    login_required,
+    Actions,
+    Resources,
+)
 from helpers.types import RequestWithFullUser, responses
 from helpers import fields
-from db import queries, updates
+from db import aio, counters
 from db.models.lessons.common import LessonScreen, LessonPart
 from helpers.secuirty import tokens
 from services.gcp import GCP_MANAGER
@@ -16,12 +22,12 @@ router = APIRouter()
     "/token/draft",
     dependencies=[
         Depends(login_required),
-        Depends(check_user_permission({Resources.DRAFT_LESSONS: [Actions.READ]})),
+        Depends(check_user_permission_async({Resources.DRAFT_LESSONS: [Actions.READ]})),
     ],
 )
-def get_watch_token_for_draft_lesson(request: RequestWithFullUser):
+async def get_watch_token_for_draft_lesson(request: RequestWithFullUser):
 
-    draft_res = queries.get_draft_lesson_by_creator(request.state.user_id)
+    draft_res = await aio.queries.get_draft_lesson_by_creator(request.state.user_id)
 
     if draft_res.failure:
         if draft_res.not_found:
@@ -45,7 +51,7 @@ def get_watch_token_for_draft_lesson(request: RequestWithFullUser):
     dependencies=[
         Depends(login_required),
         Depends(
-            check_user_permission(
+            check_user_permission_async(
                 {
                     Resources.PUBLISHED_LESSONS: [Actions.READ],
                 }
@@ -53,13 +59,15 @@ def get_watch_token_for_draft_lesson(request: RequestWithFullUser):
         ),
     ],
 )
-def get_watch_token_for_published_lesson(
+async def get_watch_token_for_published_lesson(
     request: RequestWithFullUser,
     background_tasks: BackgroundTasks,
     lesson_id: fields.ObjectIdField = Path(...),
 ):
 
-    lesson_res = queries.get_published_lesson_by_id(lesson_id, request=request)
+    lesson_res = await aio.queries.get_published_lesson_by_id(
+        lesson_id, request=request
+    )
 
     if lesson_res.failure:
         if lesson_res.not_found:
@@ -69,7 +77,7 @@ def get_watch_token_for_published_lesson(
             )
         return responses.ApiError(code=500, message="failed to get lesson")
 
-    background_tasks.add_task(updates.add_view_to_published_lesson, lesson_id)
+    background_tasks.add_task(counters.views.add_view, lesson_id)
 
     token = tokens.generate_watch_token(
         str(lesson_id), "published", request.state.user_id
@@ -83,7 +91,7 @@ def get_watch_token_for_published_lesson(
     dependencies=[
         Depends(login_required),
         Depends(
-            check_user_permission(
+            check_user_permission_async(
                 {
                     Resources.PUBLISHED_LESSONS: [Actions.UPDATE],
                 }
@@ -91,13 +99,13 @@ def get_watch_token_for_published_lesson(
         ),
     ],
 )
-def get_watch_token_for_published_lesson_edit(
+async def get_watch_token_for_published_lesson_edit(
     request: RequestWithFullUser, lesson_id: fields.ObjectIdField = Path(...)
 ):
 
     user_id = ObjectId(request.state.user_id)
 
-    lesson_res = queries.get_published_lesson_by_id(
+    lesson_res = await aio.queries.get_published_lesson_by_id(
         lesson_id, request=request, action=Actions.UPDATE
     )
 
@@ -126,7 +134,7 @@ def get_watch_token_for_published_lesson_edit(
 
 
 @router.get("/data")
-def get_watch_data(token: str = Query(..., min_length=1)):
+async def get_watch_data(request: Request, token: str = Query(..., min_length=1)):
 
     token_res = tokens.decode_watch_token(token)
 
@@ -138,12 +146,12 @@ def get_watch_data(token: str = Query(..., min_length=1)):
     edit_lesson = False
 
     if token_data.lesson_type == "draft":
-        lesson_res = queries.get_draft_lesson_by_id(token_data.lesson_id)
+        lesson_res = await aio.queries.get_draft_lesson_by_id(token_data.lesson_id)
     elif token_data.lesson_type == "published":
-        lesson_res = queries.get_published_lesson_by_id(token_data.lesson_id)
+        lesson_res = await aio.queries.get_published_lesson_by_id(token_data.lesson_id)
     elif token_data.lesson_type == "publish-edit":
         edit_lesson = True
-        lesson_res = queries.get_published_lesson_by_id(token_data.lesson_id)
+        lesson_res = await aio.queries.get_published_lesson_by_id(token_data.lesson_id)
     else:
         return responses.ApiError(message="?")
 
@@ -167,19 +175,39 @@ def get_watch_data(token: str = Query(..., min_length=1)):
         lesson.parts if not edit_lesson else lesson.edit_data.parts
     )
 
-    data: list[dict] = []
+    # signing the urls is blocking (and might be a network call), so it runs in the threadpool
+    data = await run_in_threadpool(_sign_lesson_parts, lesson_parts)
+
+    # the signed urls are part of the content, they are handed out again while they are
+    # fresh (see `SIGNED_URLS_CACHE`), so the etag changes when they are renewed
+    return responses.ApiSuccess(data=data, request=request)
+
+
+def _sign_lesson_parts(lesson_parts: list[LessonPart]) -> list[dict]:
+
+    paths: list[str] = []
 
     for part in lesson_parts:
         screens: list[LessonScreen] = part.screens
         if part.gcp_path:
-            part.gcp_path = GCP_MANAGER.bucket_manager.generate_file_download_url(
-                part.gcp_path, expiration=timedelta(days=2)
-            )
+            paths.append(part.gcp_path)
         for screen in screens:
             if screen.mime_type:
-                screen.url = GCP_MANAGER.bucket_manager.generate_file_download_url(
-                    screen.url, expiration=timedelta(days=2)
-                )
+                paths.append(screen.url)
+
+    # sign all the lesson files in one batch instead of one by one
+    urls = GCP_MANAGER.bucket_manager.generate_files_download_urls(
+        paths, expiration=timedelta(days=2)
+    )
+
+    data: list[dict] = []
+
+    for part in lesson_parts:
+        if part.gcp_path:
+            part.gcp_path = urls[part.gcp_path]
+        for screen in part.screens:
+            if screen.mime_type:
+                screen.url = urls[screen.url]
         data.append(part.dict())
 
-    return responses.ApiSuccess(data=data)
+    return data
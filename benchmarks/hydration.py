@@ -0,0 +1,165 @@
+"""
+Micro-benchmark of the models hydration, validated (`Model(**doc)`) vs trusted (`Model.from_db(doc)`).
+
+Builds large documents shaped like the ones the queries read (a published lesson with its
+edit data, a populated user) and times both paths. Both must build the same model,
+the benchmark fails if their `dict()` differ.
+
+usage (from the project root, no database is needed):
+
+    python benchmarks/hydration.py
+    python benchmarks/hydration.py --parts 200 --number 200
+"""
+import sys
+import os
+import argparse
+import timeit
+from datetime import datetime
+from typing import Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from bson import ObjectId
+from db.models import (
+    PublishedLessons,
+    Users,
+    Roles,
+    Accounts,
+    LessonPart,
+    LessonScreen,
+    ScreensTypes,
+    Categories,
+    Permissions,
+    Resources,
+    Actions,
+    RolesInternalNames,
+)
+
+
+def _lesson_parts(count: int) -> list[dict]:
+    return [
+        LessonPart(
+            order=order,
+            title=f"part {order}",
+            screens=[
+                LessonScreen(
+                    url=f"lessons/x/{order}/{screen}.mp4",
+                    type_=ScreensTypes.VIDEO,
+                    mime_type="video/mp4",
+                    comment="comment",
+                )
+                for screen in range(3)
+            ],
+        ).dict()
+        for order in range(count)
+    ]
+
+
+def _user_doc() -> dict:
+    role = Roles(
+        name="editor",
+        internal_name=RolesInternalNames.EDITOR,
+        permissions=[
+            Permissions(resource=resource, actions=[action for action in Actions])
+            for resource in Resources
+        ],
+        rank=3,
+    )
+
+    account = Accounts(
+        institution_name="institution",
+        city="city",
+        contact_man_name="contact",
+        email="account@example.com",
+        phone="+972500000000",
+        allowed_users=10,
+    )
+
+    user = Users(
+        email="user@example.com",
+        first_name="first",
+        last_name="last",
+        password="password",
+        role=ObjectId(),
+        account=ObjectId(),
+    ).dict(to_db=True)
+
+    user["_id"] = ObjectId()
+    user["role"] = {**role.dict(to_db=True), "_id": ObjectId()}
+    user["account"] = {**account.dict(to_db=True), "_id": ObjectId()}
+
+    return user
+
+
+def _lesson_doc(parts: int) -> dict:
+    categories = [
+        {**Categories(name=f"category {i}").dict(to_db=True), "_id": ObjectId()}
+        for i in range(5)
+    ]
+
+    return {
+        "_id": ObjectId(),
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow(),
+        "title": "lesson",
+        "description": "description",
+        "creator": ObjectId(),
+        "parts": _lesson_parts(parts),
+        "viewed": 10,
+        "categories": categories,
+        "mid_edit": True,
+        "edit_data": {
+            "initial_editor": ObjectId(),
+            "current_editor": ObjectId(),
+            "title": "edited lesson",
+            "parts": _lesson_parts(parts),
+            "categories": [category["_id"] for category in categories],
+            "started_at": datetime.utcnow(),
+        },
+        "public": True,
+        "review_stats": {
+            "quality": {"average": 4.5, "count": 2, "sum": 9},
+        },
+    }
+
+
+def _compare(name: str, build: Callable[[], dict], model, number: int):
+    doc = build()
+
+    validated = model(**doc)
+    trusted = model.from_db(doc)
+
+    if not validated.dict() == trusted.dict():
+        raise SystemExit(f"{name}: the trusted model differs from the validated one")
+
+    validated_time = timeit.timeit(lambda: model(**doc), number=number) / number
+    trusted_time = timeit.timeit(lambda: model.from_db(doc), number=number) / number
+
+    print(
+        f"{name:<30} validated {validated_time * 1000:8.3f} ms"
+        f"   trusted {trusted_time * 1000:8.3f} ms"
+        f"   x{validated_time / trusted_time:.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--parts", type=int, default=50, help="parts per lesson")
+    parser.add_argument("--number", type=int, default=100, help="runs per case")
+    args = parser.parse_args()
+
+    _compare("populated user", _user_doc, Users, args.number)
+    _compare(
+        f"lesson ({args.parts} parts)",
+        lambda: _lesson_doc(args.parts),
+        PublishedLessons,
+        args.number,
+    )
+
+
+if __name__ == "__main__":
+    main()
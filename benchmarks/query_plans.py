@@ -0,0 +1,667 @@
+"""
+Query plan regression check for the `db/queries` builders.
+
+Seeds a throwaway database with representative data, runs the public query functions while
+recording every collection call they make, explains each call with "executionStats" and
+compares the docs examined, keys examined and collection scans with the stored baseline.
+
+usage (from the project root, against a local mongod):
+
+    python benchmarks/query_plans.py            # compare with the baseline, exit 1 on a regression
+    python benchmarks/query_plans.py --update   # store the current plans as the new baseline
+
+The database is `<DB_NAME>_query_plans`, it is dropped and seeded on every run.
+The rest of the env is loaded from .env, like the app does.
+A query missing from the baseline fails on any collection scan (COLLSCAN or an unindexed `$lookup`).
+The check refuses to run without a baseline, store one with `--update` and commit
+`benchmarks/query_plans_baseline.json`, and again after a change that intentionally changes a plan.
+"""
+import sys
+import os
+import json
+import random
+import argparse
+from types import SimpleNamespace
+from typing import Any, Callable, Optional
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+os.environ["DB_NAME"] = f"{os.environ.get('DB_NAME', 'walls')}_query_plans"
+
+from bson import ObjectId
+import db
+from db import queries, aggregations, profiles
+from db.create_db import create_all_roles
+from db.models import (
+    Accounts,
+    ArchiveLessons,
+    Categories,
+    DraftLessons,
+    LessonEdit,
+    LessonsReviews,
+    PublishedLessons,
+    RatingNames,
+    Ratings,
+    ReviewrInfo,
+    Roles,
+    RolesInternalNames,
+    SiteHelp,
+    SiteHelpCategories,
+    Users,
+)
+from helpers.types import UserPopulateOptions
+
+BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "query_plans_baseline.json"
+)
+
+# the collection methods the queries read with
+_EXPLAINABLE = {"aggregate", "find", "find_one", "count_documents", "distinct"}
+
+
+class _RecordingCollection:
+    """
+    forwards everything to the real collection, and records the read calls
+    """
+
+    def __init__(self, collection, calls: list) -> None:
+        self._collection = collection
+        self._calls = calls
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._collection, name)
+
+        if name == "with_options":
+            # operation profiles, keep recording the profiled collection
+            return lambda *args, **kwargs: _RecordingCollection(
+                attr(*args, **kwargs), self._calls
+            )
+
+        if name not in _EXPLAINABLE:
+            return attr
+
+        def record(*args, **kwargs):
+            self._calls.append((self._collection, name, args, kwargs))
+            return attr(*args, **kwargs)
+
+        return record
+
+
+def _explain_command(collection, method: str, args: tuple, kwargs: dict) -> dict:
+    name = collection.name
+
+    if method == "aggregate":
+        return {"aggregate": name, "pipeline": args[0], "cursor": {}}
+
+    if method == "distinct":
+        query = args[1] if len(args) > 1 else kwargs.get("filter", {})
+        return {"distinct": name, "key": args[0], "query": query}
+
+    filter_ = args[0] if args else kwargs.get("filter", {})
+
+    if method == "count_documents":
+        # count_documents runs this aggregation
+        return {
+            "aggregate": name,
+            "pipeline": [
+                {"$match": filter_},
+                {"$group": {"_id": 1, "n": {"$sum": 1}}},
+            ],
+            "cursor": {},
+        }
+
+    command = {"find": name, "filter": filter_ or {}}
+    projection = args[1] if len(args) > 1 else kwargs.get("projection")
+
+    if projection:
+        command["projection"] = projection
+
+    if method == "find_one":
+        command["limit"] = 1
+
+    return command
+
+
+def _plan_stats(explain: dict) -> dict[str, int]:
+    stats = {
+        "docs_examined": 0,
+        "keys_examined": 0,
+        "collection_scans": 0,
+        "time_ms": 0,
+    }
+
+    def walk(node: Any, in_winning_plan: bool = False):
+        if isinstance(node, list):
+            for item in node:
+                walk(item, in_winning_plan)
+            return
+
+        if not isinstance(node, dict):
+            return
+
+        for key, value in node.items():
+            if key == "totalDocsExamined":
+                stats["docs_examined"] += int(value)
+            elif key == "totalKeysExamined":
+                stats["keys_examined"] += int(value)
+            # the $lookup stages stats
+            elif key == "collectionScans":
+                stats["collection_scans"] += int(value)
+            elif key == "stage" and value == "COLLSCAN" and in_winning_plan:
+                stats["collection_scans"] += 1
+            elif key in ("executionTimeMillis", "executionTimeMillisEstimate"):
+                stats["time_ms"] = max(stats["time_ms"], int(value))
+
+            walk(value, in_winning_plan or key == "winningPlan")
+
+    walk(explain)
+
+    return stats
+
+
+def _request(user: Users, page: int = 0, limit: int = 10, cursor: list = None):
+    """
+    the queries only read the request state that the middlewares set
+    """
+    return SimpleNamespace(
+        state=SimpleNamespace(
+            user=user,
+            user_id=str(user.id),
+            page=page,
+            limit=limit,
+            offset=page * limit,
+            cursor=cursor,
+        )
+    )
+
+
+def _insert(collection, docs: list):
+    if docs:
+        collection.insert_many([doc.dict(to_db=True) for doc in docs])
+
+
+def seed(size: int) -> SimpleNamespace:
+    """
+    seed the database with `size` published lessons and the matching amount of everything else
+    """
+    rnd = random.Random(3)
+    now = datetime.utcnow()
+
+    db.mongo_client.drop_database(db.db.name)
+    db.create_all_indexes()
+    create_all_roles()
+
+    roles = {
+        role["internal_name"]: Roles(**role) for role in db.ROLES_COLLECTION.find()
+    }
+
+    categories = [
+        Categories(id=ObjectId(), name=f"category {i}", description="description")
+        for i in range(50)
+    ]
+
+    accounts = [
+        Accounts(
+            id=ObjectId(),
+            institution_name=f"institution {i}",
+            city=f"city {i % 20}",
+            contact_man_name="contact",
+            email=f"account{i}@example.com",
+            phone="0500000000",
+            allowed_users=50,
+            allowed_categories=[c.id for c in rnd.sample(categories, 5)],
+        )
+        for i in range(max(size // 20, 5))
+    ]
+
+    def user(i: int, role: RolesInternalNames, account: Optional[Accounts]):
+        return Users(
+            id=ObjectId(),
+            account=account.id if account else None,
+            email=f"user{i}@example.com",
+            first_name="first",
+            last_name=f"last {i}",
+            full_name=f"first last {i}",
+            role=roles[role.value].id,
+            password="password",
+            registration_completed=True,
+        )
+
+    users = [user(0, RolesInternalNames.ADMIN, None)]
+    for i, account in enumerate(accounts):
+        users.append(user(len(users), RolesInternalNames.INSTATUTION_MANAGER, account))
+        for _ in range(5):
+            role = rnd.choice([RolesInternalNames.EDITOR, RolesInternalNames.VIEWER])
+            users.append(user(len(users), role, account))
+    for _ in range(size // 10):
+        users.append(user(len(users), RolesInternalNames.GUEST, None))
+
+    editors = [u for u in users if u.role == roles[RolesInternalNames.EDITOR.value].id]
+
+    published = [
+        PublishedLessons(
+            id=ObjectId(),
+            created_at=now - timedelta(hours=i),
+            title=f"lesson {i}",
+            description="description",
+            creator=rnd.choice(editors).id,
+            viewed=rnd.randint(0, 1000),
+            categories=[c.id for c in rnd.sample(categories, rnd.randint(1, 3))],
+            public=rnd.random() < 0.2,
+        )
+        for i in range(size)
+    ]
+
+    mid_edit = published[0]
+    mid_edit.mid_edit = True
+    mid_edit.edit_data = LessonEdit(
+        initial_editor=mid_edit.creator,
+        current_editor=mid_edit.creator,
+        categories=mid_edit.categories,
+    )
+
+    for account in accounts:
+        account.allowed_lessons = [lesson.id for lesson in rnd.sample(published, 20)]
+
+    archived = [
+        ArchiveLessons(
+            id=ObjectId(),
+            title=f"archived lesson {i}",
+            creator=rnd.choice(editors).id,
+            archive_at=now - timedelta(days=rnd.randint(0, 60)),
+            archive_by=users[0].id,
+        )
+        for i in range(size // 5)
+    ]
+
+    drafts = [
+        DraftLessons(id=ObjectId(), creator=editor.id, title="draft")
+        for editor in editors[: len(editors) // 2]
+    ]
+
+    reviews = [
+        LessonsReviews(
+            id=ObjectId(),
+            ratings=[
+                Ratings(name=name, label=name.label(), rating=rnd.randint(1, 5))
+                for name in RatingNames
+            ],
+            lesson=rnd.choice(published).id,
+            user=rnd.choice(users).id,
+            reviewer=ReviewrInfo(
+                name="reviewer", institution="institution", position="teacher"
+            ),
+            review_id=str(ObjectId()),
+            comments="comments",
+        )
+        for _ in range(size * 2)
+    ]
+
+    help_categories = [
+        SiteHelpCategories(id=ObjectId(), name=f"help category {i}") for i in range(10)
+    ]
+
+    helps = [
+        SiteHelp(
+            id=ObjectId(),
+            title=f"help {i}",
+            category=rnd.choice(help_categories).id,
+            description="description",
+            creator=users[0].id,
+            order=i,
+        )
+        for i in range(200)
+    ]
+
+    _insert(db.CATEGORIES_COLLECTION, categories)
+    _insert(db.ACCOUNT_COLLECTION, accounts)
+    _insert(db.USER_COLLECTION, users)
+    _insert(db.PUBLISHED_LESSONS_COLLECTION, published)
+    _insert(db.ARCHIVE_LESSONS_COLLECTION, archived)
+    _insert(db.DRAFT_LESSONS_COLLECTION, drafts)
+    _insert(db.LESSONS_REVIEWS_COLLECTION, reviews)
+    _insert(db.SITE_HELP_CATEGORIES_COLLECTION, help_categories)
+    _insert(db.SITE_HELP_COLLECTION, helps)
+
+    def populated(user: Users) -> Users:
+        return queries.get_user_by_id(
+            user.id, populate=UserPopulateOptions(role=True, account=True)
+        ).value
+
+    manager = next(
+        u
+        for u in users
+        if u.role == roles[RolesInternalNames.INSTATUTION_MANAGER.value].id
+    )
+    viewer = next(
+        u for u in users if u.role == roles[RolesInternalNames.VIEWER.value].id
+    )
+
+    return SimpleNamespace(
+        admin=populated(users[0]),
+        manager=populated(manager),
+        viewer=populated(viewer),
+        editor=editors[0],
+        roles=roles,
+        account=accounts[0],
+        category=categories[0],
+        lesson=published[len(published) // 2],
+        mid_edit=mid_edit,
+        archived=archived[0],
+        draft=drafts[0],
+        help_category=help_categories[0],
+        lessons_ids=[lesson.id for lesson in published[:10]],
+        categories_ids=[category.id for category in categories[:10]],
+    )
+
+
+def _published_cursor(ctx) -> list:
+    """
+    the cursor of a deep page, like a client that followed next_cursor for a while
+    """
+    docs, _, _ = queries.get_published_lessons_for_external(
+        _request(ctx.admin, page=50)
+    ).value
+
+    return aggregations.decode_cursor(
+        aggregations.encode_cursor(docs[-1], {"created_at": -1, "_id": -1})
+    )
+
+
+def cases(ctx) -> list[tuple[str, Callable[[], Any]]]:
+    admin = _request(ctx.admin)
+    manager = _request(ctx.manager)
+    viewer = _request(ctx.viewer)
+    viewer_role = ctx.roles[RolesInternalNames.VIEWER.value].id
+    # computed before the recording, so its own query is not measured
+    deep_cursor = _published_cursor(ctx)
+
+    return [
+        # published lessons
+        (
+            "published.list[admin]",
+            lambda: queries.get_published_lessons_for_external(admin),
+        ),
+        (
+            "published.list[viewer]",
+            lambda: queries.get_published_lessons_for_external(viewer),
+        ),
+        (
+            "published.list[viewer,category]",
+            lambda: queries.get_published_lessons_for_external(
+                viewer, category=ctx.category.id
+            ),
+        ),
+        (
+            "published.list[admin,page 50]",
+            lambda: queries.get_published_lessons_for_external(
+                _request(ctx.admin, page=50)
+            ),
+        ),
+        (
+            "published.list[admin,cursor]",
+            lambda: queries.get_published_lessons_for_external(
+                _request(ctx.admin, cursor=deep_cursor)
+            ),
+        ),
+        (
+            "published.by_id[viewer]",
+            lambda: queries.get_published_lesson_by_id(ctx.lesson.id, request=viewer),
+        ),
+        (
+            "published.mid_edit[admin]",
+            lambda: queries.get_published_mid_edit_lesson_for_external(
+                ctx.mid_edit.id, admin
+            ),
+        ),
+        (
+            "published.validate_exists",
+            lambda: queries.validate_published_lessons_exists(ctx.lessons_ids),
+        ),
+        # archived lessons
+        (
+            "archived.list[admin]",
+            lambda: queries.get_archived_lessons_for_external(admin),
+        ),
+        (
+            "archived.by_id[admin]",
+            lambda: queries.get_archive_lesson_by_id(ctx.archived.id, admin),
+        ),
+        ("archived.expired_ids", lambda: queries.get_expired_archive_lessons_ids()),
+        # draft lessons
+        (
+            "draft.by_creator",
+            lambda: queries.get_draft_lesson_by_creator(ctx.editor.id),
+        ),
+        (
+            "draft.ids_by_creators",
+            lambda: queries.get_draft_lessons_ids_by_creators([ctx.editor.id]),
+        ),
+        ("draft.by_id", lambda: queries.get_draft_lesson_by_id(ctx.draft.id)),
+        # users
+        ("users.list[admin]", lambda: queries.get_users_for_external(admin)),
+        ("users.list[manager]", lambda: queries.get_users_for_external(manager)),
+        (
+            "users.list[admin,role]",
+            lambda: queries.get_users_for_external(admin, role=viewer_role),
+        ),
+        (
+            "users.list[admin,account]",
+            lambda: queries.get_users_for_external(admin, account=ctx.account.id),
+        ),
+        (
+            "users.by_id_for_external[admin]",
+            lambda: queries.get_user_by_id_for_external(admin, ctx.viewer.id),
+        ),
+        ("users.for_get_me", lambda: queries.get_user_for_get_me(ctx.viewer.id)),
+        ("users.by_email", lambda: queries.get_user_by_email(ctx.viewer.email)),
+        (
+            "users.ids_by_account",
+            lambda: queries.get_users_ids_by_account_id(ctx.account.id),
+        ),
+        (
+            "users.account_manager",
+            lambda: queries.get_account_manager_user(ctx.account.id),
+        ),
+        ("users.system_admin", lambda: queries.get_system_admin_user()),
+        # accounts
+        ("accounts.list[admin]", lambda: queries.get_accounts_for_external(admin)),
+        (
+            "accounts.by_id_for_external[admin]",
+            lambda: queries.get_account_by_id_for_external(admin, ctx.account.id),
+        ),
+        (
+            "accounts.user_limit",
+            lambda: queries.check_account_user_limit(ctx.account.id),
+        ),
+        # categories
+        ("categories.list", lambda: queries.get_categories_for_external("", admin)),
+        (
+            "categories.list[free text]",
+            lambda: queries.get_categories_for_external("category 1", admin),
+        ),
+        (
+            "categories.associated[viewer]",
+            lambda: queries.get_categories_associated_with_user("", viewer),
+        ),
+        (
+            "categories.validate_exists",
+            lambda: queries.validate_categories_exists(ctx.categories_ids),
+        ),
+        # reviews, roles and help
+        (
+            "reviews.of_lesson",
+            lambda: queries.get_lessons_review_for_external(ctx.lesson.id),
+        ),
+        ("roles.list[manager]", lambda: queries.get_roles_for_external(manager)),
+        (
+            "site_help.list",
+            lambda: queries.get_site_helps_for_external(None, True, admin),
+        ),
+        (
+            "site_help.list[category]",
+            lambda: queries.get_site_helps_for_external(
+                ctx.help_category.id, False, admin
+            ),
+        ),
+        (
+            "site_help_categories.list",
+            lambda: queries.get_site_help_categories_for_external(admin),
+        ),
+    ]
+
+
+def _record(run: Callable[[], Any]) -> list[tuple]:
+    """
+    run a query with every sync collection of the db module replaced by a recording one
+    """
+    calls = []
+    names = [
+        name
+        for name in dir(db)
+        if name.endswith("_COLLECTION") and not name.startswith("ASYNC_")
+    ]
+    originals = {name: getattr(db, name) for name in names}
+
+    # the profiled collections are cached, drop the ones of the previous recording
+    profiles._profiled_collections.clear()
+
+    try:
+        for name, collection in originals.items():
+            setattr(db, name, _RecordingCollection(collection, calls))
+        run()
+    finally:
+        for name, collection in originals.items():
+            setattr(db, name, collection)
+
+        profiles._profiled_collections.clear()
+
+    return calls
+
+
+def measure(ctx) -> dict[str, dict[str, int]]:
+    results = {}
+
+    for name, run in cases(ctx):
+        calls = _record(run)
+
+        if not calls:
+            print(f"{name}: no db calls were recorded")
+
+        for i, (collection, method, args, kwargs) in enumerate(calls):
+            explain = db.db.command(
+                "explain",
+                _explain_command(collection, method, args, kwargs),
+                verbosity="executionStats",
+            )
+            results[f"{name} #{i} {collection.name}.{method}"] = _plan_stats(explain)
+
+    return results
+
+
+def regressions(
+    current: dict[str, int], baseline: dict[str, int], tolerance: float
+) -> list[str]:
+    problems = []
+
+    if current["collection_scans"] > baseline["collection_scans"]:
+        problems.append(
+            f"collection scans {baseline['collection_scans']} -> {current['collection_scans']}"
+        )
+
+    for key in ("docs_examined", "keys_examined"):
+        # a small slack, the seeded data is random
+        allowed = baseline[key] * (1 + tolerance) + 10
+
+        if current[key] > allowed:
+            problems.append(f"{key} {baseline[key]} -> {current[key]}")
+
+    return problems
+
+
+def new_query_problems(current: dict[str, int]) -> list[str]:
+    """
+    a query that is not in the baseline yet must not scan a collection (COLLSCAN or an unindexed `$lookup`)
+    """
+    if current["collection_scans"] > 0:
+        return [f"{current['collection_scans']} collection scans in a new query"]
+
+    return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--update", action="store_true", help="store a new baseline")
+    parser.add_argument(
+        "--size", type=int, default=2000, help="published lessons to seed"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="allowed growth of docs / keys examined before it is a regression",
+    )
+    args = parser.parse_args()
+
+    if not args.update and not os.path.exists(BASELINE_PATH):
+        sys.exit(
+            f"no baseline at {BASELINE_PATH}, store one with --update and commit it"
+        )
+
+    ctx = seed(args.size)
+    results = measure(ctx)
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+
+    failed = False
+
+    print(
+        f"{'query':<70} {'docs':>8} {'keys':>8} {'scans':>6} {'ms':>6}  baseline docs/keys/scans"
+    )
+    for name, stats in results.items():
+        base = baseline.get(name)
+        problems = (
+            regressions(stats, base, args.tolerance)
+            if base
+            else new_query_problems(stats)
+        )
+        failed = failed or bool(problems)
+
+        compared = (
+            f"{base['docs_examined']}/{base['keys_examined']}/{base['collection_scans']}"
+            if base
+            else "new"
+        )
+        print(
+            f"{name:<70} {stats['docs_examined']:>8} {stats['keys_examined']:>8} "
+            f"{stats['collection_scans']:>6} {stats['time_ms']:>6}  {compared}"
+        )
+        for problem in problems:
+            print(f"    REGRESSION: {problem}")
+
+    for name in baseline.keys() - results.keys():
+        print(f"{name:<70} missing, the query no longer runs this operation")
+
+    db.mongo_client.drop_database(db.db.name)
+
+    if args.update:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"baseline stored in {BASELINE_PATH}")
+        return
+
+    if failed:
+        print("query plans regressed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Micro-benchmark of the responses serialization, `jsonable_encoder` + stdlib json (the previous
+`_Response`) vs `responses.OrjsonResponse`.
+
+Serializes a page of published lessons models and a `/watch/data` like list of parts dicts,
+both outputs must decode to the same json, the benchmark fails if they differ.
+
+usage (from the project root, no database is needed):
+
+    python benchmarks/responses.py
+    python benchmarks/responses.py --lessons 100 --parts 20 --number 50
+"""
+import sys
+import os
+import json
+import argparse
+import timeit
+from typing import Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from db.models import PublishedLessons, Users
+from helpers.types import responses
+from hydration import _lesson_doc, _lesson_parts, _user_doc
+
+
+def _stdlib_render(content: Any) -> bytes:
+    # what `_Response` + `JSONResponse.render` did before
+    content = {
+        "success": True,
+        "content": jsonable_encoder(content, custom_encoder={ObjectId: str}),
+    }
+
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def _orjson_render(content: Any) -> bytes:
+    return responses.ApiSuccess(data=content).body
+
+
+def _compare(name: str, content: Any, number: int):
+    if not json.loads(_stdlib_render(content)) == json.loads(_orjson_render(content)):
+        raise SystemExit(f"{name}: the orjson output differs from the stdlib one")
+
+    stdlib_time = timeit.timeit(lambda: _stdlib_render(content), number=number) / number
+    orjson_time = timeit.timeit(lambda: _orjson_render(content), number=number) / number
+
+    print(
+        f"{name:<30} stdlib {stdlib_time * 1000:8.3f} ms"
+        f"   orjson {orjson_time * 1000:8.3f} ms"
+        f"   x{stdlib_time / orjson_time:.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lessons", type=int, default=50, help="lessons per page")
+    parser.add_argument("--parts", type=int, default=10, help="parts per lesson")
+    parser.add_argument("--number", type=int, default=20, help="runs per case")
+    args = parser.parse_args()
+
+    lessons = [
+        PublishedLessons.from_db(_lesson_doc(args.parts)) for _ in range(args.lessons)
+    ]
+    page = {"count": len(lessons), "data": lessons, "next_cursor": None}
+
+    _compare(f"lessons page ({args.lessons})", page, args.number)
+    _compare("populated user", Users.from_db(_user_doc()), args.number)
+    _compare(
+        f"watch data ({args.parts * 10} parts)",
+        _lesson_parts(args.parts * 10),
+        args.number,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
-from pymongo import MongoClient, IndexModel
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+from pymongo.client_session import ClientSession
+from motor.motor_asyncio import AsyncIOMotorClient
 
 from helpers.env import EnvVars
+from helpers import metrics
+from db.profiles import OperationProfiles, with_profile, client_options
 from db.models import (
     __models__,
     DraftLessons,
@@ -13,10 +18,15 @@ from db.models import (
     Roles,
     SiteHelp,
     SiteHelpCategories,
+    Jobs,
 )
 
 
-mongo_client = MongoClient(EnvVars.DB_CONNECTION_STRING)
+mongo_client = MongoClient(
+    EnvVars.DB_CONNECTION_STRING,
+    event_listeners=[metrics.MongoCommandsListener()],
+    **client_options(),
+)
 db = mongo_client[EnvVars.DB_NAME]
 
 
@@ -30,45 +40,114 @@ CATEGORIES_COLLECTION = db[Categories.__get_collection_name__()]
 ROLES_COLLECTION = db[Roles.__get_collection_name__()]
 SITE_HELP_COLLECTION = db[SiteHelp.__get_collection_name__()]
 SITE_HELP_CATEGORIES_COLLECTION = db[SiteHelpCategories.__get_collection_name__()]
+JOBS_COLLECTION = db[Jobs.__get_collection_name__()]
 
 
-def create_all_indexes():
+# async (motor) client, used by the `db.aio` package from `async def` routes
+# so a mongo round-trip doesn't hold a threadpool worker.
+# motor connects lazily, on the first operation inside the running event loop
+async_mongo_client = AsyncIOMotorClient(
+    EnvVars.DB_CONNECTION_STRING,
+    event_listeners=[metrics.MongoCommandsListener()],
+    **client_options(),
+)
+async_db = async_mongo_client[EnvVars.DB_NAME]
+
+
+ASYNC_USER_COLLECTION = async_db[Users.__get_collection_name__()]
+ASYNC_ACCOUNT_COLLECTION = async_db[Accounts.__get_collection_name__()]
+ASYNC_DRAFT_LESSONS_COLLECTION = async_db[DraftLessons.__get_collection_name__()]
+ASYNC_PUBLISHED_LESSONS_COLLECTION = async_db[
+    PublishedLessons.__get_collection_name__()
+]
+ASYNC_ARCHIVE_LESSONS_COLLECTION = async_db[ArchiveLessons.__get_collection_name__()]
+ASYNC_LESSONS_REVIEWS_COLLECTION = async_db[LessonsReviews.__get_collection_name__()]
+ASYNC_CATEGORIES_COLLECTION = async_db[Categories.__get_collection_name__()]
+ASYNC_ROLES_COLLECTION = async_db[Roles.__get_collection_name__()]
+ASYNC_SITE_HELP_COLLECTION = async_db[SiteHelp.__get_collection_name__()]
+ASYNC_SITE_HELP_CATEGORIES_COLLECTION = async_db[
+    SiteHelpCategories.__get_collection_name__()
+]
+
+
+def raise_if_transient(error: Exception):
+    """
+    re-raise the errors a transaction can be run again after (write conflicts, primary step downs),
+    so `session.with_transaction` retries it instead of the caller turning it into a failed result
+    call it first in the `except` blocks of code that runs in a transaction
+    """
+    if isinstance(error, PyMongoError) and error.has_error_label(
+        "TransientTransactionError"
+    ):
+        raise error
+
+
+def causal_session() -> ClientSession:
+    """
+    session whose reads see at least what its previous reads saw, even when they run on another secondary
+    e.g the stamp of an etag, read before the data it stands for
+    """
+    return mongo_client.start_session(causal_consistency=True)
+
+
+def warm_up():
+    """
+    open the first connection of the sync client pool, the rest up to DB_MIN_POOL_SIZE are opened in the background
+    """
+    mongo_client.admin.command("ping")
+
+
+async def warm_up_async():
+    """
+    the same as `warm_up`, for the async client, must run inside the event loop
+    """
+    await async_mongo_client.admin.command("ping")
+
+
+def create_all_indexes(dry_run: bool = False):
+    """
+    sync the indexes of every collection with the models `get_indexes`
+    indexes that are not declared are dropped, changed indexes are recreated
+    with `dry_run` the diff is only printed
+    """
 
     for model in __models__:
 
         c_name = model.__get_collection_name__()
 
-        current_indexes_names = list(db[c_name].index_information().keys())
-
-        updated_indexes_names = []
+        current_indexes = db[c_name].index_information()
 
-        indexes = []
+        declared_indexes = {index.name: index for index in model.get_indexes()}
 
-        for index in model.get_indexes():
+        indexes_to_drop = []
+        indexes_to_create = []
 
-            indexes.append(
-                IndexModel(
-                    index.fields,
-                    name=index.name,
-                    unique=index.unique,
-                    collation=index.collation,
-                )
-            )
+        for index_name in current_indexes:
+            if index_name not in declared_indexes and not index_name == "_id_":
+                indexes_to_drop.append(index_name)
 
-            updated_indexes_names.append(index.name)
+        for index_name, index in declared_indexes.items():
+            if index_name not in current_indexes:
+                print(f"{c_name}: + {index_name} {index.fields}")
+                indexes_to_create.append(index)
+            elif index.differs_from(current_indexes[index_name]):
+                print(f"{c_name}: ~ {index_name} {index.fields}")
+                indexes_to_drop.append(index_name)
+                indexes_to_create.append(index)
 
-        indexes_to_drop = []
+        for index_name in indexes_to_drop:
+            if index_name not in declared_indexes:
+                print(f"{c_name}: - {index_name}")
 
-        for index_name in current_indexes_names:
-            if index_name not in updated_indexes_names and not index_name == "_id_":
-                indexes_to_drop.append(index_name)
+        if dry_run:
+            continue
 
         for index_name in indexes_to_drop:
             print(f"dropping index {index_name} from {c_name}")
             db[c_name].drop_index(index_name)
 
-        # its ok to create indexes even if they already exist
-        # mongo will just ignore them
-        if indexes:
+        if indexes_to_create:
             print(f"creating indexes for {c_name}")
-            db[c_name].create_indexes(indexes)
+            db[c_name].create_indexes(
+                [index.to_index_model() for index in indexes_to_create]
+            )
@@ -10,3 +10,15 @@ from .lessons import (
 from .accounts import lookup_account_allowed_categories, lookup_account_allowed_lessons
 from .roles import lookup_role_categories
 from .reviews import lookup_lesson_review_lesson, lookup_lesson_review_user
+from .stamps import stamp_pipeline, collection_stamp
+from .pagination import (
+    CountModes,
+    paginate,
+    parse_paginated,
+    aggregate_paginated,
+    aggregate_paginated_async,
+    encode_cursor,
+    decode_cursor,
+    keyset,
+    next_cursor,
+)
@@ -0,0 +1,221 @@
+from enum import Enum
+from datetime import datetime
+from typing import Literal, Optional
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from bson import json_util, ObjectId
+from pymongo.collection import Collection
+from motor.motor_asyncio import AsyncIOMotorCollection
+import db.aggregations.common as aggregations
+
+
+class CountModes(str, Enum):
+    # count every matching document
+    EXACT = "exact"
+    # count up to `max_count` documents, enough to render the pages around the current one
+    ESTIMATE = "estimate"
+    # don't count at all, the total only tells if there is a next page
+    SKIP = "skip"
+
+
+ESTIMATE_MAX_COUNT = 10_000
+
+# the types a sort key can have, the cursor comes from the client and its values are put
+# in the match as is, anything else (a document like {"$ne": null}, a regex) is rejected
+_CURSOR_VALUE_TYPES = (ObjectId, datetime, str, int, float, type(None))
+
+
+def paginate(
+    pipeline: list[dict],
+    offset: int,
+    limit: int,
+    page_pipeline: list[dict] = [],
+    count_mode: CountModes = CountModes.EXACT,
+    max_count: int = ESTIMATE_MAX_COUNT,
+) -> list[dict]:
+    """
+    Description:
+    ------------
+        Build a paginated aggregation, that returns the page and the total in one round trip.
+        The result is a single document, parse it with `parse_paginated`.
+
+    Parameters:
+    -----------
+        `pipeline` list[dict]
+            The stages that select the documents (match, sort), they run once for the page and the count.
+        `offset` int
+            The number of documents to skip.
+        `limit` int
+            The number of documents in a page.
+        `page_pipeline` list[dict]
+            The stages that run only on the documents of the page (lookups, projections).
+        `count_mode` CountModes
+            How to count the total, see `CountModes`.
+        `max_count` int
+            The most documents to count when `count_mode` is `ESTIMATE`.
+    Returns:
+    --------
+        `list[dict]`
+            The aggregation pipeline.
+    """
+    # when not counting, fetch one more document to know if there is a next page
+    page_limit = limit + 1 if count_mode == CountModes.SKIP else limit
+
+    facets = {
+        "items": [
+            aggregations.skip(offset),
+            aggregations.limit(page_limit),
+            *page_pipeline,
+        ]
+    }
+
+    if count_mode == CountModes.EXACT:
+        facets["total"] = [aggregations.count("total")]
+    elif count_mode == CountModes.ESTIMATE:
+        facets["total"] = [aggregations.limit(max_count), aggregations.count("total")]
+
+    return [*pipeline, aggregations.facet(**facets)]
+
+
+def parse_paginated(
+    result: list[dict],
+    offset: int,
+    limit: int,
+    count_mode: CountModes = CountModes.EXACT,
+) -> tuple[list[dict], int]:
+    """
+    Description:
+    ------------
+        Parse the result of a `paginate` aggregation.
+
+    Returns:
+    --------
+        `tuple[list[dict], int]`
+            The documents of the page and the total.
+    """
+    doc = next(iter(result), {})
+    items = doc.get("items", [])
+
+    if count_mode == CountModes.SKIP:
+        has_more = len(items) > limit
+        items = items[:limit]
+        return items, offset + len(items) + int(has_more)
+
+    total = doc.get("total")
+    total = total[0]["total"] if total else 0
+
+    if count_mode == CountModes.ESTIMATE:
+        # the count is capped, never report less than what was actually returned
+        total = max(total, offset + len(items))
+
+    return items, total
+
+
+def aggregate_paginated(
+    collection: Collection,
+    pipeline: list[dict],
+    offset: int,
+    limit: int,
+    page_pipeline: list[dict] = [],
+    count_mode: CountModes = CountModes.EXACT,
+    **kwargs,
+) -> tuple[list[dict], int]:
+    """
+    run a paginated aggregation on the collection, returns the page and the total
+    """
+    cursor = collection.aggregate(
+        paginate(pipeline, offset, limit, page_pipeline, count_mode), **kwargs
+    )
+
+    return parse_paginated(list(cursor), offset, limit, count_mode)
+
+
+def encode_cursor(doc: dict, sort: dict[str, Literal[1, -1]]) -> str:
+    """
+    encode the sort key of a document into an opaque cursor
+    """
+    values = [doc[field] for field in sort]
+
+    return urlsafe_b64encode(json_util.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    """
+    decode a cursor created by `encode_cursor`, raises ValueError if it is not a valid cursor
+    """
+    try:
+        values = json_util.loads(urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("invalid cursor")
+
+    if not isinstance(values, list) or not values:
+        raise ValueError("invalid cursor")
+
+    if not all(isinstance(value, _CURSOR_VALUE_TYPES) for value in values):
+        raise ValueError("invalid cursor")
+
+    return values
+
+
+def keyset(sort: dict[str, Literal[1, -1]], cursor: list) -> dict:
+    """
+    Description:
+    ------------
+        Define a match aggregation stage that keeps only the documents after the cursor,
+        in the order of `sort`. Used instead of a skip, so deep pages cost the same as the first one.
+        The sort must end with a unique field (usually _id) and should be covered by an index.
+
+    Parameters:
+    -----------
+        `sort` dict[str, 1 | -1]
+            The sort of the pipeline, the same one the cursor was encoded with.
+        `cursor` list
+            The decoded cursor.
+    Returns:
+    --------
+        `dict`
+            The match aggregation stage.
+    """
+    if not len(cursor) == len(sort):
+        raise ValueError("the cursor does not match the sort")
+
+    fields = list(sort)
+    conditions = []
+
+    # (a > x) or (a == x and b > y) or ...
+    for index, field in enumerate(fields):
+        condition = {fields[i]: cursor[i] for i in range(index)}
+        condition[field] = {"$gt" if sort[field] == 1 else "$lt": cursor[index]}
+        conditions.append(condition)
+
+    return aggregations.match_query({"$or": conditions})
+
+
+def next_cursor(
+    docs: list[dict], total: int, offset: int, sort: dict[str, Literal[1, -1]]
+) -> Optional[str]:
+    """
+    the cursor of the page after `docs`, none if it is the last page
+    """
+    if not docs or offset + len(docs) >= total:
+        return None
+
+    return encode_cursor(docs[-1], sort)
+
+
+async def aggregate_paginated_async(
+    collection: AsyncIOMotorCollection,
+    pipeline: list[dict],
+    offset: int,
+    limit: int,
+    page_pipeline: list[dict] = [],
+    count_mode: CountModes = CountModes.EXACT,
+    **kwargs,
+) -> tuple[list[dict], int]:
+    """
+    same as `aggregate_paginated`, for the async collections
+    """
+    result = await collection.aggregate(
+        paginate(pipeline, offset, limit, page_pipeline, count_mode), **kwargs
+    ).to_list(1)
+
+    return parse_paginated(result, offset, limit, count_mode)
@@ -0,0 +1,39 @@
+from pymongo.collection import Collection
+from db.models.common import DBModel
+import db.aggregations.common as aggregations
+
+
+def stamp_pipeline(query: dict = {}) -> list[dict]:
+    """
+    pipeline that summarizes the `updated_at` stamps of the matching documents in one document
+    every insert, update and delete changes at least one of the count, the latest stamp or the stamps sum
+    """
+    updated_at = f"${DBModel.Fields.updated_at.value}"
+
+    return [
+        aggregations.match_query(query),
+        aggregations.project([DBModel.Fields.updated_at], exclude_id=True),
+        aggregations.group(
+            {
+                "_id": None,
+                "count": {"$sum": 1},
+                "latest": {"$max": updated_at},
+                # the sum catches an update whose stamp is not the latest (clocks skew)
+                "total": {"$sum": {"$toLong": updated_at}},
+            }
+        ),
+    ]
+
+
+def collection_stamp(collection: Collection, query: dict = {}, **kwargs) -> str:
+    """
+    stamp of the matching documents, changes whenever one of them is written
+    """
+    docs = list(collection.aggregate(stamp_pipeline(query), **kwargs))
+
+    if not docs:
+        return "empty"
+
+    stamp = docs[0]
+
+    return f"{stamp['count']}:{stamp['latest']}:{stamp['total']}"
@@ -0,0 +1,8 @@
+"""
+Async mirror of the `db` package, built on the motor collections from `db/__init__.py`.
+
+Use it from `async def` routes, the sync modules (`db.queries`, `db.updates`, ...)
+hold a threadpool worker for the whole mongo round-trip.
+The pipelines are shared with the sync modules, only the IO is async.
+"""
+from . import queries, updates, inserts, transactions
@@ -0,0 +1 @@
+from .review import insert_new_lesson_review
@@ -0,0 +1,57 @@
+from db.models import LessonsReviews, Ratings, ReviewrInfo
+import db
+from db.aio.updates.lessons.published import update_published_lesson_review_stats
+from helpers.types import InsertResults
+from pymongo.errors import DuplicateKeyError
+from bson import ObjectId
+from typing import Union
+
+
+async def _insert_new_lesson_review(
+    review: LessonsReviews,
+) -> InsertResults[LessonsReviews]:
+
+    try:
+        res = await db.ASYNC_LESSONS_REVIEWS_COLLECTION.insert_one(
+            review.dict(to_db=True)
+        )
+    except DuplicateKeyError:
+        return InsertResults(failure=True, exists=True)
+    except:
+        return InsertResults(failure=True)
+
+    review.id = res.inserted_id
+
+    # the lesson may be archived, then there are no stats to update
+    await update_published_lesson_review_stats(review.lesson, review.ratings)
+
+    return InsertResults(success=True, value=review)
+
+
+async def insert_new_lesson_review(
+    ratings: list[Ratings],
+    lesson: Union[ObjectId, str],
+    user: Union[ObjectId, str],
+    reviewer_name: str,
+    reviewer_institution: str,
+    reviewer_position: str,
+    review_id: str,
+    comments: str,
+):
+
+    reviewer_info = ReviewrInfo(
+        name=reviewer_name,
+        institution=reviewer_institution,
+        position=reviewer_position,
+    )
+
+    review = LessonsReviews(
+        ratings=ratings,
+        lesson=ObjectId(lesson),
+        user=ObjectId(user),
+        reviewer=reviewer_info,
+        review_id=review_id,
+        comments=comments,
+    )
+
+    return await _insert_new_lesson_review(review)
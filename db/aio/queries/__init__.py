@@ -0,0 +1,14 @@
+from .users import (
+    get_user_for_get_me,
+    get_user_by_email,
+    get_user_by_id,
+    get_user_for_permissions,
+)
+from .lessons.draft import (
+    get_draft_lesson_by_creator,
+    get_draft_lesson_by_id,
+)
+from .lessons.published import (
+    get_published_lessons_for_external,
+    get_published_lesson_by_id,
+)
@@ -0,0 +1,29 @@
+from db.models import DraftLessons
+import db
+from helpers.types import QueryResults
+from typing import Union, Any
+from bson import ObjectId
+
+
+async def _get_draft_lesson(filters: dict[str, Any]) -> QueryResults[DraftLessons]:
+    try:
+        lesson = await db.with_profile(
+            db.ASYNC_DRAFT_LESSONS_COLLECTION, db.OperationProfiles.STRONG_READ
+        ).find_one(filters)
+    except:
+        return QueryResults(failure=True)
+
+    if lesson is None:
+        return QueryResults(failure=True, not_found=True)
+
+    return QueryResults(value=DraftLessons.from_db(lesson), success=True)
+
+
+async def get_draft_lesson_by_creator(creator: Union[ObjectId, str]):
+    return await _get_draft_lesson({DraftLessons.Fields.creator: ObjectId(creator)})
+
+
+async def get_draft_lesson_by_id(
+    lesson_id: Union[ObjectId, str],
+) -> QueryResults[DraftLessons]:
+    return await _get_draft_lesson({DraftLessons.Fields.id: ObjectId(lesson_id)})
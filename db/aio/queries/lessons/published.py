@@ -0,0 +1,111 @@
+from db.models import PublishedLessons, Resources, Actions
+import db
+from helpers.types import (
+    QueryResults,
+    RequestWithPaginationAndFullUser,
+    PublishedLessonPopulateOptions,
+)
+from typing import Union, Any, Optional
+from bson import ObjectId
+from helpers.secuirty import permissions
+from db import aggregations
+from db.queries.lessons.published import (
+    _published_lessons_for_external_pipeline,
+    _PUBLISHED_LESSONS_SORT,
+)
+
+
+async def _get_published_lesson(
+    filters: dict[str, Any],
+    populate: Optional[PublishedLessonPopulateOptions] = None,
+    **kwargs,
+) -> QueryResults[PublishedLessons]:
+
+    try:
+        if not populate:
+            lesson = await db.ASYNC_PUBLISHED_LESSONS_COLLECTION.find_one(
+                filters, **kwargs
+            )
+        else:
+            pipeline = [
+                aggregations.match_query(filters),
+                aggregations.limit(1),
+            ]
+            pipeline.extend(populate.build_pipeline())
+
+            docs = await db.ASYNC_PUBLISHED_LESSONS_COLLECTION.aggregate(
+                pipeline, **kwargs
+            ).to_list(1)
+            lesson = next(iter(docs), None)
+    except:
+        return QueryResults(failure=True)
+    if not lesson:
+        return QueryResults(not_found=True)
+
+    return QueryResults(success=True, value=PublishedLessons.from_db(lesson))
+
+
+async def get_published_lessons_for_external(
+    request: RequestWithPaginationAndFullUser,
+    category: Optional[ObjectId] = None,
+) -> QueryResults[tuple[list[dict], int, Optional[str]]]:
+
+    try:
+        pipeline, page_pipeline = _published_lessons_for_external_pipeline(
+            request, category
+        )
+    except ValueError:
+        # the cursor doesn't match the sort
+        return QueryResults(not_valid=True)
+
+    cursor_mode = request.state.cursor is not None
+    offset = 0 if cursor_mode else request.state.offset
+
+    try:
+        docs, count = await aggregations.aggregate_paginated_async(
+            db.with_profile(
+                db.ASYNC_PUBLISHED_LESSONS_COLLECTION,
+                db.OperationProfiles.CATALOGUE_READ,
+            ),
+            pipeline,
+            offset,
+            request.state.limit,
+            page_pipeline,
+            aggregations.CountModes.SKIP
+            if cursor_mode
+            else aggregations.CountModes.EXACT,
+        )
+    except Exception as e:
+        print(e)
+        return QueryResults(failure=True)
+
+    next_cursor = aggregations.next_cursor(docs, count, offset, _PUBLISHED_LESSONS_SORT)
+
+    return QueryResults(success=True, value=(docs, count, next_cursor))
+
+
+async def get_published_lesson_by_id(
+    lesson_id: Union[ObjectId, str],
+    request: Optional[RequestWithPaginationAndFullUser] = None,
+    populate: Optional[PublishedLessonPopulateOptions] = None,
+    action: Actions = Actions.READ,
+    **kwargs,
+) -> QueryResults[PublishedLessons]:
+
+    default_filters = {}
+
+    if request is not None:
+        default_filters = permissions.build_filters(
+            request, Resources.PUBLISHED_LESSONS, action
+        )
+
+    if default_filters is None:
+        return QueryResults(not_found=True)
+
+    filters = {
+        PublishedLessons.Fields.id: ObjectId(lesson_id),
+    }
+
+    filters.update(default_filters)
+
+    return await _get_published_lesson(filters, populate, **kwargs)
@@ -0,0 +1,100 @@
+from typing import Union, Any, Optional
+from bson import ObjectId
+from db.models import Users, Resources, Actions
+from helpers.types import QueryResults, UserPopulateOptions, RequestWithFullUser
+from db.queries.users import _user_for_get_me_pipeline
+import db
+from db import aggregations, cache
+from helpers.secuirty import permissions
+
+
+async def _get_user(
+    filters: dict[str, Any], populate: Optional[UserPopulateOptions] = None, **kwargs
+) -> QueryResults[Users]:
+    # login and permissions checks, must see the latest writes
+    collection = db.with_profile(
+        db.ASYNC_USER_COLLECTION, db.OperationProfiles.STRONG_READ
+    )
+
+    try:
+        if populate is None:
+            user = await collection.find_one(filters, **kwargs)
+        else:
+            pipeline = [
+                aggregations.match_query(filters),
+                aggregations.limit(1),
+                *populate.build_pipeline(),
+            ]
+
+            docs = await collection.aggregate(pipeline, **kwargs).to_list(1)
+
+            user = next(iter(docs), None)
+    except Exception as e:
+        print(e)
+        return QueryResults(failure=True)
+
+    if user is None:
+        return QueryResults(not_found=True, failure=True)
+
+    return QueryResults(value=Users.from_db(user), success=True)
+
+
+async def get_user_for_get_me(user_id: Union[str, ObjectId]) -> QueryResults[dict]:
+
+    try:
+        docs = await db.ASYNC_USER_COLLECTION.aggregate(
+            _user_for_get_me_pipeline(user_id)
+        ).to_list(1)
+    except Exception as e:
+        print(e)
+        return QueryResults(failure=True)
+
+    user = next(iter(docs), None)
+
+    if user is None:
+        return QueryResults(not_found=True)
+
+    return QueryResults(value=user, success=True)
+
+
+async def get_user_by_email(
+    email: str, populate: Optional[UserPopulateOptions] = None
+) -> QueryResults[Users]:
+    return await _get_user({Users.Fields.email: email}, populate)
+
+
+async def get_user_by_id(
+    user_id: Union[str, ObjectId],
+    populate: Optional[UserPopulateOptions] = None,
+    request: Optional[RequestWithFullUser] = None,
+) -> QueryResults[Users]:
+    filters = {Users.Fields.id: ObjectId(user_id)}
+
+    if request is not None:
+        filters.update(
+            permissions.build_filters(
+                request,
+                Resources.USERS,
+                Actions.READ,
+            )
+        )
+
+    return await _get_user(filters, populate)
+
+
+async def get_user_for_permissions(
+    user_id: Union[str, ObjectId]
+) -> QueryResults[Users]:
+    """
+    the user with its role and account populated, the user (with its account) is served from
+    the users cache when possible, and the role from the roles cache
+    """
+    user_res = await cache.users.get_user_or_fetch_async(
+        user_id,
+        lambda: get_user_by_id(user_id, populate=UserPopulateOptions(account=True)),
+    )
+
+    if user_res.failure:
+        return user_res
+
+    return await cache.roles.populate_user_role_async(user_res.value)
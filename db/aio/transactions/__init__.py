@@ -0,0 +1,2 @@
+from .common import AsyncTransaction, TransactionResult, AsyncIOMotorClientSession
+from db.transactions.common import defer_after_commit
@@ -0,0 +1,81 @@
+from typing import Callable, Optional, Any, Awaitable
+from pydantic import BaseModel, Field
+from motor.motor_asyncio import AsyncIOMotorClientSession
+from db import async_mongo_client
+from db.profiles import transaction_options
+from db.transactions.common import (
+    TransactionResult,
+    TransactionAborted,
+    TooManyAttempts,
+    MAX_TRANSACTION_ATTEMPTS,
+    _deferred,
+    run_deferred,
+)
+
+
+class AsyncTransaction(BaseModel):
+    """
+    The async version of `db.transactions.common.Transaction`,
+    `func` must be a coroutine function that accepts the session as its first argument.
+    The deferred callbacks (`defer_after_commit`) are sync and run in the event loop.
+    """
+
+    func: Callable[
+        [AsyncIOMotorClientSession, Any], Awaitable[TransactionResult]
+    ] = Field(..., description="The coroutine function to execute")
+    args: list = Field(..., description="The function arguments")
+    kwargs: dict = Field(..., description="The function keyword arguments")
+    success: bool = Field(False, description="Whether the transaction was successful")
+    result: Optional[TransactionResult] = Field(None)
+    attempts: int = Field(0, description="How many times the function ran")
+    deferred_errors: list = Field(
+        [], description="The errors of the callbacks that ran after the commit"
+    )
+
+    async def _run(
+        self, session: AsyncIOMotorClientSession, deferred: list
+    ) -> TransactionResult:
+        self.attempts += 1
+
+        if self.attempts > MAX_TRANSACTION_ATTEMPTS:
+            raise TooManyAttempts(
+                f"transaction failed {MAX_TRANSACTION_ATTEMPTS} times"
+            )
+
+        deferred.clear()
+
+        res = await self.func(session, *self.args, **self.kwargs)
+
+        if not res.success:
+            raise TransactionAborted(res)
+
+        return res
+
+    async def start(self, session_kwargs: dict = {}, transaction_kwargs: dict = {}):
+        # the transactional_write profile, unless the caller overrides its options
+        transaction_kwargs = {**transaction_options(), **transaction_kwargs}
+
+        deferred = []
+        token = _deferred.set(deferred)
+
+        try:
+            async with await async_mongo_client.start_session(
+                **session_kwargs
+            ) as session:
+                res = await session.with_transaction(
+                    lambda session: self._run(session, deferred), **transaction_kwargs
+                )
+        except TransactionAborted as e:
+            # TODO log error
+            res = e.result
+        except Exception as e:
+            print(e)
+            res = TransactionResult(success=False, message="Transaction failed")
+        finally:
+            _deferred.reset(token)
+
+        if res.success:
+            self.deferred_errors = run_deferred(deferred)
+
+        self.success = res.success
+        self.result = res
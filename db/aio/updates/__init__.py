@@ -0,0 +1,9 @@
+from .users import (
+    set_user_registration_completed,
+    change_user_password_with_token,
+    rehash_user_password,
+)
+from .lessons.published import (
+    add_view_to_published_lesson,
+    update_published_lesson_review_stats,
+)
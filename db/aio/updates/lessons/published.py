@@ -0,0 +1,65 @@
+from db.models import PublishedLessons, Ratings, add_update_at_to_update
+import db
+from helpers.types import UpdateResults
+from typing import Union, Optional
+from bson import ObjectId
+from db.updates.lessons.published import _review_stats_update
+
+
+async def _update_published_lessons(
+    filters: dict,
+    update: Union[list[dict], dict],
+    profile: Optional[db.OperationProfiles] = None,
+    **kwargs,
+) -> UpdateResults[PublishedLessons]:
+    collection = db.ASYNC_PUBLISHED_LESSONS_COLLECTION
+
+    if profile is not None:
+        collection = db.with_profile(collection, profile)
+
+    try:
+        res = await collection.find_one_and_update(
+            filters, add_update_at_to_update(update), **kwargs
+        )
+    except Exception as e:
+        print(e)
+        return UpdateResults(failure=True)
+
+    if res is None:
+        return UpdateResults(not_found=True, failure=True)
+
+    return UpdateResults(success=True, value=PublishedLessons(**res))
+
+
+async def add_view_to_published_lesson(lesson_id: Union[ObjectId, str], views: int = 1):
+    filters = {
+        PublishedLessons.Fields.id: ObjectId(lesson_id),
+    }
+
+    update = {
+        "$inc": {
+            PublishedLessons.Fields.viewed: views,
+        }
+    }
+
+    return await _update_published_lessons(
+        filters,
+        update,
+        profile=db.OperationProfiles.COUNTER_WRITE,
+        return_document=True,
+    )
+
+
+async def update_published_lesson_review_stats(
+    lesson_id: Union[ObjectId, str], ratings: list[Ratings], remove: bool = False
+) -> UpdateResults[PublishedLessons]:
+
+    filters = {
+        PublishedLessons.Fields.id: ObjectId(lesson_id),
+    }
+
+    return await _update_published_lessons(
+        filters,
+        _review_stats_update(ratings, remove),
+        profile=db.OperationProfiles.COUNTER_WRITE,
+    )
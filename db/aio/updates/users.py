@@ -0,0 +1,88 @@
+import db
+from db import cache
+from db.models import Users, add_update_at_to_update
+from helpers.types import UpdateResults
+from typing import Union, Optional
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from fastapi.concurrency import run_in_threadpool
+
+
+async def _update_user(
+    filters: dict, update: Union[dict, list[dict]], **kwargs
+) -> UpdateResults[Users]:
+    try:
+        user = await db.ASYNC_USER_COLLECTION.find_one_and_update(
+            filters, add_update_at_to_update(update), **kwargs
+        )
+    except DuplicateKeyError:
+        return UpdateResults(exists=True)
+    except Exception as e:
+        print(e)
+        return UpdateResults(failure=True)
+
+    if user is None:
+        return UpdateResults(success=True, not_found=True)
+
+    await run_in_threadpool(cache.users.invalidate_users, user[Users.Fields.id])
+
+    return UpdateResults(success=True, value=Users(**user))
+
+
+async def set_user_registration_completed(
+    user_id: Union[ObjectId, str], token: str, password: Optional[str] = None
+) -> UpdateResults[Users]:
+
+    update = {
+        Users.Fields.registration_token: None,
+        Users.Fields.registration_completed: True,
+    }
+
+    if password is not None:
+        update[Users.Fields.password] = password
+
+    return await _update_user(
+        {
+            Users.Fields.id: ObjectId(user_id),
+            Users.Fields.registration_token: token,
+            Users.Fields.registration_completed: False,
+        },
+        {"$set": update},
+    )
+
+
+async def change_user_password_with_token(
+    user_id: Union[ObjectId, str],
+    token: str,
+    # hashed password
+    password: str,
+) -> UpdateResults[Users]:
+    return await _update_user(
+        {
+            Users.Fields.id: ObjectId(user_id),
+            Users.Fields.reset_password_token: token,
+        },
+        {
+            "$set": {
+                Users.Fields.password: password,
+                Users.Fields.reset_password_token: None,
+            }
+        },
+    )
+
+
+async def rehash_user_password(
+    user_id: Union[ObjectId, str],
+    # the hash the password was checked against
+    old_password: str,
+    # the new hash of the same password
+    password: str,
+) -> UpdateResults[Users]:
+    # only if the password didn't change since it was checked
+    return await _update_user(
+        {
+            Users.Fields.id: ObjectId(user_id),
+            Users.Fields.password: old_password,
+        },
+        {"$set": {Users.Fields.password: password}},
+    )
@@ -0,0 +1,266 @@
+"""
+Cache of the roles, in process memory, by id and by internal name.
+
+The roles are few and every permission check needs one, so every instance keeps all of them
+and resolves a role without a round trip.
+A write to the roles bumps a version counter in redis and publishes it (`invalidate`),
+every instance listens and reloads the roles on its next lookup.
+A message can be missed (e.g while redis reconnects), so the loaded version is also compared
+with redis every `ROLES_CACHE_CHECK_INTERVAL` seconds, and without redis the roles are reloaded on that interval.
+A bump can fail too, so the roles are reloaded at least every `ROLES_CACHE_MAX_AGE` seconds.
+"""
+import time
+from threading import Lock
+from typing import Union, Optional
+from bson import ObjectId
+from fastapi.concurrency import run_in_threadpool
+from redis.client import PubSubWorkerThread
+from db.models import Roles, Users, RolesInternalNames
+from helpers.types import QueryResults
+from helpers.env import EnvVars
+from services.redis import REDIS_DB
+import db
+
+
+class _RolesSnapshot:
+    __slots__ = ("by_id", "by_internal_name", "version", "loaded_at", "checked_at")
+
+    def __init__(self, roles: list[Roles], version: Optional[int]) -> None:
+        self.by_id = {str(role.id): role for role in roles}
+        self.by_internal_name = {role.internal_name.value: role for role in roles}
+        # the redis version the roles were loaded at, None if redis was not available
+        self.version = version
+        self.loaded_at = self.checked_at = time.monotonic()
+
+
+_snapshot: Optional[_RolesSnapshot] = None
+# set by `invalidate` and the listener, the next lookup reloads the roles
+_stale = True
+_lock = Lock()
+_listener: Optional[PubSubWorkerThread] = None
+
+
+def _get_version() -> Optional[int]:
+    try:
+        return REDIS_DB.get_roles_version()
+    except Exception as e:
+        print(e)
+        return None
+
+
+def _on_version(version: int):
+    global _stale
+
+    snapshot = _snapshot
+
+    if snapshot is None or not snapshot.version == version:
+        _stale = True
+
+
+def _on_listener_error(error: BaseException, *_):
+    global _stale
+
+    print(error)
+    # versions may be published until the subscription is restored
+    _stale = True
+    time.sleep(1)
+
+
+def _start_listener():
+    global _listener
+
+    if _listener is not None:
+        return
+
+    try:
+        _listener = REDIS_DB.subscribe_roles_versions(_on_version, _on_listener_error)
+    except Exception as e:
+        # tried again on the next load, the version check covers the roles meanwhile
+        print(e)
+
+
+def stop_listener():
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _load() -> _RolesSnapshot:
+    global _snapshot, _stale
+
+    _start_listener()
+
+    # the version is read before the roles, a write in between leaves an older version
+    # (the roles are reloaded on the next check), never newer roles with an older version
+    version = _get_version()
+    # cleared before the read, an invalidation during the read marks the roles stale again
+    _stale = False
+
+    try:
+        docs = db.with_profile(
+            db.ROLES_COLLECTION, db.OperationProfiles.STRONG_READ
+        ).find({})
+        roles = [Roles.from_db(doc) for doc in docs]
+    except Exception:
+        _stale = True
+        raise
+
+    _snapshot = _RolesSnapshot(roles, version)
+
+    return _snapshot
+
+
+def _is_fresh(snapshot: Optional[_RolesSnapshot]) -> bool:
+    return (
+        snapshot is not None
+        and not _stale
+        and time.monotonic() - snapshot.checked_at < EnvVars.ROLES_CACHE_CHECK_INTERVAL
+    )
+
+
+def _refresh() -> _RolesSnapshot:
+    with _lock:
+        snapshot = _snapshot
+
+        if _is_fresh(snapshot):
+            return snapshot
+
+        if (
+            snapshot is not None
+            and not _stale
+            and time.monotonic() - snapshot.loaded_at < EnvVars.ROLES_CACHE_MAX_AGE
+        ):
+            # only the check interval passed, reload if the version moved
+            version = _get_version()
+
+            if version is not None and version == snapshot.version:
+                snapshot.checked_at = time.monotonic()
+                return snapshot
+
+        return _load()
+
+
+def _get_snapshot() -> _RolesSnapshot:
+    snapshot = _snapshot
+
+    if _is_fresh(snapshot):
+        return snapshot
+
+    return _refresh()
+
+
+async def _get_snapshot_async() -> _RolesSnapshot:
+    """
+    same as `_get_snapshot`, mongo and redis are sync so it runs in the threadpool only on a reload
+    """
+    snapshot = _snapshot
+
+    if _is_fresh(snapshot):
+        return snapshot
+
+    return await run_in_threadpool(_refresh)
+
+
+def _role_result(role: Optional[Roles]) -> QueryResults[Roles]:
+    if role is None:
+        return QueryResults(not_found=True)
+
+    # each caller gets its own copy, like the users cache
+    return QueryResults(value=role.copy(deep=True), success=True)
+
+
+def get_role_by_id(role_id: Union[str, ObjectId]) -> QueryResults[Roles]:
+    try:
+        snapshot = _get_snapshot()
+    except Exception as e:
+        print(e)
+        return QueryResults(failure=True)
+
+    return _role_result(snapshot.by_id.get(str(role_id)))
+
+
+def get_role_by_internal_name(
+    internal_name: RolesInternalNames,
+) -> QueryResults[Roles]:
+    try:
+        snapshot = _get_snapshot()
+    except Exception as e:
+        print(e)
+        return QueryResults(failure=True)
+
+    return _role_result(snapshot.by_internal_name.get(internal_name.value))
+
+
+def get_roles_by_ids(role_ids: list[Union[str, ObjectId]]) -> QueryResults[dict]:
+    """
+    role id (str) -> role, the missing roles are left out
+    the roles are shared, don't modify them
+    """
+    try:
+        snapshot = _get_snapshot()
+    except Exception as e:
+        print(e)
+        return QueryResults(failure=True)
+
+    roles = {}
+
+    for role_id in role_ids:
+        role = snapshot.by_id.get(str(role_id))
+
+        if role is not None:
+            roles[str(role_id)] = role
+
+    return QueryResults(value=roles, success=True)
+
+
+def _populate_role(user: Users, snapshot: _RolesSnapshot) -> QueryResults[Users]:
+    role_id = user.role.id if isinstance(user.role, Roles) else user.role
+
+    role_res = _role_result(snapshot.by_id.get(str(role_id)))
+
+    if role_res.failure:
+        return QueryResults(not_found=True)
+
+    user.role = role_res.value
+
+    return QueryResults(value=user, success=True)
+
+
+def populate_user_role(user: Users) -> QueryResults[Users]:
+    """
+    set the role of the user from the cache, the user is modified
+    """
+    try:
+        snapshot = _get_snapshot()
+    except Exception as e:
+        print(e)
+        return QueryResults(failure=True)
+
+    return _populate_role(user, snapshot)
+
+
+async def populate_user_role_async(user: Users) -> QueryResults[Users]:
+    try:
+        snapshot = await _get_snapshot_async()
+    except Exception as e:
+        print(e)
+        return QueryResults(failure=True)
+
+    return _populate_role(user, snapshot)
+
+
+def invalidate():
+    """
+    call after any write to the roles collection
+    """
+    global _stale
+
+    _stale = True
+
+    try:
+        REDIS_DB.bump_roles_version()
+    except Exception as e:
+        # the other instances reload the roles on their next version check
+        print(e)
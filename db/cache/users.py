@@ -0,0 +1,171 @@
+"""
+Cache of the populated (role + account) user that `check_user_permission` loads on every request.
+
+There are two tiers:
+- process memory, short ttl, no round trips at all
+- redis, shared between the instances, invalidated on every user write
+
+Accounts are embedded in the cached user, so a write to any of them
+bumps a generation counter in redis that invalidates every cached user at once.
+The role is not cached with the user, it comes from the roles cache (`db.cache.roles`).
+Other instances may still serve the user from memory for up to `USER_LOCAL_CACHE_TTL` seconds.
+"""
+from cachetools import TTLCache
+from threading import Lock
+from typing import Union, Optional, Callable, Awaitable
+from bson import ObjectId
+from fastapi.concurrency import run_in_threadpool
+from db.models import Users
+from helpers.types import QueryResults
+from helpers.env import EnvVars
+from services.redis import REDIS_DB
+
+_local_users: TTLCache = TTLCache(
+    maxsize=EnvVars.USER_LOCAL_CACHE_SIZE, ttl=EnvVars.USER_LOCAL_CACHE_TTL
+)
+_local_lock = Lock()
+
+
+def _get_local(user_id: str) -> Optional[Users]:
+    with _local_lock:
+        user = _local_users.get(user_id)
+
+    # each request gets its own copy, the handlers are allowed to modify it
+    return user.copy(deep=True) if user is not None else None
+
+
+def _set_local(user: Users):
+    with _local_lock:
+        _local_users[str(user.id)] = user.copy(deep=True)
+
+
+def _get_shared(user_id: str) -> tuple[Optional[Users], int]:
+    """
+    returns the user from redis (if it is still valid) and the current generation
+    """
+    data, generation = REDIS_DB.get_cached_user(user_id)
+
+    if data is None:
+        return None, generation
+
+    cached_generation, user_json = data.decode().split(":", 1)
+
+    if not int(cached_generation) == generation:
+        return None, generation
+
+    return Users.parse_raw(user_json), generation
+
+
+def _set_shared(user: Users, generation: int):
+    REDIS_DB.set_cached_user(
+        str(user.id),
+        f"{generation}:{user.json(by_alias=True)}",
+        EnvVars.USER_CACHE_TTL,
+    )
+
+
+def _get_cached(user_id: str) -> tuple[Optional[Users], Optional[int]]:
+    user = _get_local(user_id)
+
+    if user is not None:
+        return user, None
+
+    try:
+        user, generation = _get_shared(user_id)
+    except Exception as e:
+        # redis is only a cache, mongo is still the source of truth
+        print(e)
+        return None, None
+
+    if user is not None:
+        _set_local(user)
+
+    return user, generation
+
+
+def _store(user: Users, generation: Optional[int]):
+    _set_local(user)
+
+    if generation is None:
+        return
+
+    try:
+        _set_shared(user, generation)
+    except Exception as e:
+        print(e)
+
+
+def get_user_or_fetch(
+    user_id: Union[str, ObjectId], fetch: Callable[[], QueryResults[Users]]
+) -> QueryResults[Users]:
+    """
+    return the cached user, or call `fetch` and cache its value
+    """
+    user_id = str(user_id)
+
+    user, generation = _get_cached(user_id)
+
+    if user is not None:
+        return QueryResults(value=user, success=True)
+
+    res = fetch()
+
+    if res.success:
+        _store(res.value, generation)
+
+    return res
+
+
+async def get_user_or_fetch_async(
+    user_id: Union[str, ObjectId], fetch: Callable[[], Awaitable[QueryResults[Users]]]
+) -> QueryResults[Users]:
+    """
+    same as `get_user_or_fetch`, redis is sync so it runs in the threadpool only on a memory miss
+    """
+    user_id = str(user_id)
+
+    user = _get_local(user_id)
+
+    if user is not None:
+        return QueryResults(value=user, success=True)
+
+    user, generation = await run_in_threadpool(_get_cached, user_id)
+
+    if user is not None:
+        return QueryResults(value=user, success=True)
+
+    res = await fetch()
+
+    if res.success:
+        await run_in_threadpool(_store, res.value, generation)
+
+    return res
+
+
+def invalidate_users(*user_ids: Union[str, ObjectId]):
+    """
+    call after any write to the users collection
+    """
+    user_ids = [str(user_id) for user_id in user_ids]
+
+    with _local_lock:
+        for user_id in user_ids:
+            _local_users.pop(user_id, None)
+
+    try:
+        REDIS_DB.delete_cached_users(user_ids)
+    except Exception as e:
+        print(e)
+
+
+def invalidate_all():
+    """
+    call after any write to the accounts collection
+    """
+    with _local_lock:
+        _local_users.clear()
+
+    try:
+        REDIS_DB.bump_users_cache_generation()
+    except Exception as e:
+        print(e)
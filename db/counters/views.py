@@ -0,0 +1,112 @@
+"""
+Write-behind counter of the published lessons views.
+
+Every watch of a lesson used to be its own `$inc` on the lesson document, popular lessons
+turned into write hot spots. The views are accumulated instead (in process memory, or in redis
+when `VIEWS_COUNTER_BACKEND` is "redis" so the instances share them) and flushed every
+`VIEWS_FLUSH_INTERVAL` seconds in one bulk write. `viewed` lags behind by up to one interval.
+
+`start_flusher` / `stop_flusher` are called on the app startup / shutdown, the shutdown flushes what is left.
+"""
+import asyncio
+from collections import Counter
+from threading import Lock
+from typing import Union, Optional
+from bson import ObjectId
+from fastapi.concurrency import run_in_threadpool
+from db import updates
+from helpers.env import EnvVars
+
+_pending: Counter = Counter()
+_pending_lock = Lock()
+_flusher: Optional[asyncio.Task] = None
+
+
+def _use_redis() -> bool:
+    return EnvVars.VIEWS_COUNTER_BACKEND == "redis"
+
+
+def _add_pending(views: dict[str, int]):
+    with _pending_lock:
+        _pending.update(views)
+
+
+def _take_pending() -> dict[str, int]:
+    global _pending
+
+    with _pending_lock:
+        views, _pending = _pending, Counter()
+
+    return dict(views)
+
+
+def add_view(lesson_id: Union[ObjectId, str], views: int = 1):
+    """
+    count a view of a published lesson, it is written to the lesson on the next flush
+    """
+    if _use_redis():
+        from services.redis import REDIS_DB
+
+        try:
+            REDIS_DB.increment_lesson_views(str(lesson_id), views)
+            return
+        except Exception as e:
+            # keep the view in memory, it is flushed by this instance
+            print(e)
+
+    _add_pending({str(lesson_id): views})
+
+
+def flush() -> int:
+    """
+    write the accumulated views to the lessons, returns how many lessons were updated
+    """
+    views = _take_pending()
+
+    if _use_redis():
+        from services.redis import REDIS_DB
+
+        try:
+            for lesson_id, count in REDIS_DB.pop_lessons_views().items():
+                views[lesson_id] = views.get(lesson_id, 0) + count
+        except Exception as e:
+            print(e)
+
+    if not views:
+        return 0
+
+    res = updates.add_views_to_published_lessons(views)
+
+    if res.failure:
+        # try again on the next flush, the views are kept in memory
+        _add_pending(views)
+        return 0
+
+    return res.value
+
+
+async def _run_flusher():
+    while True:
+        await asyncio.sleep(EnvVars.VIEWS_FLUSH_INTERVAL)
+
+        try:
+            await run_in_threadpool(flush)
+        except Exception as e:
+            print(e)
+
+
+def start_flusher():
+    global _flusher
+
+    if _flusher is None:
+        _flusher = asyncio.get_running_loop().create_task(_run_flusher())
+
+
+async def stop_flusher():
+    global _flusher
+
+    if _flusher is not None:
+        _flusher.cancel()
+        _flusher = None
+
+    await run_in_threadpool(flush)
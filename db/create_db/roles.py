@@ -1,4 +1,5 @@
 import db
+from db import cache
 from db.models import (
     Roles,
     RolesInternalNames,
@@ -29,6 +30,8 @@ def create_all_roles():
     editor_role = create_editor_role()
     create_institution_manager_role([viewer_role, editor_role])
     create_guest_role()
+    # the roles are recreated with new ids
+    cache.roles.invalidate()
 
 
 def create_guest_role():
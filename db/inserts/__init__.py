@@ -7,3 +7,4 @@ from .accounts import insert_new_account
 from .categories import insert_new_category
 from .review import insert_new_lesson_review
 from .site_help_categories import insert_new_site_help_category
+from .jobs import insert_new_job
@@ -0,0 +1,54 @@
+from ..models import Jobs
+import db
+from helpers.types import InsertResults
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime
+from bson import ObjectId
+from typing import Optional, Union
+
+
+def _insert_new_job(job: Jobs) -> InsertResults[Jobs]:
+    try:
+        res = db.JOBS_COLLECTION.insert_one(job.dict(to_db=True))
+    except DuplicateKeyError:
+        # the job of the idempotency key is returned with `exists`
+        try:
+            existing = db.JOBS_COLLECTION.find_one(
+                {Jobs.Fields.idempotency_key: job.idempotency_key}
+            )
+        except Exception as e:
+            print(e)
+            return InsertResults(failure=True)
+
+        if existing is None:
+            return InsertResults(failure=True)
+
+        return InsertResults(exists=True, value=Jobs(**existing))
+    except Exception as e:
+        print(e)
+        return InsertResults(failure=True)
+
+    job.id = res.inserted_id
+
+    return InsertResults(success=True, value=job)
+
+
+def insert_new_job(
+    name: str,
+    payload: dict,
+    max_attempts: int,
+    idempotency_key: Optional[str] = None,
+    creator: Optional[Union[ObjectId, str]] = None,
+    run_at: Optional[datetime] = None,
+) -> InsertResults[Jobs]:
+
+    job = Jobs(
+        name=name,
+        payload=payload,
+        max_attempts=max_attempts,
+        idempotency_key=idempotency_key,
+        creator=creator,
+        run_at=run_at or datetime.utcnow(),
+    )
+
+    return _insert_new_job(job)
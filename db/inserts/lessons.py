@@ -19,6 +19,7 @@ def _insert_new_publish_lesson(
     except DuplicateKeyError:
         return InsertResults(exists=True)
     except Exception as e:
+        db.raise_if_transient(e)
         return InsertResults(failure=True)
 
     lesson.id = res.inserted_id
@@ -1,5 +1,6 @@
 from ..models import LessonsReviews, Ratings, ReviewrInfo
 import db
+from db.updates.lessons.published import update_published_lesson_review_stats
 from helpers.types import InsertResults
 from pymongo.errors import DuplicateKeyError
 from bson import ObjectId
@@ -17,6 +18,9 @@ def _insert_new_lesson_review(review: LessonsReviews) -> InsertResults[LessonsRe
 
     review.id = res.inserted_id
 
+    # the lesson may be archived, then there are no stats to update
+    update_published_lesson_review_stats(review.lesson, review.ratings)
+
     return InsertResults(success=True, value=review)
 
 
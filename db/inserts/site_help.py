@@ -11,7 +11,8 @@ def _insert_new_site_help(site_help: SiteHelp, **kwargs) -> InsertResults[SiteHe
         res = db.SITE_HELP_COLLECTION.insert_one(site_help.dict(to_db=True), **kwargs)
     except DuplicateKeyError:
         return InsertResults(exists=True, failure=True)
-    except:
+    except Exception as e:
+        db.raise_if_transient(e)
         return InsertResults(failure=True)
 
     site_help.id = res.inserted_id
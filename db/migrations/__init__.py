@@ -1,4 +1,13 @@
-from db.models import DraftLessons, PublishedLessons, ArchiveLessons, LessonPart
+from db.models import (
+    DraftLessons,
+    PublishedLessons,
+    ArchiveLessons,
+    LessonPart,
+    LessonsReviews,
+    Ratings,
+    RatingStats,
+)
+from db import aggregations
 import db
 
 
@@ -168,3 +177,68 @@ def add_lesson_part_type_and_gcp_path_for_archive_lessons():
         },
         array_filters=[{f"part.{LessonPart.Fields.panoramic_url}": {"$exists": False}}],
     )
+
+
+def rebuild_published_lessons_review_stats():
+    """
+    recalculate the review stats of every published lesson from the reviews collection
+    run it once to fill the stats of the existing lessons, and whenever they drift from the reviews
+    """
+    ratings = LessonsReviews.Fields.ratings
+
+    db.LESSONS_REVIEWS_COLLECTION.aggregate(
+        [
+            aggregations.unwind(ratings),
+            aggregations.group(
+                {
+                    "_id": {
+                        "lesson": f"${LessonsReviews.Fields.lesson}",
+                        "name": f"${ratings}.{Ratings.Fields.name}",
+                    },
+                    RatingStats.Fields.count: {"$sum": 1},
+                    RatingStats.Fields.sum: {
+                        "$sum": f"${ratings}.{Ratings.Fields.rating}"
+                    },
+                    RatingStats.Fields.average: {
+                        "$avg": f"${ratings}.{Ratings.Fields.rating}"
+                    },
+                }
+            ),
+            aggregations.group(
+                {
+                    "_id": "$_id.lesson",
+                    "stats": {
+                        "$push": {
+                            "k": "$_id.name",
+                            "v": {
+                                RatingStats.Fields.count: f"${RatingStats.Fields.count}",
+                                RatingStats.Fields.sum: f"${RatingStats.Fields.sum}",
+                                RatingStats.Fields.average: f"${RatingStats.Fields.average}",
+                            },
+                        }
+                    },
+                }
+            ),
+            aggregations.project(
+                [], exclude_id=False, review_stats={"$arrayToObject": "$stats"}
+            ),
+            # archived lessons don't exist in the published collection, they are discarded
+            {
+                "$merge": {
+                    "into": PublishedLessons.__get_collection_name__(),
+                    "on": PublishedLessons.Fields.id.value,
+                    "whenMatched": "merge",
+                    "whenNotMatched": "discard",
+                }
+            },
+        ]
+    )
+
+    reviewed_lessons = db.LESSONS_REVIEWS_COLLECTION.distinct(
+        LessonsReviews.Fields.lesson
+    )
+
+    db.PUBLISHED_LESSONS_COLLECTION.update_many(
+        {PublishedLessons.Fields.id: {"$nin": reviewed_lessons}},
+        {"$set": {PublishedLessons.Fields.review_stats: {}}},
+    )
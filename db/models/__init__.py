@@ -6,6 +6,7 @@ from .lessons import (
     ArchiveLessons,
     LessonEdit,
     ScreensTypes,
+    RatingStats,
 )
 from .categories import Categories
 from .lessons_reviews import (
@@ -26,6 +27,7 @@ from .roles import (
     DynamicSources,
 )
 from .site_help import SiteHelp, SiteHelpCategories
+from .jobs import Jobs, JobStatus
 
 from .common import DBModel, add_update_at_to_update
 from typing import Type
@@ -41,4 +43,5 @@ __models__: list[Type[DBModel]] = [
     Roles,
     SiteHelp,
     SiteHelpCategories,
+    Jobs,
 ]
@@ -57,7 +57,12 @@ class Accounts(DBModel):
             .set_unique()
         )
 
-        return [unique_institution_in_city]
+        # removing deleted lessons from the accounts that were allowed to see them
+        allowed_lessons = MongoIndex("allowed_lessons").add_field(
+            cls.Fields.allowed_lessons, 1
+        )
+
+        return [unique_institution_in_city, allowed_lessons]
 
 
 from .lessons.published import PublishedLessons
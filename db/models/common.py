@@ -1,11 +1,181 @@
 from pydantic import BaseModel, Field, Extra
+from pydantic.fields import (
+    ModelField,
+    SHAPE_SINGLETON,
+    SHAPE_LIST,
+    SHAPE_SET,
+    SHAPE_SEQUENCE,
+    SHAPE_TUPLE_ELLIPSIS,
+    SHAPE_DICT,
+    SHAPE_MAPPING,
+    SHAPE_DEFAULTDICT,
+)
+from pydantic.typing import is_union
 from helpers.fields import ObjectIdField
 from functools import cache
 from datetime import datetime
 from bson import ObjectId
 from enum import Enum
-from typing import Union, Literal
+from typing import Union, Literal, Any, Callable, Optional, Type, TypeVar, get_origin
 from pymongo.collation import Collation
+from pymongo import IndexModel
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+_LIST_SHAPES = {SHAPE_LIST, SHAPE_SET, SHAPE_SEQUENCE, SHAPE_TUPLE_ELLIPSIS}
+_DICT_SHAPES = {SHAPE_DICT, SHAPE_MAPPING, SHAPE_DEFAULTDICT}
+
+Converter = Callable[[Any], Any]
+
+# model -> [(document key, field name, field, converter)], built on the first hydration of the model
+_hydration_plans: dict[
+    type, list[tuple[str, str, ModelField, Optional[Converter]]]
+] = {}
+
+
+def _wants_dict(field: ModelField) -> bool:
+    """
+    whether the field (or its items) is a model, so a document is expected
+    """
+    if not field.shape == SHAPE_SINGLETON and field.sub_fields:
+        return _wants_dict(field.sub_fields[0])
+
+    return isinstance(field.type_, type) and issubclass(field.type_, BaseModel)
+
+
+def _type_converter(type_: Any) -> Optional[Converter]:
+    if not isinstance(type_, type):
+        return None
+
+    if issubclass(type_, BaseModel):
+        return lambda value: hydrate(type_, value) if isinstance(value, dict) else value
+
+    if issubclass(type_, Enum):
+        return lambda value: value if isinstance(value, type_) else type_(value)
+
+    # scalars are stored with their type (ObjectId, datetime, str, numbers)
+    return None
+
+
+def _model_keys(field: ModelField) -> set[str]:
+    if not field.shape == SHAPE_SINGLETON and field.sub_fields:
+        return _model_keys(field.sub_fields[0])
+
+    return {f.alias for f in field.type_.__fields__.values()} | set(
+        field.type_.__fields__
+    )
+
+
+def _union_converter(members: list[ModelField]) -> Optional[Converter]:
+    # the union members are picked by the stored value, a document (or a list of them) is a model
+    # of the first model member that has all its keys, like the validation with extra forbidden
+    model_members = [
+        (_model_keys(member), _field_converter(member))
+        for member in members
+        if _wants_dict(member)
+    ]
+    scalar_member = next(
+        (member for member in members if not _wants_dict(member)), None
+    )
+    scalar_converter = _field_converter(scalar_member) if scalar_member else None
+
+    if not model_members and scalar_converter is None:
+        return None
+
+    def convert(value):
+        sample = value[0] if isinstance(value, list) and value else value
+
+        if not isinstance(sample, dict) or not model_members:
+            return value if scalar_converter is None else scalar_converter(value)
+
+        for keys, converter in model_members:
+            if keys.issuperset(sample):
+                return converter(value)
+
+        return model_members[0][1](value)
+
+    return convert
+
+
+def _field_converter(field: ModelField) -> Optional[Converter]:
+    if field.shape == SHAPE_SINGLETON:
+        if field.sub_fields and is_union(get_origin(field.type_)):
+            # the members are the sub fields, their forward refs are resolved
+            return _union_converter(field.sub_fields)
+
+        return _type_converter(field.type_)
+
+    item_converter = _field_converter(field.sub_fields[0]) if field.sub_fields else None
+
+    if item_converter is None:
+        return None
+
+    if field.shape in _LIST_SHAPES:
+        return lambda value: (
+            [item_converter(item) if item is not None else None for item in value]
+            if isinstance(value, (list, tuple))
+            else value
+        )
+
+    if field.shape in _DICT_SHAPES:
+        return lambda value: (
+            {
+                key: item_converter(item) if item is not None else None
+                for key, item in value.items()
+            }
+            if isinstance(value, dict)
+            else value
+        )
+
+    return None
+
+
+def _hydration_plan(model: type) -> list:
+    plan = _hydration_plans.get(model)
+
+    if plan is None:
+        plan = [
+            (field.alias, name, field, _field_converter(field))
+            for name, field in model.__fields__.items()
+        ]
+        _hydration_plans[model] = plan
+
+    return plan
+
+
+def hydrate(model: Type[ModelT], doc: dict) -> ModelT:
+    """
+    build the model from a trusted document (read from the db) without validating it, like `construct`
+    but the nested models and the enums are built too. the missing fields get their default,
+    keys that are not fields are dropped.
+    documents that come from the users must be validated (`model(**doc)`)
+    """
+    values = {}
+    fields_set = set()
+    by_field_name = model.__config__.allow_population_by_field_name
+
+    for alias, name, field, converter in _hydration_plan(model):
+        if alias in doc:
+            value = doc[alias]
+        elif by_field_name and name in doc:
+            value = doc[name]
+        else:
+            if not field.required:
+                values[name] = field.get_default()
+            continue
+
+        if converter is not None and value is not None:
+            value = converter(value)
+
+        values[name] = value
+        fields_set.add(name)
+
+    instance = model.__new__(model)
+    object.__setattr__(instance, "__dict__", values)
+    object.__setattr__(instance, "__fields_set__", fields_set)
+    instance._init_private_attributes()
+
+    return instance
 
 
 class DBModel(BaseModel):
@@ -44,6 +214,13 @@ class DBModel(BaseModel):
     def get_indexes(cls) -> list["MongoIndex"]:
         return []
 
+    @classmethod
+    def from_db(cls: Type[ModelT], doc: dict) -> ModelT:
+        """
+        the model of a document read from the db, not validated (see `hydrate`)
+        """
+        return hydrate(cls, doc)
+
     def __getitem__(self, key):
         if key == "_id":
             return self.id
@@ -83,6 +260,9 @@ class MongoIndex:
         self.unique = False
         self._blocked = False
         self.collation = None
+        self.sparse = False
+        self.partial_filter = None
+        self.expire_after_seconds = None
 
     def add_field(self, field: str, order: Literal[1, -1, "text"]):
         if order not in [1, -1, "text"]:
@@ -97,6 +277,69 @@ class MongoIndex:
         self._blocked = True
         return self
 
+    def set_sparse(self):
+        """
+        documents without the indexed fields are not indexed
+        """
+        self.sparse = True
+        return self
+
+    def set_partial_filter(self, filter_expression: dict):
+        """
+        only documents that match the filter are indexed,
+        queries use the index only if they include the filter conditions
+        """
+        self.partial_filter = filter_expression
+        return self
+
+    def set_ttl(self, seconds: int):
+        """
+        mongo deletes the documents `seconds` after the date in the (single) indexed field
+        """
+        if not len(self.fields) == 1:
+            raise Exception("ttl indexes must have exactly one field")
+        self.expire_after_seconds = seconds
+        self._blocked = True
+        return self
+
+    def to_index_model(self) -> IndexModel:
+        kwargs = {}
+
+        if self.collation is not None:
+            kwargs["collation"] = self.collation
+        if self.sparse:
+            kwargs["sparse"] = True
+        if self.partial_filter is not None:
+            kwargs["partialFilterExpression"] = self.partial_filter
+        if self.expire_after_seconds is not None:
+            kwargs["expireAfterSeconds"] = self.expire_after_seconds
+
+        return IndexModel(self.fields, name=self.name, unique=self.unique, **kwargs)
+
+    def is_text(self) -> bool:
+        return any(order == "text" for _, order in self.fields)
+
+    def differs_from(self, info: dict) -> bool:
+        """
+        compare the index with the existing index info (from `index_information`) of the same name
+        """
+        # mongo stores text indexes with internal keys, only the options are compared
+        if not self.is_text():
+            key = [(field, int(order)) for field, order in info.get("key", [])]
+            fields = [
+                (field.value if isinstance(field, Enum) else field, order)
+                for field, order in self.fields
+            ]
+            if not key == fields:
+                return True
+
+        return not (
+            bool(info.get("unique", False)) == self.unique
+            and bool(info.get("sparse", False)) == self.sparse
+            and info.get("partialFilterExpression") == self.partial_filter
+            and info.get("expireAfterSeconds") == self.expire_after_seconds
+        )
+
     def set_collation(
         self,
         locale: str,
@@ -0,0 +1,86 @@
+from .common import DBModel, MongoIndex
+from helpers.fields import ObjectIdField
+from pydantic import Field
+from typing import Optional, Any
+from datetime import datetime
+from enum import Enum
+
+
+class JobStatus(str, Enum):
+    # waiting for a worker, or for its next attempt
+    PENDING = "pending"
+    # claimed by a worker until `lease_expires_at`
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    # out of attempts
+    FAILED = "failed"
+
+
+class Jobs(DBModel):
+    attempts: int = Field(0)
+    # the user that started the job, only they can see its status
+    creator: Optional[ObjectIdField] = Field(None)
+    error: Optional[str] = Field(None)
+    finished_at: Optional[datetime] = Field(None)
+    # the same key returns the existing job instead of adding a new one
+    idempotency_key: Optional[str] = Field(None)
+    lease_expires_at: Optional[datetime] = Field(None)
+    locked_by: Optional[str] = Field(None)
+    max_attempts: int = Field(...)
+    name: str = Field(...)
+    payload: dict[str, Any] = Field(default_factory=dict)
+    result: Optional[Any] = Field(None)
+    # not claimed before this time, pushed forward on retries
+    run_at: datetime = Field(default_factory=datetime.utcnow)
+    status: JobStatus = Field(JobStatus.PENDING)
+
+    class Fields(str, Enum):
+        id = "_id"
+        created_at = "created_at"
+        updated_at = "updated_at"
+        attempts = "attempts"
+        creator = "creator"
+        error = "error"
+        finished_at = "finished_at"
+        idempotency_key = "idempotency_key"
+        lease_expires_at = "lease_expires_at"
+        locked_by = "locked_by"
+        max_attempts = "max_attempts"
+        name_ = "name"
+        payload = "payload"
+        result = "result"
+        run_at = "run_at"
+        status = "status"
+
+    @classmethod
+    def get_indexes(cls) -> list[MongoIndex]:
+
+        # the workers claim the oldest due pending job, and the expired running ones
+        claim = (
+            MongoIndex("claim")
+            .add_field(cls.Fields.status, 1)
+            .add_field(cls.Fields.run_at, 1)
+        )
+
+        expired_leases = (
+            MongoIndex("expired_leases")
+            .add_field(cls.Fields.lease_expires_at, 1)
+            .set_partial_filter({cls.Fields.status.value: JobStatus.RUNNING.value})
+        )
+
+        unique_idempotency_key = (
+            MongoIndex("unique_idempotency_key")
+            .add_field(cls.Fields.idempotency_key, 1)
+            .set_unique()
+            .set_partial_filter({cls.Fields.idempotency_key.value: {"$type": "string"}})
+        )
+
+        # finished jobs are kept a week for the status endpoint
+        # (the unfinished ones don't have the field so they are not removed)
+        finished_ttl = (
+            MongoIndex("finished_ttl")
+            .add_field(cls.Fields.finished_at, 1)
+            .set_ttl(7 * 24 * 60 * 60)
+        )
+
+        return [claim, expired_leases, unique_idempotency_key, finished_ttl]
@@ -1,4 +1,11 @@
-from .common import LessonPart, LessonScreen, BaseLessonFields, LessonEdit, ScreensTypes
+from .common import (
+    LessonPart,
+    LessonScreen,
+    BaseLessonFields,
+    LessonEdit,
+    ScreensTypes,
+    RatingStats,
+)
 from .draft import DraftLessons
 from .published import PublishedLessons
 from .archive import ArchiveLessons
@@ -1,5 +1,5 @@
-from .common import BaseLessons
-from ..common import DBModel
+from .common import BaseLessons, LessonEdit
+from ..common import DBModel, MongoIndex
 from typing import Union
 from datetime import datetime
 from pydantic import Field
@@ -30,6 +30,24 @@ class ArchiveLessons(BaseLessons, DBModel):
         edit_data = "edit_data"
         public = "public"
         credit = "credit"
+        review_stats = "review_stats"
+
+    @classmethod
+    def get_indexes(cls) -> list[MongoIndex]:
+
+        # the list and the expired lessons purge
+        # not a ttl index, the lesson files need to be deleted with the document
+        archive_at = MongoIndex("archive_at").add_field(cls.Fields.archive_at, 1)
+
+        creator = MongoIndex("creator").add_field(cls.Fields.creator, 1)
+
+        current_editor = (
+            MongoIndex("current_editor")
+            .add_field(f"{cls.Fields.edit_data}.{LessonEdit.Fields.current_editor}", 1)
+            .set_sparse()
+        )
+
+        return [archive_at, creator, current_editor]
 
 
 from ..users import Users
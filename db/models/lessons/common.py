@@ -99,6 +99,21 @@ class LessonEdit(BaseModel):
         return None
 
 
+class RatingStats(BaseModel):
+    """
+    the stats of one rating over all the reviews of a lesson, kept up to date on every review insert / delete
+    """
+
+    average: float = Field(0)
+    count: int = Field(0)
+    sum: int = Field(0)
+
+    class Fields(str, Enum):
+        average = "average"
+        count = "count"
+        sum = "sum"
+
+
 class BaseLessons(DBModel):
 
     title: Optional[str] = Field(None)
@@ -115,6 +130,8 @@ class BaseLessons(DBModel):
     edit_data: Optional[LessonEdit] = Field(None)
     public: bool = Field(default=False)
     credit: Optional[str] = Field(None)
+    # rating name -> stats
+    review_stats: dict[str, RatingStats] = Field(default_factory=dict)
 
     def get_part(self, part_id: str) -> Union[None, LessonPart]:
 
@@ -141,6 +158,7 @@ class BaseLessonFields(str, Enum):
     edit_data = "edit_data"
     public = "public"
     credit = "credit"
+    review_stats = "review_stats"
 
 
 from ..users import Users
@@ -20,6 +20,7 @@ class DraftLessons(BaseLessons):
         edit_data = "edit_data"
         public = "public"
         credit = "credit"
+        review_stats = "review_stats"
 
     # In the draft collection, each user can only have one draft lesson
     # so the creator field is unique only for this collection
@@ -23,6 +23,7 @@ class PublishedLessons(BaseLessons, DBModel):
         edit_data = "edit_data"
         public = "public"
         credit = "credit"
+        review_stats = "review_stats"
 
     @classmethod
     def get_indexes(cls) -> list[MongoIndex]:
@@ -35,5 +36,44 @@ class PublishedLessons(BaseLessons, DBModel):
             .add_field(cls.Fields.description, "text")
         )
 
-        return [text_search]
+        # the catalogue sort, also used by the cursor pagination
+        by_created_at = (
+            MongoIndex("by_created_at")
+            .add_field(cls.Fields.created_at, -1)
+            .add_field(cls.Fields.id, -1)
+        )
+
+        # the "public" branch of the read permissions
+        public_by_created_at = (
+            MongoIndex("public_by_created_at")
+            .add_field(cls.Fields.created_at, -1)
+            .add_field(cls.Fields.id, -1)
+            .set_partial_filter({cls.Fields.public.value: True})
+        )
+
+        # the category filter and the "categories" branch of the read permissions
+        categories_by_created_at = (
+            MongoIndex("categories_by_created_at")
+            .add_field(cls.Fields.categories, 1)
+            .add_field(cls.Fields.created_at, -1)
+            .add_field(cls.Fields.id, -1)
+        )
+
+        creator = MongoIndex("creator").add_field(cls.Fields.creator, 1)
+
+        # only lessons in the middle of an edit have an editor
+        current_editor = (
+            MongoIndex("current_editor")
+            .add_field(f"{cls.Fields.edit_data}.{LessonEdit.Fields.current_editor}", 1)
+            .set_sparse()
+        )
+
+        return [
+            text_search,
+            by_created_at,
+            public_by_created_at,
+            categories_by_created_at,
+            creator,
+            current_editor,
+        ]
 
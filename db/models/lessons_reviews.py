@@ -90,7 +90,9 @@ class LessonsReviews(DBModel):
             .set_unique()
         )
 
-        return [unique_review_id]
+        lesson = MongoIndex("lesson").add_field(cls.Fields.lesson, 1)
+
+        return [unique_review_id, lesson]
 
     class Fields(str, Enum):
         id = "_id"
@@ -29,6 +29,20 @@ class SiteHelp(DBModel):
         creator = "creator"
         order = "order"
 
+    @classmethod
+    def get_indexes(cls) -> list[MongoIndex]:
+
+        # the list is sorted by the order, and filtered by the category
+        by_order = MongoIndex("by_order").add_field(cls.Fields.order, 1)
+
+        category_by_order = (
+            MongoIndex("category_by_order")
+            .add_field(cls.Fields.category, 1)
+            .add_field(cls.Fields.order, 1)
+        )
+
+        return [by_order, category_by_order]
+
 
 class SiteHelpCategories(DBModel):
     name: str = Field(...)
@@ -37,7 +37,16 @@ class Users(DBModel):
             .set_unique()
         )
 
-        return [uniuqe_email]
+        account = MongoIndex("account").add_field(cls.Fields.account, 1)
+
+        role = MongoIndex("role").add_field(cls.Fields.role, 1)
+
+        # removing deleted lessons from the users that were allowed to see them
+        allowed_lessons = MongoIndex("allowed_lessons").add_field(
+            cls.Fields.allowed_lessons, 1
+        )
+
+        return [uniuqe_email, account, role, allowed_lessons]
 
     def dict(self, to_db: bool = False, *args, **kwargs):
         if to_db:
@@ -0,0 +1,109 @@
+"""
+Named operation profiles, the read preference / read concern / write concern an operation runs with.
+
+- `CATALOGUE_READ` public lists (lessons, categories, site help), may be served by a secondary
+- `STRONG_READ` reads that must see the latest writes (login, permissions, editing)
+- `COUNTER_WRITE` counters (views, review stats), acknowledged by the primary only
+- `TRANSACTIONAL_WRITE` transactions, majority read and write concern
+
+Use `with_profile` on a collection (sync or async) before the operation,
+and `transaction_options` for `start_transaction`.
+Inside a transaction the transaction options win over the collection ones.
+"""
+from enum import Enum
+from typing import TypeVar
+from pymongo import ReadPreference
+from pymongo.read_concern import ReadConcern
+from pymongo.write_concern import WriteConcern
+from helpers.env import EnvVars
+
+CollectionT = TypeVar("CollectionT")
+
+
+class OperationProfiles(str, Enum):
+    CATALOGUE_READ = "catalogue_read"
+    STRONG_READ = "strong_read"
+    COUNTER_WRITE = "counter_write"
+    TRANSACTIONAL_WRITE = "transactional_write"
+
+
+_READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+if EnvVars.DB_CATALOGUE_READ_PREFERENCE not in _READ_PREFERENCES:
+    raise ValueError(
+        f"DB_CATALOGUE_READ_PREFERENCE must be one of {', '.join(_READ_PREFERENCES)}"
+    )
+
+
+_PROFILES_OPTIONS: dict[OperationProfiles, dict] = {
+    OperationProfiles.CATALOGUE_READ: {
+        "read_preference": _READ_PREFERENCES[EnvVars.DB_CATALOGUE_READ_PREFERENCE],
+        "read_concern": ReadConcern("local"),
+    },
+    OperationProfiles.STRONG_READ: {
+        "read_preference": ReadPreference.PRIMARY,
+        "read_concern": ReadConcern("majority"),
+    },
+    OperationProfiles.COUNTER_WRITE: {
+        "write_concern": WriteConcern(w=EnvVars.DB_COUNTER_WRITE_CONCERN, j=False),
+    },
+    OperationProfiles.TRANSACTIONAL_WRITE: {
+        "read_preference": ReadPreference.PRIMARY,
+        "read_concern": ReadConcern("majority"),
+        "write_concern": WriteConcern(w="majority", j=True),
+    },
+}
+
+# (collection type, collection full name, profile) -> collection
+_profiled_collections: dict = {}
+
+
+def with_profile(collection: CollectionT, profile: OperationProfiles) -> CollectionT:
+    """
+    returns the collection with the options of the profile, works with pymongo and motor collections
+    """
+    key = (type(collection), collection.full_name, profile)
+
+    profiled = _profiled_collections.get(key)
+
+    if profiled is None:
+        profiled = collection.with_options(**_PROFILES_OPTIONS[profile])
+        _profiled_collections[key] = profiled
+
+    return profiled
+
+
+def transaction_options(
+    profile: OperationProfiles = OperationProfiles.TRANSACTIONAL_WRITE,
+) -> dict:
+    """
+    the `start_transaction` keyword arguments of the profile
+    """
+    return dict(_PROFILES_OPTIONS[profile])
+
+
+def client_options() -> dict:
+    """
+    the mongo clients keyword arguments from the env
+    """
+    options = {
+        "maxPoolSize": EnvVars.DB_MAX_POOL_SIZE,
+        "minPoolSize": EnvVars.DB_MIN_POOL_SIZE,
+    }
+
+    compressors = [c.strip() for c in EnvVars.DB_COMPRESSORS.split(",") if c.strip()]
+
+    if compressors:
+        options["compressors"] = compressors
+
+    if EnvVars.DB_MAX_TIME_MS:
+        # the client side timeout, pymongo sends the time left to the server as maxTimeMS
+        options["timeoutMS"] = EnvVars.DB_MAX_TIME_MS
+
+    return options
@@ -3,12 +3,14 @@ from .roles import (
     get_account_manager_role,
     get_role_by_id,
     get_roles_for_external,
+    get_roles_stamp,
     get_guest_role_full_extarnel,
 )
 from .users import (
     get_user_for_get_me,
     get_user_by_email,
     get_user_by_id,
+    get_user_for_permissions,
     get_users_for_external,
     get_user_by_id_for_external,
     get_system_admin_user,
@@ -19,6 +21,7 @@ from .categories import (
     get_category_by_id,
     validate_categories_exists,
     get_categories_for_external,
+    get_categories_stamp,
     get_categories_associated_with_user,
     validate_many_categories_exists,
 )
@@ -47,6 +50,12 @@ from .accounts import (
 from .reviews import get_lessons_review_for_external
 from .site_help_categories import (
     get_site_help_categories_for_external,
+    get_site_help_categories_stamp,
     get_site_help_category_by_id,
 )
-from .site_help import get_site_help_by_id, get_site_helps_for_external
+from .site_help import (
+    get_site_help_by_id,
+    get_site_helps_for_external,
+    get_site_helps_stamp,
+)
+from .jobs import get_job_by_id
@@ -52,7 +52,7 @@ def _get_account(
     if doc is None:
         return QueryResults(not_found=True)
 
-    return QueryResults(value=Accounts(**doc), success=True)
+    return QueryResults(value=Accounts.from_db(doc), success=True)
 
 
 def check_account_user_limit(
@@ -105,12 +105,15 @@ def get_accounts_for_external(
     offset = request.state.page * request.state.limit
 
     try:
-        docs = db.ACCOUNT_COLLECTION.aggregate(
+        docs, count = aggregations.aggregate_paginated(
+            db.ACCOUNT_COLLECTION,
             [
                 aggregations.match_query(default_filters),
                 aggregations.match_query(provided_filters),
-                aggregations.skip(offset),
-                aggregations.limit(request.state.limit),
+            ],
+            offset,
+            request.state.limit,
+            [
                 aggregations.project(
                     [
                         Accounts.Fields.institution_name,
@@ -121,24 +124,7 @@ def get_accounts_for_external(
                         Accounts.Fields.current_users,
                     ]
                 ),
-            ]
-        )
-        docs = list(docs)
-    except:
-        return QueryResults(failure=True)
-
-    count = len(docs)
-
-    if count < request.state.limit:
-        count += offset
-        return QueryResults(value=(docs, count), success=True)
-
-    try:
-        count = db.ACCOUNT_COLLECTION.count_documents(
-            {
-                **provided_filters,
-                **default_filters,
-            }
+            ],
         )
     except:
         return QueryResults(failure=True)
@@ -1,4 +1,5 @@
-from typing import Union, Any
+from typing import Union, Any, Optional
+from pymongo.client_session import ClientSession
 from ..models import Categories, Resources, Actions, PublishedLessons
 from bson import ObjectId
 from helpers.types import QueryResults, RequestWithPaginationAndFullUser
@@ -17,7 +18,7 @@ def _get_category(filters: dict[str, Any]) -> QueryResults[Categories]:
     if category is None:
         return QueryResults(not_found=True)
 
-    return QueryResults(value=Categories(**category), success=True)
+    return QueryResults(value=Categories.from_db(category), success=True)
 
 
 def get_category_by_id(category_id: Union[ObjectId, str]):
@@ -44,9 +45,30 @@ def validate_categories_exists(
     return QueryResults(success=True)
 
 
+def get_categories_stamp(
+    session: Optional[ClientSession] = None,
+) -> QueryResults[str]:
+    """
+    stamp of the categories, for the etag of `get_categories_for_external`
+    """
+    try:
+        stamp = aggregations.collection_stamp(
+            db.with_profile(
+                db.CATEGORIES_COLLECTION, db.OperationProfiles.CATALOGUE_READ
+            ),
+            session=session,
+        )
+    except Exception as e:
+        print(e)
+        return QueryResults(failure=True)
+
+    return QueryResults(value=stamp, success=True)
+
+
 def get_categories_for_external(
     free_text: str,
     request: RequestWithPaginationAndFullUser,
+    session: Optional[ClientSession] = None,
 ) -> QueryResults[tuple[list[dict], int]]:
 
     query = {}
@@ -55,31 +77,26 @@ def get_categories_for_external(
         query = {Categories.Fields.name_: {"$regex": free_text, "$options": "i"}}
 
     try:
-        docs = list(
-            db.CATEGORIES_COLLECTION.find(
-                query,
-                projection={
-                    Categories.Fields.name_: 1,
-                    Categories.Fields.description: 1,
-                },
-            )
-            .skip(request.state.offset)
-            .limit(request.state.limit)
+        docs, count = aggregations.aggregate_paginated(
+            db.with_profile(
+                db.CATEGORIES_COLLECTION, db.OperationProfiles.CATALOGUE_READ
+            ),
+            [aggregations.match_query(query)],
+            request.state.offset,
+            request.state.limit,
+            [
+                aggregations.project(
+                    [
+                        Categories.Fields.name_,
+                        Categories.Fields.description,
+                    ]
+                )
+            ],
+            session=session,
         )
     except:
         return QueryResults(failure=True)
 
-    count = len(docs)
-
-    if count < request.state.limit:
-        count += request.state.offset
-        return QueryResults(value=(docs, count), success=True)
-
-    try:
-        count = db.CATEGORIES_COLLECTION.count_documents(query)
-    except:
-        return QueryResults(failure=True)
-
     return QueryResults(value=(docs, count), success=True)
 
 
@@ -124,35 +141,18 @@ def get_categories_associated_with_user(
         )
 
     try:
-        docs = list(
-            db.PUBLISHED_LESSONS_COLLECTION.aggregate(
-                [
-                    *base_pipeline,
-                    aggregations.skip(request.state.offset),
-                    aggregations.limit(request.state.limit),
-                ]
-            )
+        docs, count = aggregations.aggregate_paginated(
+            db.with_profile(
+                db.PUBLISHED_LESSONS_COLLECTION, db.OperationProfiles.CATALOGUE_READ
+            ),
+            base_pipeline,
+            request.state.offset,
+            request.state.limit,
         )
     except Exception as e:
         print(e)
         return QueryResults(failure=True)
 
-    count = len(docs)
-
-    if count < request.state.limit:
-        count += request.state.offset
-        return QueryResults(value=(docs, count), success=True)
-
-    try:
-        count = db.PUBLISHED_LESSONS_COLLECTION.aggregate(
-            [
-                *base_pipeline,
-                aggregations.count("count"),
-            ]
-        )[0]["count"]
-    except:
-        return QueryResults(failure=True)
-
     return QueryResults(value=(docs, count), success=True)
 
 
@@ -0,0 +1,18 @@
+from typing import Union
+from ..models import Jobs
+from bson import ObjectId
+from helpers.types import QueryResults
+import db
+
+
+def get_job_by_id(job_id: Union[ObjectId, str]) -> QueryResults[Jobs]:
+    try:
+        job = db.JOBS_COLLECTION.find_one({Jobs.Fields.id: ObjectId(job_id)})
+    except Exception as e:
+        print(e)
+        return QueryResults(failure=True)
+
+    if job is None:
+        return QueryResults(not_found=True)
+
+    return QueryResults(value=Jobs.from_db(job), success=True)
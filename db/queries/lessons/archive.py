@@ -30,7 +30,7 @@ def _get_archive_lesson(
     if not lesson:
         return QueryResults(not_found=True)
 
-    return QueryResults(success=True, value=ArchiveLessons(**lesson))
+    return QueryResults(success=True, value=ArchiveLessons.from_db(lesson))
 
 
 def get_archived_lessons_for_external(
@@ -43,10 +43,7 @@ def get_archived_lessons_for_external(
         Actions.READ_MANY,
     )
 
-    pipeline = [
-        aggregations.match_query(default_filters),
-        aggregations.skip(request.state.offset),
-        aggregations.limit(request.state.limit),
+    page_pipeline = [
         aggregations.lookup(
             from_=Users,
             local_field=ArchiveLessons.Fields.creator,
@@ -63,20 +60,13 @@ def get_archived_lessons_for_external(
         ),
     ]
     try:
-        cursor = db.ARCHIVE_LESSONS_COLLECTION.aggregate(pipeline)
-    except:
-        return QueryResults(failure=True)
-
-    docs = list(cursor)
-
-    count = len(docs)
-
-    if count < request.state.limit:
-        count += request.state.offset
-        return QueryResults(value=(docs, count), success=True)
-
-    try:
-        count = db.ARCHIVE_LESSONS_COLLECTION.count_documents(default_filters)
+        docs, count = aggregations.aggregate_paginated(
+            db.ARCHIVE_LESSONS_COLLECTION,
+            [aggregations.match_query(default_filters)],
+            request.state.offset,
+            request.state.limit,
+            page_pipeline,
+        )
     except:
         return QueryResults(failure=True)
 
@@ -7,14 +7,16 @@ from bson import ObjectId
 
 def _get_draft_lesson(filters: dict[str, Any]) -> QueryResults[DraftLessons]:
     try:
-        lesson = db.DRAFT_LESSONS_COLLECTION.find_one(filters)
+        lesson = db.with_profile(
+            db.DRAFT_LESSONS_COLLECTION, db.OperationProfiles.STRONG_READ
+        ).find_one(filters)
     except:
         return QueryResults(failure=True)
 
     if lesson is None:
         return QueryResults(failure=True, not_found=True)
 
-    return QueryResults(value=DraftLessons(**lesson), success=True)
+    return QueryResults(value=DraftLessons.from_db(lesson), success=True)
 
 
 def get_draft_lesson_by_creator(creator: Union[ObjectId, str]):
@@ -35,7 +37,8 @@ def get_draft_lessons_ids_by_creators(
             },
             **kwargs,
         )
-    except:
+    except Exception as e:
+        db.raise_if_transient(e)
         return QueryResults(failure=True)
 
     return QueryResults(value=ids, success=True)
@@ -3,8 +3,8 @@ from ...models import (
     Resources,
     Actions,
     PublishedLessons,
-    LessonsReviews,
     RatingNames,
+    RatingStats,
     LessonEdit,
     Users,
     Accounts,
@@ -22,6 +22,13 @@ from typing import Optional
 from helpers.secuirty import permissions
 from db import aggregations
 
+# the list is sorted by the creation date, _id makes the order unique for the cursor pagination
+_PUBLISHED_LESSONS_SORT = {
+    PublishedLessons.Fields.created_at: -1,
+    PublishedLessons.Fields.id: -1,
+}
+
+
 # TODO handle populate
 def _get_published_lesson(
     filters: dict[str, Any],
@@ -46,7 +53,7 @@ def _get_published_lesson(
     if not lesson:
         return QueryResults(not_found=True)
 
-    return QueryResults(success=True, value=PublishedLessons(**lesson))
+    return QueryResults(success=True, value=PublishedLessons.from_db(lesson))
 
 
 def validate_published_lessons_exists(
@@ -69,24 +76,27 @@ def validate_published_lessons_exists(
     return QueryResults(success=True)
 
 
-def get_published_lessons_for_external(
+def _published_lessons_for_external_pipeline(
     request: RequestWithPaginationAndFullUser,
     category: Optional[ObjectId] = None,
-) -> QueryResults[tuple[list[dict], int]]:
+) -> tuple[list[dict], list[dict]]:
+    """
+    returns the pipeline that selects the matching lessons and the pipeline that runs on the page
+    """
 
     default_filters = permissions.build_filters(
         request,
         Resources.PUBLISHED_LESSONS,
         Actions.READ_MANY,
     )
-    pipeline = [
-        aggregations.match_query(default_filters),
-        aggregations.sort(
-            {
-                PublishedLessons.Fields.created_at: -1,
-            }
-        ),
-    ]
+    pipeline = [aggregations.match_query(default_filters)]
+
+    if request.state.cursor is not None:
+        pipeline.append(
+            aggregations.keyset(_PUBLISHED_LESSONS_SORT, request.state.cursor)
+        )
+
+    pipeline.append(aggregations.sort(_PUBLISHED_LESSONS_SORT))
 
     filters = {}
 
@@ -129,90 +139,96 @@ def get_published_lessons_for_external(
     else:
         edit_filters = False
 
-    pipeline.extend(
-        [
-            aggregations.skip(request.state.offset),
-            aggregations.limit(request.state.limit),
-            aggregations.lookup(
-                from_=LessonsReviews,
-                local_field=PublishedLessons.Fields.id,
-                foreign_field=LessonsReviews.Fields.lesson,
-                as_="reviews",
-                pipeline=[
-                    aggregations.unwind(LessonsReviews.Fields.ratings),
-                    aggregations.match_query(
-                        {
-                            f"{LessonsReviews.Fields.ratings}.name": RatingNames.RECOMMENDATION.value
-                        }
-                    ),
-                    aggregations.group(
-                        {
-                            "_id": "$ratings.name",
-                            "average": {"$avg": "$ratings.rating"},
-                            "count": {"$sum": 1},
-                        }
-                    ),
-                ],
-            ),
-            aggregations.unwind("reviews", True),
-            aggregations.lookup(
-                from_=Users,
-                local_field=PublishedLessons.Fields.creator,
-                foreign_field=Users.Fields.id,
-                as_=PublishedLessons.Fields.creator,
-                pipeline=aggregations.lookup_user_account(),
-            ),
-            aggregations.unwind(PublishedLessons.Fields.creator, True),
-            aggregations.project(
-                [
-                    PublishedLessons.Fields.title_,
-                    PublishedLessons.Fields.description,
-                    PublishedLessons.Fields.updated_at,
-                    PublishedLessons.Fields.viewed,
-                    PublishedLessons.Fields.thumbnail,
-                    PublishedLessons.Fields.created_at,
-                    PublishedLessons.Fields.description_file,
-                    PublishedLessons.Fields.categories,
-                    PublishedLessons.Fields.credit,
-                    "reviews",
-                ],
-                can_edit=edit_filters,
-                creator={
-                    "full_name": f"${PublishedLessons.Fields.creator}.{Users.Fields.full_name}",
-                    # maybe add institution city
-                    "institution": f"${PublishedLessons.Fields.creator}.{Users.Fields.account}.{Accounts.Fields.institution_name}",
-                    "email": f"${PublishedLessons.Fields.creator}.{Users.Fields.email}",
-                },
-            ),
-        ]
+    # the recommendation stats are kept on the lesson, see `update_published_lesson_review_stats`
+    recommendation = (
+        f"${PublishedLessons.Fields.review_stats}.{RatingNames.RECOMMENDATION.value}"
     )
 
-    try:
-        cursor = db.PUBLISHED_LESSONS_COLLECTION.aggregate(pipeline)
-    except Exception as e:
-        print(e)
-        return QueryResults(failure=True)
+    page_pipeline = [
+        aggregations.lookup(
+            from_=Users,
+            local_field=PublishedLessons.Fields.creator,
+            foreign_field=Users.Fields.id,
+            as_=PublishedLessons.Fields.creator,
+            pipeline=aggregations.lookup_user_account(),
+        ),
+        aggregations.unwind(PublishedLessons.Fields.creator, True),
+        aggregations.project(
+            [
+                PublishedLessons.Fields.title_,
+                PublishedLessons.Fields.description,
+                PublishedLessons.Fields.updated_at,
+                PublishedLessons.Fields.viewed,
+                PublishedLessons.Fields.thumbnail,
+                PublishedLessons.Fields.created_at,
+                PublishedLessons.Fields.description_file,
+                PublishedLessons.Fields.categories,
+                PublishedLessons.Fields.credit,
+            ],
+            can_edit=edit_filters,
+            reviews={
+                "$cond": [
+                    {"$gt": [f"{recommendation}.{RatingStats.Fields.count}", 0]},
+                    {
+                        "_id": RatingNames.RECOMMENDATION.value,
+                        "average": f"{recommendation}.{RatingStats.Fields.average}",
+                        "count": f"{recommendation}.{RatingStats.Fields.count}",
+                    },
+                    "$$REMOVE",
+                ]
+            },
+            creator={
+                "full_name": f"${PublishedLessons.Fields.creator}.{Users.Fields.full_name}",
+                # maybe add institution city
+                "institution": f"${PublishedLessons.Fields.creator}.{Users.Fields.account}.{Accounts.Fields.institution_name}",
+                "email": f"${PublishedLessons.Fields.creator}.{Users.Fields.email}",
+            },
+        ),
+    ]
 
-    docs = list(cursor)
+    return pipeline, page_pipeline
 
-    count = len(docs)
 
-    if count < request.state.limit:
-        count += request.state.offset
-        return QueryResults(value=(docs, count), success=True)
+def get_published_lessons_for_external(
+    request: RequestWithPaginationAndFullUser,
+    category: Optional[ObjectId] = None,
+) -> QueryResults[tuple[list[dict], int, Optional[str]]]:
+    """
+    returns the page, the count and the cursor of the next page
+    in cursor mode the lessons are not counted, the count only tells if there is a next page
+    """
 
     try:
-        count = db.PUBLISHED_LESSONS_COLLECTION.count_documents(
-            {
-                **filters,
-                # default filters are more important so they are last
-                **default_filters,
-            }
+        pipeline, page_pipeline = _published_lessons_for_external_pipeline(
+            request, category
         )
-    except:
+    except ValueError:
+        # the cursor doesn't match the sort
+        return QueryResults(not_valid=True)
+
+    cursor_mode = request.state.cursor is not None
+    offset = 0 if cursor_mode else request.state.offset
+
+    try:
+        docs, count = aggregations.aggregate_paginated(
+            db.with_profile(
+                db.PUBLISHED_LESSONS_COLLECTION, db.OperationProfiles.CATALOGUE_READ
+            ),
+            pipeline,
+            offset,
+            request.state.limit,
+            page_pipeline,
+            aggregations.CountModes.SKIP
+            if cursor_mode
+            else aggregations.CountModes.EXACT,
+        )
+    except Exception as e:
+        print(e)
         return QueryResults(failure=True)
 
-    return QueryResults(success=True, value=(docs, count))
+    next_cursor = aggregations.next_cursor(docs, count, offset, _PUBLISHED_LESSONS_SORT)
+
+    return QueryResults(success=True, value=(docs, count, next_cursor))
 
 
 def get_published_lesson_by_id(
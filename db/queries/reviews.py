@@ -40,7 +40,9 @@ def get_lessons_review_for_external(
     ]
 
     try:
-        cursor = db.LESSONS_REVIEWS_COLLECTION.aggregate(pipeline)
+        cursor = db.with_profile(
+            db.LESSONS_REVIEWS_COLLECTION, db.OperationProfiles.CATALOGUE_READ
+        ).aggregate(pipeline)
     except Exception as e:
         print(e)
         return QueryResults(failure=True)
@@ -1,4 +1,5 @@
 from typing import Any, Union, Optional
+from pymongo.client_session import ClientSession
 from ..models import (
     Roles,
     RolesInternalNames,
@@ -9,10 +10,9 @@ from ..models import (
 )
 from helpers.types import QueryResults, RequestWithFullUser
 import db
-from functools import cache
 from bson import ObjectId
 from helpers.secuirty import permissions
-from db import aggregations
+from db import aggregations, cache
 
 
 def _get_role(filters: dict[str, Any]) -> QueryResults[Roles]:
@@ -25,17 +25,12 @@ def _get_role(filters: dict[str, Any]) -> QueryResults[Roles]:
     if role is None:
         return QueryResults(not_found=True)
 
-    return QueryResults(value=Roles(**role), success=True)
-
-
-@cache
-def get_role_cache(internal_name: str) -> QueryResults[Roles]:
-    return _get_role({Roles.Fields.internal_name: internal_name})
+    return QueryResults(value=Roles.from_db(role), success=True)
 
 
 def get_guest_role(from_cache: bool = True):
     if from_cache:
-        return get_role_cache(RolesInternalNames.GUEST)
+        return cache.roles.get_role_by_internal_name(RolesInternalNames.GUEST)
 
     return _get_role({Roles.Fields.internal_name: RolesInternalNames.GUEST})
 
@@ -43,7 +38,9 @@ def get_guest_role(from_cache: bool = True):
 def get_account_manager_role(from_cache: bool = True):
 
     if from_cache:
-        return get_role_cache(RolesInternalNames.INSTATUTION_MANAGER)
+        return cache.roles.get_role_by_internal_name(
+            RolesInternalNames.INSTATUTION_MANAGER
+        )
 
     return _get_role(
         {Roles.Fields.internal_name: RolesInternalNames.INSTATUTION_MANAGER}
@@ -53,7 +50,7 @@ def get_account_manager_role(from_cache: bool = True):
 def get_admin_role(from_cache: bool = True):
 
     if from_cache:
-        return get_role_cache(RolesInternalNames.ADMIN)
+        return cache.roles.get_role_by_internal_name(RolesInternalNames.ADMIN)
 
     return _get_role({Roles.Fields.internal_name: RolesInternalNames.ADMIN})
 
@@ -63,25 +60,28 @@ def get_role_by_id(
     request: Optional[RequestWithFullUser] = None,
 ):
 
+    if request is None:
+        return cache.roles.get_role_by_id(role_id)
+
     filters = {Roles.Fields.id: ObjectId(role_id)}
 
-    if request is not None:
-        filters.update(
-            permissions.build_filters(
-                request,
-                Resources.ROLES,
-                Actions.READ,
-            )
+    # the permission filters of the user run in the query
+    filters.update(
+        permissions.build_filters(
+            request,
+            Resources.ROLES,
+            Actions.READ,
         )
+    )
 
     return _get_role(filters)
 
 
-def get_roles_for_external(
+def _roles_for_external_filters(
     request: RequestWithFullUser,
-    accountable: bool = False,
-    not_accountable: bool = False,
-) -> QueryResults[list[dict]]:
+    accountable: bool,
+    not_accountable: bool,
+) -> dict[str, Any]:
 
     filters = permissions.build_filters(
         request,
@@ -95,9 +95,44 @@ def get_roles_for_external(
     if not_accountable:
         filters.update({Roles.Fields.require_account: False})
 
+    return filters
+
+
+def get_roles_stamp(
+    request: RequestWithFullUser,
+    accountable: bool = False,
+    not_accountable: bool = False,
+    session: Optional[ClientSession] = None,
+) -> QueryResults[str]:
+    """
+    stamp of the roles the user can read, for the etag of `get_roles_for_external`
+    """
+    filters = _roles_for_external_filters(request, accountable, not_accountable)
+
+    try:
+        stamp = aggregations.collection_stamp(
+            db.ROLES_COLLECTION, filters, session=session
+        )
+    except Exception as e:
+        print(e)
+        return QueryResults(failure=True)
+
+    # the filters are part of the stamp, users with other filters see other roles
+    return QueryResults(value=f"{stamp}:{filters!r}", success=True)
+
+
+def get_roles_for_external(
+    request: RequestWithFullUser,
+    accountable: bool = False,
+    not_accountable: bool = False,
+    session: Optional[ClientSession] = None,
+) -> QueryResults[list[dict]]:
+
+    filters = _roles_for_external_filters(request, accountable, not_accountable)
+
     try:
         roles = db.ROLES_COLLECTION.find(
-            filters, {Roles.Fields.id: 1, Roles.Fields.name_: 1}
+            filters, {Roles.Fields.id: 1, Roles.Fields.name_: 1}, session=session
         )
     except:
         return QueryResults(failure=True)
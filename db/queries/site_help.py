@@ -1,4 +1,5 @@
 from typing import Union, Any, Optional
+from pymongo.client_session import ClientSession
 from ..models import SiteHelp, SiteHelpCategories
 from bson import ObjectId
 from helpers.types import QueryResults, RequestWithPagination
@@ -17,17 +18,43 @@ def _get_site_help(filters: dict[str, Any]) -> QueryResults[SiteHelp]:
     if site_help is None:
         return QueryResults(not_found=True)
 
-    return QueryResults(value=SiteHelp(**site_help), success=True)
+    return QueryResults(value=SiteHelp.from_db(site_help), success=True)
 
 
 def get_site_help_by_id(site_help_id: Union[ObjectId, str]):
     return _get_site_help({SiteHelp.Fields.id: ObjectId(site_help_id)})
 
 
+def get_site_helps_stamp(
+    session: Optional[ClientSession] = None,
+) -> QueryResults[str]:
+    """
+    stamp of the site helps and their categories (the list view shows the categories names),
+    for the etag of `get_site_helps_for_external`
+    """
+    try:
+        stamps = [
+            aggregations.collection_stamp(
+                db.with_profile(collection, db.OperationProfiles.CATALOGUE_READ),
+                session=session,
+            )
+            for collection in (
+                db.SITE_HELP_COLLECTION,
+                db.SITE_HELP_CATEGORIES_COLLECTION,
+            )
+        ]
+    except Exception as e:
+        print(e)
+        return QueryResults(failure=True)
+
+    return QueryResults(value="/".join(stamps), success=True)
+
+
 def get_site_helps_for_external(
     category_id: Optional[Union[ObjectId, str]],
     list_view: bool,
     request: RequestWithPagination,
+    session: Optional[ClientSession] = None,
 ) -> QueryResults[tuple[list[dict], int]]:
 
     query = {}
@@ -38,12 +65,12 @@ def get_site_helps_for_external(
     pipeline = [
         aggregations.match_query(query),
         aggregations.sort({SiteHelp.Fields.order: 1}),
-        aggregations.skip(request.state.offset),
-        aggregations.limit(request.state.limit),
     ]
 
+    page_pipeline = []
+
     if list_view:
-        pipeline.extend(
+        page_pipeline.extend(
             [
                 aggregations.lookup(
                     from_=SiteHelpCategories,
@@ -58,7 +85,7 @@ def get_site_helps_for_external(
             ]
         )
 
-    pipeline.append(
+    page_pipeline.append(
         aggregations.project(
             [
                 SiteHelp.Fields.title_,
@@ -71,22 +98,18 @@ def get_site_helps_for_external(
     )
 
     try:
-        cursor = db.SITE_HELP_COLLECTION.aggregate(pipeline)
-
+        docs, count = aggregations.aggregate_paginated(
+            db.with_profile(
+                db.SITE_HELP_COLLECTION, db.OperationProfiles.CATALOGUE_READ
+            ),
+            pipeline,
+            request.state.offset,
+            request.state.limit,
+            page_pipeline,
+            session=session,
+        )
     except Exception as e:
         print(e)
         return QueryResults(failure=True)
 
-    docs = list(cursor)
-
-    count = len(docs)
-
-    if count < request.state.limit:
-        count += request.state.offset
-        return QueryResults(value=(docs, count), success=True)
-    try:
-        count = db.SITE_HELP_COLLECTION.count_documents(query)
-    except:
-        return QueryResults(failure=True)
-
     return QueryResults(value=(docs, count), success=True)
@@ -1,4 +1,5 @@
-from typing import Union, Any
+from typing import Union, Any, Optional
+from pymongo.client_session import ClientSession
 from ..models import SiteHelpCategories, Resources, Actions, PublishedLessons
 from bson import ObjectId
 from helpers.types import QueryResults, RequestWithPagination
@@ -17,27 +18,53 @@ def _get_help_category(filters: dict[str, Any]) -> QueryResults[SiteHelpCategori
     if category is None:
         return QueryResults(not_found=True)
 
-    return QueryResults(value=SiteHelpCategories(**category), success=True)
+    return QueryResults(value=SiteHelpCategories.from_db(category), success=True)
 
 
 def get_site_help_category_by_id(category_id: Union[ObjectId, str]):
     return _get_help_category({SiteHelpCategories.Fields.id: ObjectId(category_id)})
 
 
+def get_site_help_categories_stamp(
+    session: Optional[ClientSession] = None,
+) -> QueryResults[str]:
+    """
+    stamp of the site help categories, for the etag of `get_site_help_categories_for_external`
+    """
+    try:
+        stamp = aggregations.collection_stamp(
+            db.with_profile(
+                db.SITE_HELP_CATEGORIES_COLLECTION, db.OperationProfiles.CATALOGUE_READ
+            ),
+            session=session,
+        )
+    except Exception as e:
+        print(e)
+        return QueryResults(failure=True)
+
+    return QueryResults(value=stamp, success=True)
+
+
 def get_site_help_categories_for_external(
     request: RequestWithPagination,
+    session: Optional[ClientSession] = None,
 ) -> QueryResults[tuple[list[dict], int]]:
 
     query = {}
 
+    collection = db.with_profile(
+        db.SITE_HELP_CATEGORIES_COLLECTION, db.OperationProfiles.CATALOGUE_READ
+    )
+
     try:
         docs = list(
-            db.SITE_HELP_CATEGORIES_COLLECTION.find(
+            collection.find(
                 query,
                 projection={
                     SiteHelpCategories.Fields.name_: 1,
                     SiteHelpCategories.Fields.description: 1,
                 },
+                session=session,
             )
             .skip(request.state.offset)
             .limit(request.state.limit)
@@ -52,7 +79,7 @@ def get_site_help_categories_for_external(
         return QueryResults(value=(docs, count), success=True)
 
     try:
-        count = db.SITE_HELP_CATEGORIES_COLLECTION.count_documents(query)
+        count = collection.count_documents(query, session=session)
     except:
         return QueryResults(failure=True)
 
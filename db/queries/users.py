@@ -17,7 +17,7 @@ from helpers.types import (
     RequestWithFullUser,
 )
 import db
-from db import aggregations
+from db import aggregations, cache
 from helpers.secuirty import permissions
 from .roles import get_account_manager_role, get_admin_role
 
@@ -25,10 +25,13 @@ from .roles import get_account_manager_role, get_admin_role
 def _get_user(
     filters: dict[str, Any], populate: Optional[UserPopulateOptions] = None, **kwargs
 ) -> QueryResults[Users]:
+    # login and permissions checks, must see the latest writes
+    collection = db.with_profile(db.USER_COLLECTION, db.OperationProfiles.STRONG_READ)
+
     try:
 
         if populate is None:
-            user = db.USER_COLLECTION.find_one(filters, **kwargs)
+            user = collection.find_one(filters, **kwargs)
         else:
 
             pipeline = [
@@ -42,45 +45,48 @@ def _get_user(
             if populate.account:
                 pipeline.extend(aggregations.lookup_user_account())
 
-            user = db.USER_COLLECTION.aggregate(pipeline)
+            user = collection.aggregate(pipeline)
 
             user = next(user, None)
     except Exception as e:
+        db.raise_if_transient(e)
         print(e)
         return QueryResults(failure=True)
 
     if user is None:
         return QueryResults(not_found=True, failure=True)
 
-    return QueryResults(value=Users(**user), success=True)
+    return QueryResults(value=Users.from_db(user), success=True)
+
+
+def _user_for_get_me_pipeline(user_id: Union[str, ObjectId]) -> list[dict]:
+    return [
+        aggregations.match_query(
+            {
+                Users.Fields.id: ObjectId(user_id),
+            }
+        ),
+        aggregations.limit(1),
+        *aggregations.lookup_user_role(),
+        # aggregations.lookup_user_account(),
+        *aggregations.lookup_user_draft_lesson(),
+        aggregations.project(
+            [
+                Users.Fields.full_name,
+                Users.Fields.email,
+                f"{Users.Fields.role}.{Roles.Fields.name_}",
+                f"{Users.Fields.role}.{Roles.Fields.id}",
+                f"{Users.Fields.role}.{Roles.Fields.internal_name}",
+            ],
+            draft=f"$draft.{DraftLessons.Fields.id}",
+        ),
+    ]
 
 
 def get_user_for_get_me(user_id: Union[str, ObjectId]) -> QueryResults[dict]:
 
     try:
-        user = db.USER_COLLECTION.aggregate(
-            [
-                aggregations.match_query(
-                    {
-                        Users.Fields.id: ObjectId(user_id),
-                    }
-                ),
-                aggregations.limit(1),
-                *aggregations.lookup_user_role(),
-                # aggregations.lookup_user_account(),
-                *aggregations.lookup_user_draft_lesson(),
-                aggregations.project(
-                    [
-                        Users.Fields.full_name,
-                        Users.Fields.email,
-                        f"{Users.Fields.role}.{Roles.Fields.name_}",
-                        f"{Users.Fields.role}.{Roles.Fields.id}",
-                        f"{Users.Fields.role}.{Roles.Fields.internal_name}",
-                    ],
-                    draft=f"$draft.{DraftLessons.Fields.id}",
-                ),
-            ]
-        )
+        user = db.USER_COLLECTION.aggregate(_user_for_get_me_pipeline(user_id))
 
         user = next(user, None)
 
@@ -117,6 +123,22 @@ def get_user_by_id(
     return _get_user(filters, populate)
 
 
+def get_user_for_permissions(user_id: Union[str, ObjectId]) -> QueryResults[Users]:
+    """
+    the user with its role and account populated, the user (with its account) is served from
+    the users cache when possible, and the role from the roles cache
+    """
+    user_res = cache.users.get_user_or_fetch(
+        user_id,
+        lambda: get_user_by_id(user_id, populate=UserPopulateOptions(account=True)),
+    )
+
+    if user_res.failure:
+        return user_res
+
+    return cache.roles.populate_user_role(user_res.value)
+
+
 def get_users_for_external(
     request: RequestWithPaginationAndFullUser,
     role: Optional[Union[str, ObjectId]] = None,
@@ -140,48 +162,54 @@ def get_users_for_external(
     offset = request.state.page * request.state.limit
 
     try:
-        docs = db.USER_COLLECTION.aggregate(
+        docs, count = aggregations.aggregate_paginated(
+            db.USER_COLLECTION,
             [
                 aggregations.match_query(default_filters),
                 aggregations.match_query(provided_filters),
-                aggregations.skip(offset),
-                aggregations.limit(request.state.limit),
-                *aggregations.lookup_user_role(),
+            ],
+            offset,
+            request.state.limit,
+            [
                 aggregations.project(
                     [
                         Users.Fields.full_name,
                         Users.Fields.email,
                         Users.Fields.phone_number,
-                        f"{Users.Fields.role}.{Roles.Fields.name_}",
-                        f"{Users.Fields.role}.{Roles.Fields.id}",
-                        f"{Users.Fields.role}.{Roles.Fields.internal_name}",
+                        Users.Fields.role,
                     ]
                 ),
-            ]
+            ],
         )
-        docs = list(docs)
     except Exception as e:
         print(e)
         return QueryResults(failure=True)
 
-    count = len(docs)
-
-    if count < request.state.limit:
-        count += offset
-        return QueryResults(value=(docs, count), success=True)
+    # the roles come from the roles cache instead of a lookup per user
+    roles_res = cache.roles.get_roles_by_ids(
+        [doc[Users.Fields.role] for doc in docs if Users.Fields.role in doc]
+    )
 
-    try:
-        count = db.USER_COLLECTION.count_documents(
-            {
-                **provided_filters,
-                **default_filters,
-            }
-        )
-    except Exception as e:
-        print(e)
+    if roles_res.failure:
         return QueryResults(failure=True)
 
-    return QueryResults(value=(docs, count), success=True)
+    users = []
+
+    for doc in docs:
+        role = roles_res.value.get(str(doc.get(Users.Fields.role)))
+
+        # like the lookup did, a user without a role is left out
+        if role is None:
+            continue
+
+        doc[Users.Fields.role] = {
+            Roles.Fields.id: role.id,
+            Roles.Fields.name_: role.name,
+            Roles.Fields.internal_name: role.internal_name,
+        }
+        users.append(doc)
+
+    return QueryResults(value=(users, count), success=True)
 
 
 def get_user_by_id_for_external(
@@ -338,6 +366,7 @@ def get_users_ids_by_account_id(
             **kwargs,
         )
     except Exception as e:
+        db.raise_if_transient(e)
         print(e)
         return QueryResults(failure=True)
 
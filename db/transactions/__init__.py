@@ -1,3 +1,4 @@
+from .common import defer_after_commit
 from .users import fully_delete_user
 from .accounts import fully_delete_account
 from .lessons import (
@@ -5,6 +6,7 @@ from .lessons import (
     duplicate_published_lesson,
     restore_archived_lesson,
     delete_archived_lesson,
+    delete_archived_lessons,
     delete_edit_data,
     remove_part_from_published_lesson,
     update_screen_in_published_lesson,
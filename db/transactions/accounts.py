@@ -3,7 +3,7 @@ from db import updates, queries
 from typing import Union
 from bson import ObjectId
 from services.gcp import GCP_MANAGER
-from .common import Transaction, TransactionResult, ClientSession
+from .common import Transaction, TransactionResult, ClientSession, defer_after_commit
 
 
 def fully_delete_account(
@@ -140,24 +140,15 @@ def fully_delete_account(
                         message="Failed to change archived by of archived lessons",
                     )
 
-        try:
-            GCP_MANAGER.delete_account_folder(str(account_id))
-        except Exception as e:
-            print(e)
-            return TransactionResult(
-                success=False,
-                message="Failed to delete account storage folder",
-            )
+        defer_after_commit(GCP_MANAGER.delete_account_folder, str(account_id))
 
         for draft in draft_ids:
-            try:
-                GCP_MANAGER.delete_lesson(str(draft))
-            except:
-                # TODO log error with the draft id, to delete it later
-                pass
+            defer_after_commit(GCP_MANAGER.delete_lesson, str(draft))
 
         return TransactionResult(success=True)
 
     transaction = Transaction(func=the_tran, args=[account_id, request], kwargs={})
 
     transaction.start()
+
+    return transaction.result
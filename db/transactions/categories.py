@@ -26,7 +26,8 @@ def fully_delete_category(
             res = db.CATEGORIES_COLLECTION.delete_one(
                 {Categories.Fields.id: ObjectId(category_id)}, session=session
             )
-        except:
+        except Exception as e:
+            db.raise_if_transient(e)
             return TransactionResult(success=False, message="Failed to delete category")
 
         if not res.deleted_count == 1:
@@ -38,8 +39,10 @@ def fully_delete_category(
             res = db.PUBLISHED_LESSONS_COLLECTION.update_many(
                 {PublishedLessons.Fields.categories: {"$in": [category_id]}},
                 {"$pull": {PublishedLessons.Fields.categories: category_id}},
+                session=session,
             )
-        except:
+        except Exception as e:
+            db.raise_if_transient(e)
             return TransactionResult(
                 success=False, message="Failed to update published lessons"
             )
@@ -48,8 +51,10 @@ def fully_delete_category(
             res = db.DRAFT_LESSONS_COLLECTION.update_many(
                 {DraftLessons.Fields.categories: {"$in": [category_id]}},
                 {"$pull": {DraftLessons.Fields.categories: category_id}},
+                session=session,
             )
-        except:
+        except Exception as e:
+            db.raise_if_transient(e)
             return TransactionResult(
                 success=False, message="Failed to update draft lessons"
             )
@@ -58,8 +63,10 @@ def fully_delete_category(
             res = db.ARCHIVE_LESSONS_COLLECTION.update_many(
                 {ArchiveLessons.Fields.categories: {"$in": [category_id]}},
                 {"$pull": {ArchiveLessons.Fields.categories: category_id}},
+                session=session,
             )
-        except:
+        except Exception as e:
+            db.raise_if_transient(e)
             return TransactionResult(
                 success=False, message="Failed to update archive lessons"
             )
@@ -69,3 +76,5 @@ def fully_delete_category(
     transaction = Transaction(func=the_tran, args=[category_id, request], kwargs={})
 
     transaction.start()
+
+    return transaction.result
@@ -1,10 +1,29 @@
+"""
+Transactions runner.
+
+`Transaction.start` runs the function in `session.with_transaction`, so a `TransientTransactionError`
+reruns the whole function and an `UnknownTransactionCommitResult` retries the commit,
+up to `MAX_TRANSACTION_ATTEMPTS` runs of the function.
+Only the errors the function lets through are retried, a failed `TransactionResult` aborts without a retry.
+The functions (and the db helpers they call) turn their errors into failed results, so their `except` blocks
+start with `db.raise_if_transient` to let the transient errors through.
+
+Work that can't be rolled back (storage deletes, copies, moves) is registered with `defer_after_commit`
+from inside the function, it runs once after the commit succeeded and is dropped if the transaction
+is aborted or retried. That keeps the transactions short, their locks are not held while the storage
+works and large lessons don't hit the transaction lifetime limit.
+"""
+from contextvars import ContextVar
 from typing import Callable, Optional, Any, TypeVar, Generic
 from pydantic import BaseModel, Field
 from pymongo.client_session import ClientSession
 from db import mongo_client
+from db.profiles import transaction_options
 
 T = TypeVar("T")
 
+MAX_TRANSACTION_ATTEMPTS = 3
+
 
 class TransactionResult(BaseModel, Generic[T]):
     success: bool = Field(..., description="Whether the transaction was successful")
@@ -14,6 +33,55 @@ class TransactionResult(BaseModel, Generic[T]):
     value: Optional[T] = Field(None, description="The value of the transaction")
 
 
+class TransactionAborted(Exception):
+    """
+    raised inside the transaction to abort it with a failed result, without retrying
+    """
+
+    def __init__(self, result: TransactionResult) -> None:
+        super().__init__(result.message)
+        self.result = result
+
+
+class TooManyAttempts(Exception):
+    pass
+
+
+# the callbacks of the running transaction, (func, args, kwargs)
+_deferred: ContextVar[Optional[list]] = ContextVar("transaction_deferred", default=None)
+
+
+def defer_after_commit(func: Callable, *args, **kwargs):
+    """
+    run `func(*args, **kwargs)` after the running transaction commits
+    outside of a transaction it runs right away
+    """
+    deferred = _deferred.get()
+
+    if deferred is None:
+        func(*args, **kwargs)
+    else:
+        deferred.append((func, args, kwargs))
+
+
+def run_deferred(deferred: list) -> list[Exception]:
+    """
+    run the callbacks in order, a failing callback doesn't stop the next ones
+    returns the errors
+    """
+    errors = []
+
+    for func, args, kwargs in deferred:
+        try:
+            func(*args, **kwargs)
+        except Exception as e:
+            # with the arguments, e.g the lesson whose files are left to delete
+            print(f"deferred {getattr(func, '__name__', func)}{args} failed: {e}")
+            errors.append(e)
+
+    return errors
+
+
 class Transaction(BaseModel):
     func: Callable[[ClientSession, Any], TransactionResult] = Field(
         ..., description="The function to execute"
@@ -22,14 +90,52 @@ class Transaction(BaseModel):
     kwargs: dict = Field(..., description="The function keyword arguments")
     success: bool = Field(False, description="Whether the transaction was successful")
     result: Optional[TransactionResult] = Field(None)
+    attempts: int = Field(0, description="How many times the function ran")
+    deferred_errors: list = Field(
+        [], description="The errors of the callbacks that ran after the commit"
+    )
+
+    def _run(self, session: ClientSession, deferred: list) -> TransactionResult:
+        self.attempts += 1
+
+        if self.attempts > MAX_TRANSACTION_ATTEMPTS:
+            raise TooManyAttempts(
+                f"transaction failed {MAX_TRANSACTION_ATTEMPTS} times"
+            )
+
+        # a retry starts over, the callbacks of the aborted attempt are dropped
+        deferred.clear()
+
+        res = self.func(session, *self.args, **self.kwargs)
+
+        if not res.success:
+            raise TransactionAborted(res)
+
+        return res
 
     def start(self, session_kwargs: dict = {}, transaction_kwargs: dict = {}):
-        with mongo_client.start_session(**session_kwargs) as session:
-            with session.start_transaction(**transaction_kwargs):
-                res = self.func(session, *self.args, **self.kwargs)
+        # the transactional_write profile, unless the caller overrides its options
+        transaction_kwargs = {**transaction_options(), **transaction_kwargs}
+
+        deferred = []
+        token = _deferred.set(deferred)
+
+        try:
+            with mongo_client.start_session(**session_kwargs) as session:
+                res = session.with_transaction(
+                    lambda session: self._run(session, deferred), **transaction_kwargs
+                )
+        except TransactionAborted as e:
+            # TODO log error
+            res = e.result
+        except Exception as e:
+            print(e)
+            res = TransactionResult(success=False, message="Transaction failed")
+        finally:
+            _deferred.reset(token)
 
-                if not res.success:
-                    session.abort_transaction()
-                    # TODO log error
+        if res.success:
+            self.deferred_errors = run_deferred(deferred)
 
-            self.result = res
+        self.success = res.success
+        self.result = res
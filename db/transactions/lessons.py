@@ -11,16 +11,17 @@ from db.models import (
     LessonEdit,
     LessonPart,
     LessonScreen,
+    add_update_at_to_update,
 )
 from typing import Union
 from bson import ObjectId
 from services.gcp import GCP_MANAGER
-from .common import Transaction, TransactionResult, ClientSession
+from .common import Transaction, TransactionResult, ClientSession, defer_after_commit
 import db
+from db import cache
 from helpers.secuirty import permissions
 from pymongo.errors import DuplicateKeyError
 from datetime import datetime
-from google.cloud.exceptions import NotFound
 from db.inserts.lessons import _insert_new_publish_lesson
 
 
@@ -57,7 +58,8 @@ def archive_published_lesson(
             lesson = db.PUBLISHED_LESSONS_COLLECTION.find_one_and_delete(
                 filters, session=session
             )
-        except:
+        except Exception as e:
+            db.raise_if_transient(e)
             return TransactionResult(success=False, message="Failed to delete lesson")
 
         if not lesson:
@@ -69,7 +71,8 @@ def archive_published_lesson(
             db.ARCHIVE_LESSONS_COLLECTION.insert_one(
                 lesson.dict(to_db=True), session=session
             )
-        except:
+        except Exception as e:
+            db.raise_if_transient(e)
             return TransactionResult(success=False, message="Failed to archive lesson")
 
         return TransactionResult(success=True)
@@ -101,6 +104,7 @@ def duplicate_published_lesson(
                     PublishedLessons.Fields.updated_at,
                     PublishedLessons.Fields.mid_edit,
                     PublishedLessons.Fields.edit_data,
+                    PublishedLessons.Fields.review_stats,
                 }
             ),
         )
@@ -116,6 +120,7 @@ def duplicate_published_lesson(
                 message="User already has a draft lesson",
             )
         except Exception as e:
+            db.raise_if_transient(e)
             print("Failed to save lesson into draft")
             print(e)
             return TransactionResult(
@@ -159,10 +164,11 @@ def duplicate_published_lesson(
             try:
                 res = db.DRAFT_LESSONS_COLLECTION.update_one(
                     {DraftLessons.Fields.id: ObjectId(new_lesson.id)},
-                    {"$set": url_update},
+                    add_update_at_to_update({"$set": url_update}),
                     session=session,
                 )
             except Exception as e:
+                db.raise_if_transient(e)
                 print("Failed to update lesson urls")
                 print(e)
                 return TransactionResult(
@@ -176,21 +182,35 @@ def duplicate_published_lesson(
                     success=False, message="Failed to update lesson urls"
                 )
 
-        try:
-            GCP_MANAGER.duplicate_lesson(lesson_to_dup_id, new_lesson_id)
-        except Exception as e:
-            print("Failed to duplicate lesson in GCP")
-            print(e)
-            return TransactionResult(
-                success=False, message="Failed to duplicate lesson"
-            )
+        defer_after_commit(
+            GCP_MANAGER.duplicate_lesson, lesson_to_dup_id, new_lesson_id
+        )
 
-        return TransactionResult(success=True, message="Lesson duplicated successfully")
+        return TransactionResult(
+            success=True,
+            message="Lesson duplicated successfully",
+            value=new_lesson_id,
+        )
 
     transaction = Transaction(func=the_tran, args=[request, lesson_to_dup], kwargs={})
 
     transaction.start()
 
+    if transaction.deferred_errors:
+        # the files were not duplicated, the draft can't be used
+        print("Failed to duplicate lesson in GCP")
+        new_lesson_id = transaction.result.value
+
+        try:
+            db.DRAFT_LESSONS_COLLECTION.delete_one(
+                {DraftLessons.Fields.id: ObjectId(new_lesson_id)}
+            )
+            GCP_MANAGER.delete_lesson(new_lesson_id)
+        except Exception as e:
+            print(e)
+
+        return TransactionResult(success=False, message="Failed to duplicate lesson")
+
     return transaction.result
 
 
@@ -222,7 +242,8 @@ def restore_archived_lesson(
                 success=False,
                 message="Lesson already published",
             )
-        except:
+        except Exception as e:
+            db.raise_if_transient(e)
             return TransactionResult(
                 success=False, message="Failed to save lesson into published"
             )
@@ -231,7 +252,8 @@ def restore_archived_lesson(
             db.ARCHIVE_LESSONS_COLLECTION.delete_one(
                 {ArchiveLessons.Fields.id: lesson_to_restore.id}, session=session
             )
-        except:
+        except Exception as e:
+            db.raise_if_transient(e)
             return TransactionResult(
                 success=False, message="Failed to delete lesson from archive"
             )
@@ -307,16 +329,21 @@ def publish_draft_lesson(
                     },
                     session=session,
                 )
-            except:
+            except Exception as e:
+                db.raise_if_transient(e)
                 return TransactionResult(
                     success=False, message="Failed to update account"
                 )
 
+            # the account is embedded in the cached users
+            defer_after_commit(cache.users.invalidate_all)
+
         try:
             db.DRAFT_LESSONS_COLLECTION.delete_one(
                 {DraftLessons.Fields.id: draft_lesson.id}, session=session
             )
-        except:
+        except Exception as e:
+            db.raise_if_transient(e)
             return TransactionResult(
                 success=False, message="Failed to delete lesson from drafts"
             )
@@ -338,33 +365,36 @@ def delete_archived_lesson(lesson_id: Union[str, ObjectId]):
             lesson = db.ARCHIVE_LESSONS_COLLECTION.find_one_and_delete(
                 {ArchiveLessons.Fields.id: lesson_id}, session=session
             )
-        except:
+        except Exception as e:
+            db.raise_if_transient(e)
             return TransactionResult(success=False, message="Failed to delete lesson")
 
         if not lesson:
             return TransactionResult(success=False, message="Lesson not found")
 
-        try:
-            GCP_MANAGER.delete_lesson(str(lesson_id))
-        except:
-            return TransactionResult(success=False, message="Failed to delete lesson")
-
         try:
             db.USER_COLLECTION.update_many(
                 {Users.Fields.allowed_lessons: {"$in": [lesson_id]}},
                 {"$pull": {Users.Fields.allowed_lessons: lesson_id}},
+                session=session,
             )
-        except:
+        except Exception as e:
+            db.raise_if_transient(e)
             return TransactionResult(success=False, message="Failed to delete lesson")
 
         try:
             db.ACCOUNT_COLLECTION.update_many(
                 {Accounts.Fields.allowed_lessons: {"$in": [lesson_id]}},
                 {"$pull": {Accounts.Fields.allowed_lessons: lesson_id}},
+                session=session,
             )
-        except:
+        except Exception as e:
+            db.raise_if_transient(e)
             return TransactionResult(success=False, message="Failed to delete lesson")
 
+        defer_after_commit(GCP_MANAGER.delete_lesson, str(lesson_id))
+        defer_after_commit(cache.users.invalidate_all)
+
         return TransactionResult(success=True)
 
     transaction = Transaction(func=the_tran, args=[lesson_id], kwargs={})
@@ -374,6 +404,66 @@ def delete_archived_lesson(lesson_id: Union[str, ObjectId]):
     return transaction.result
 
 
+def delete_archived_lessons(lessons_ids: list[Union[str, ObjectId]]):
+    """
+    the batched `delete_archived_lesson`, one delete and one $pull per collection for all the lessons,
+    their files are deleted after the commit. the value is how many lessons were deleted
+    """
+
+    def the_tran(session: ClientSession, lessons_ids: list[Union[str, ObjectId]]):
+        lessons_ids = [ObjectId(lesson_id) for lesson_id in lessons_ids]
+
+        try:
+            # lessons restored since the ids were read are not archived anymore,
+            # their files must be kept
+            lessons_ids = db.ARCHIVE_LESSONS_COLLECTION.distinct(
+                ArchiveLessons.Fields.id,
+                {ArchiveLessons.Fields.id: {"$in": lessons_ids}},
+                session=session,
+            )
+        except Exception as e:
+            db.raise_if_transient(e)
+            print(e)
+            return TransactionResult(success=False, message="Failed to get lessons")
+
+        if not lessons_ids:
+            return TransactionResult(success=True, value=0)
+
+        try:
+            res = db.ARCHIVE_LESSONS_COLLECTION.delete_many(
+                {ArchiveLessons.Fields.id: {"$in": lessons_ids}}, session=session
+            )
+
+            db.USER_COLLECTION.update_many(
+                {Users.Fields.allowed_lessons: {"$in": lessons_ids}},
+                {"$pull": {Users.Fields.allowed_lessons: {"$in": lessons_ids}}},
+                session=session,
+            )
+
+            db.ACCOUNT_COLLECTION.update_many(
+                {Accounts.Fields.allowed_lessons: {"$in": lessons_ids}},
+                {"$pull": {Accounts.Fields.allowed_lessons: {"$in": lessons_ids}}},
+                session=session,
+            )
+        except Exception as e:
+            db.raise_if_transient(e)
+            print(e)
+            return TransactionResult(success=False, message="Failed to delete lessons")
+
+        defer_after_commit(
+            GCP_MANAGER.delete_lessons, [str(lesson_id) for lesson_id in lessons_ids]
+        )
+        defer_after_commit(cache.users.invalidate_all)
+
+        return TransactionResult(success=True, value=res.deleted_count)
+
+    transaction = Transaction(func=the_tran, args=[lessons_ids], kwargs={})
+
+    transaction.start()
+
+    return transaction.result
+
+
 def delete_edit_data(
     lesson_id: Union[str, ObjectId],
     request: RequestWithFullUser,
@@ -393,15 +483,18 @@ def delete_edit_data(
                         request.state.user.id
                     ),
                 },
-                {
-                    "$set": {
-                        DraftLessons.Fields.edit_data: None,
-                        DraftLessons.Fields.mid_edit: False,
+                add_update_at_to_update(
+                    {
+                        "$set": {
+                            DraftLessons.Fields.edit_data: None,
+                            DraftLessons.Fields.mid_edit: False,
+                        }
                     }
-                },
+                ),
                 session=session,
             )
-        except:
+        except Exception as e:
+            db.raise_if_transient(e)
             return TransactionResult(
                 success=False, message="Failed to delete edit data"
             )
@@ -410,14 +503,8 @@ def delete_edit_data(
             return TransactionResult(
                 success=False, message="Failed to delete edit data"
             )
-        try:
-            GCP_MANAGER.delete_lesson_edit_folder(str(lesson_id))
-        except NotFound:
-            pass
-        except:
-            return TransactionResult(
-                success=False, message="Failed to delete edit data"
-            )
+
+        defer_after_commit(GCP_MANAGER.delete_lesson_edit_folder, str(lesson_id))
 
         return TransactionResult(success=True)
 
@@ -450,16 +537,19 @@ def remove_part_from_published_lesson(
                     ),
                     f"{DraftLessons.Fields.edit_data}.{LessonEdit.Fields.parts}.{LessonPart.Fields.id}": part_id,
                 },
-                {
-                    "$pull": {
-                        f"{DraftLessons.Fields.edit_data}.{LessonEdit.Fields.parts}": {
-                            LessonPart.Fields.id: part_id
+                add_update_at_to_update(
+                    {
+                        "$pull": {
+                            f"{DraftLessons.Fields.edit_data}.{LessonEdit.Fields.parts}": {
+                                LessonPart.Fields.id: part_id
+                            }
                         }
                     }
-                },
+                ),
                 session=session,
             )
-        except:
+        except Exception as e:
+            db.raise_if_transient(e)
             return TransactionResult(
                 success=False, message="Failed to remove part from lesson"
             )
@@ -469,14 +559,9 @@ def remove_part_from_published_lesson(
                 success=False, message="Failed to remove part from lesson"
             )
 
-        try:
-            GCP_MANAGER.delete_lesson_part(str(lesson_id), part_id, edit=True)
-        except NotFound:
-            pass
-        except:
-            return TransactionResult(
-                success=False, message="Failed to remove part from lesson"
-            )
+        defer_after_commit(
+            GCP_MANAGER.delete_lesson_part, str(lesson_id), part_id, edit=True
+        )
 
         return TransactionResult(success=True)
 
@@ -517,10 +602,11 @@ def update_screen_in_published_lesson(
         try:
             res = db.PUBLISHED_LESSONS_COLLECTION.update_one(
                 filters,
-                update,
+                add_update_at_to_update(update),
                 session=session,
             )
-        except:
+        except Exception as e:
+            db.raise_if_transient(e)
             return TransactionResult(
                 success=False, message="Failed to update screen in lesson"
             )
@@ -529,16 +615,14 @@ def update_screen_in_published_lesson(
                 success=False, message="Failed to update screen in lesson"
             )
 
-        try:
-            GCP_MANAGER.delete_part_screen_old_media(
-                str(lesson_id), part_id, screen_index, screen.url, edit=True
-            )
-        except NotFound:
-            pass
-        except:
-            return TransactionResult(
-                success=False, message="Failed to update screen in lesson"
-            )
+        defer_after_commit(
+            GCP_MANAGER.delete_part_screen_old_media,
+            str(lesson_id),
+            part_id,
+            screen_index,
+            screen.url,
+            edit=True,
+        )
 
         return TransactionResult(success=True)
 
@@ -573,7 +657,8 @@ def save_published_lesson_edits(
                 },
                 session=session,
             )
-        except:
+        except Exception as e:
+            db.raise_if_transient(e)
             return TransactionResult(
                 success=False, message="Failed to save lesson edits"
             )
@@ -583,16 +668,13 @@ def save_published_lesson_edits(
                 success=False, message="Failed to save lesson edits"
             )
 
-        try:
-            # keep the order of the operations
-            GCP_MANAGER.delete_list_of_lessons_files(str(lesson.id), blobs_to_delete)
-            GCP_MANAGER.move_edit_files_to_publish_folder(str(lesson.id), blobs_to_move)
-        except NotFound:
-            pass
-        except:
-            return TransactionResult(
-                success=False, message="Failed to save lesson edits"
-            )
+        # keep the order of the operations
+        defer_after_commit(
+            GCP_MANAGER.delete_list_of_lessons_files, str(lesson.id), blobs_to_delete
+        )
+        defer_after_commit(
+            GCP_MANAGER.move_edit_files_to_publish_folder, str(lesson.id), blobs_to_move
+        )
 
         return TransactionResult(success=True)
 
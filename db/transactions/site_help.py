@@ -1,11 +1,11 @@
 from helpers.types import RequestWithFullUser
-from db.models import SiteHelp, SiteHelpCategories
+from db.models import SiteHelp, SiteHelpCategories, add_update_at_to_update
 from db import updates
 from db.inserts.site_help import _insert_new_site_help
 from typing import Union, Optional
 from bson import ObjectId
 from services.gcp import GCP_MANAGER
-from .common import Transaction, TransactionResult, ClientSession
+from .common import Transaction, TransactionResult, ClientSession, defer_after_commit
 import io, db
 from helpers.files import get_file_extension_from_mime_type
 from .. import updates
@@ -20,11 +20,32 @@ def add_new_site_help(
     description: str,
     request: RequestWithFullUser,
 ) -> Optional[TransactionResult[SiteHelp]]:
+    # the files are uploaded once before the transaction, a retry of the transaction
+    # would read the streams from their end and the staged uploads are moved on the first upload
+    site_help_id = ObjectId()
+
+    try:
+        file_type = get_file_extension_from_mime_type(background_image[1])
+
+        background_image_link = GCP_MANAGER.upload_site_help_background_image(
+            background_image[0], str(site_help_id), file_type, background_image[1]
+        )
+
+        pdf_link = None
+
+        if pdf:
+            pdf_link = GCP_MANAGER.upload_site_help_pdf(pdf[0], str(site_help_id))
+    except Exception as e:
+        print(e)
+        _delete_site_help_files(site_help_id)
+        return TransactionResult(
+            success=False,
+            message="Failed to upload site help files",
+        )
+
     def the_tran(
         session: ClientSession,
-        background_image: tuple[io.BytesIO, str],
         title: str,
-        pdf: Optional[tuple[io.BytesIO, str]],
         youtube_link: Optional[str],
         category: Union[str, ObjectId, SiteHelpCategories],
         description: str,
@@ -36,13 +57,17 @@ def add_new_site_help(
         try:
             order = db.SITE_HELP_COLLECTION.count_documents({})
         except Exception as e:
+            db.raise_if_transient(e)
             print(e)
             return TransactionResult(
                 success=False,
                 message="Failed to get site help count",
             )
         site_help = SiteHelp(
+            id=site_help_id,
+            background_image=background_image_link,
             title=title,
+            pdf=pdf_link,
             youtube_link=youtube_link,
             category=ObjectId(category),
             description=description,
@@ -58,64 +83,12 @@ def add_new_site_help(
                 message="Failed to insert new site help",
             )
 
-        site_help = insert_res.value
-
-        background_image_link = None
-
-        try:
-            file_type = get_file_extension_from_mime_type(background_image[1])
-
-            background_image_link = GCP_MANAGER.upload_site_help_background_image(
-                background_image[0], str(site_help.id), file_type, background_image[1]
-            )
-        except Exception as e:
-            print(e)
-            return TransactionResult(
-                success=False,
-                message="Failed to upload background image",
-            )
-
-        pdf_link = None
-
-        if pdf:
-            try:
-                file_type = get_file_extension_from_mime_type(pdf[1])
-
-                pdf_link = GCP_MANAGER.upload_site_help_pdf(
-                    pdf[0],
-                    str(site_help.id),
-                )
-            except Exception as e:
-                print(e)
-                return TransactionResult(
-                    success=False,
-                    message="Failed to upload pdf",
-                )
-
-        update_res = updates.update_site_help_by_id(
-            site_help,
-            pdf=pdf_link,
-            background_image=background_image_link,
-            session=session,
-            return_document=True,
-        )
-
-        if update_res.failure:
-            return TransactionResult(
-                success=False,
-                message="Failed to update site help",
-            )
-
-        site_help = update_res.value
-
-        return TransactionResult(success=True, value=site_help)
+        return TransactionResult(success=True, value=insert_res.value)
 
     transaction = Transaction(
         func=the_tran,
         args=[
-            background_image,
             title,
-            pdf,
             youtube_link,
             category,
             description,
@@ -126,9 +99,19 @@ def add_new_site_help(
 
     transaction.start()
 
+    if not transaction.success:
+        _delete_site_help_files(site_help_id)
+
     return transaction.result
 
 
+def _delete_site_help_files(site_help_id: ObjectId):
+    try:
+        GCP_MANAGER.delete_site_help_folder(str(site_help_id))
+    except Exception as e:
+        print(e)
+
+
 def delete_site_help_pdf_file(
     site_help_id: Union[str, ObjectId],
 ) -> Optional[TransactionResult[SiteHelp]]:
@@ -142,14 +125,17 @@ def delete_site_help_pdf_file(
                     SiteHelp.Fields.id: ObjectId(site_help_id),
                     SiteHelp.Fields.pdf: {"$type": "string"},
                 },
-                {
-                    "$set": {
-                        SiteHelp.Fields.pdf: None,
+                add_update_at_to_update(
+                    {
+                        "$set": {
+                            SiteHelp.Fields.pdf: None,
+                        }
                     }
-                },
+                ),
                 session=session,
             )
         except Exception as e:
+            db.raise_if_transient(e)
             print(e)
             return TransactionResult(
                 success=False,
@@ -164,14 +150,8 @@ def delete_site_help_pdf_file(
 
         site_help = SiteHelp(**site_help)
 
-        try:
-            GCP_MANAGER.delete_site_help_pdf(site_help.id)
-        except Exception as e:
-            print(e)
-            return TransactionResult(
-                success=False,
-                message="Failed to delete pdf",
-            )
+        defer_after_commit(GCP_MANAGER.delete_site_help_pdf, site_help.id)
+
         site_help.pdf = None
         return TransactionResult(success=True, value=site_help)
 
@@ -204,6 +184,7 @@ def delete_site_help(
                 session=session,
             )
         except Exception as e:
+            db.raise_if_transient(e)
             return TransactionResult(
                 success=False,
                 message="Failed to get site help",
@@ -223,29 +204,24 @@ def delete_site_help(
                 {
                     SiteHelp.Fields.order: {"$gt": site_help.order},
                 },
-                {
-                    "$inc": {
-                        SiteHelp.Fields.order: -1,
+                add_update_at_to_update(
+                    {
+                        "$inc": {
+                            SiteHelp.Fields.order: -1,
+                        }
                     }
-                },
+                ),
                 session=session,
             )
         except Exception as e:
+            db.raise_if_transient(e)
             print(e)
             return TransactionResult(
                 success=False,
                 message="Failed to update site help order",
             )
 
-        try:
-            GCP_MANAGER.delete_site_help_folder(site_help_id)
-        # There cant be not found error because the background image is required
-        except Exception as e:
-            print(e)
-            return TransactionResult(
-                success=False,
-                message="Failed to delete site help folder",
-            )
+        defer_after_commit(GCP_MANAGER.delete_site_help_folder, site_help_id)
 
         return TransactionResult(success=True, value=site_help)
 
@@ -278,6 +254,7 @@ def delete_site_help_category(
                 session=session,
             )
         except Exception as e:
+            db.raise_if_transient(e)
             return TransactionResult(
                 success=False,
                 message="Failed to get site help category",
@@ -293,13 +270,17 @@ def delete_site_help_category(
                 {
                     SiteHelp.Fields.category: ObjectId(category_id),
                 },
-                {
-                    "$set": {
-                        SiteHelp.Fields.category: None,
+                add_update_at_to_update(
+                    {
+                        "$set": {
+                            SiteHelp.Fields.category: None,
+                        }
                     }
-                },
+                ),
+                session=session,
             )
         except Exception as e:
+            db.raise_if_transient(e)
             print(e)
             return TransactionResult(
                 success=False,
@@ -397,10 +378,11 @@ def reorder_site_help(
         try:
             db.SITE_HELP_COLLECTION.update_many(
                 query,
-                update,
+                add_update_at_to_update(update),
                 session=session,
             )
         except Exception as e:
+            db.raise_if_transient(e)
             print(e)
             return TransactionResult(
                 success=False,
@@ -3,7 +3,7 @@ from db import updates, queries
 from typing import Union
 from bson import ObjectId
 from services.gcp import GCP_MANAGER
-from .common import Transaction, TransactionResult, ClientSession
+from .common import Transaction, TransactionResult, ClientSession, defer_after_commit
 
 
 def fully_delete_user(user_id: Union[str, ObjectId], request: RequestWithFullUser):
@@ -129,17 +129,13 @@ def fully_delete_user(user_id: Union[str, ObjectId], request: RequestWithFullUse
                 message="Failed to change archived by of archived lessons",
             )
 
-        try:
-            if draft_id is not None:
-                GCP_MANAGER.delete_lesson(draft_id)
-        except Exception as e:
-            return TransactionResult(
-                success=False,
-                message=f"Failed to delete draft lesson from GCP error: {e}",
-            )
+        if draft_id is not None:
+            defer_after_commit(GCP_MANAGER.delete_lesson, draft_id)
 
         return TransactionResult(success=True)
 
     transaction = Transaction(func=the_tran, args=[user_id, request], kwargs={})
 
     transaction.start()
+
+    return transaction.result
@@ -30,6 +30,8 @@ from .lessons.published import (
     update_part_title_in_published_lesson,
     return_edit_to_initial_editor,
     add_view_to_published_lesson,
+    add_views_to_published_lessons,
+    update_published_lesson_review_stats,
     update_lesson_part_panoramic
 )
 from .lessons.archived import (
@@ -47,3 +49,10 @@ from .reviews import delete_review_by_id
 from .roles import update_guest_role
 from .site_help_categories import update_site_help_category_by_id
 from .site_help import update_site_help_by_id
+from .jobs import (
+    claim_next_job,
+    extend_job_lease,
+    complete_job,
+    fail_job,
+    clear_job_idempotency_key,
+)
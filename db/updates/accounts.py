@@ -1,4 +1,6 @@
 import db
+from db import cache
+from db.transactions.common import defer_after_commit
 from db.models import Accounts, add_update_at_to_update, Actions, Resources
 from helpers.types import UpdateResults, RequestWithFullUser
 from typing import Union, Optional
@@ -17,12 +19,16 @@ def _update_account(
     except DuplicateKeyError:
         return UpdateResults(exists=True)
     except Exception as e:
+        db.raise_if_transient(e)
         print(e)
         return UpdateResults(failure=True)
 
     if user is None:
         return UpdateResults(success=True, not_found=True)
 
+    # the account is embedded in the cached users
+    defer_after_commit(cache.users.invalidate_all)
+
     return UpdateResults(success=True, value=Accounts(**user))
 
 
@@ -30,12 +36,15 @@ def _delete_account(filters: dict, **kwargs) -> UpdateResults[Accounts]:
     try:
         account = db.ACCOUNT_COLLECTION.find_one_and_delete(filters, **kwargs)
     except Exception as e:
+        db.raise_if_transient(e)
         print(e)
         return UpdateResults(failure=True)
 
     if account is None:
         return UpdateResults(success=True, not_found=True)
 
+    defer_after_commit(cache.users.invalidate_all)
+
     return UpdateResults(success=True, value=Accounts(**account))
 
 
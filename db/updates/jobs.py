@@ -0,0 +1,147 @@
+import db
+from db.models import Jobs, JobStatus, add_update_at_to_update
+from helpers.types import UpdateResults
+from pymongo import ReturnDocument
+from typing import Union, Optional, Any
+from datetime import datetime, timedelta
+from bson import ObjectId
+
+
+def _update_job(
+    filters: dict, update: Union[dict, list[dict]], **kwargs
+) -> UpdateResults[Jobs]:
+    try:
+        job = db.JOBS_COLLECTION.find_one_and_update(
+            filters,
+            add_update_at_to_update(update),
+            return_document=ReturnDocument.AFTER,
+            **kwargs,
+        )
+    except Exception as e:
+        print(e)
+        return UpdateResults(failure=True)
+
+    if job is None:
+        return UpdateResults(success=True, not_found=True)
+
+    return UpdateResults(success=True, value=Jobs(**job))
+
+
+def claim_next_job(
+    worker_id: str, names: list[str], lease_seconds: int
+) -> UpdateResults[Jobs]:
+    """
+    lease the oldest due job to the worker, a running job whose lease expired
+    (its worker died or was recycled) is claimed again
+    not_found when there is nothing to run
+    """
+    now = datetime.utcnow()
+
+    return _update_job(
+        {
+            Jobs.Fields.name_: {"$in": names},
+            "$or": [
+                {
+                    Jobs.Fields.status: JobStatus.PENDING,
+                    Jobs.Fields.run_at: {"$lte": now},
+                },
+                {
+                    Jobs.Fields.status: JobStatus.RUNNING,
+                    Jobs.Fields.lease_expires_at: {"$lte": now},
+                },
+            ],
+        },
+        {
+            "$set": {
+                Jobs.Fields.status: JobStatus.RUNNING,
+                Jobs.Fields.locked_by: worker_id,
+                Jobs.Fields.lease_expires_at: now + timedelta(seconds=lease_seconds),
+            },
+            "$inc": {Jobs.Fields.attempts: 1},
+        },
+        sort=[(Jobs.Fields.run_at, 1)],
+    )
+
+
+def extend_job_lease(
+    job_id: Union[ObjectId, str], worker_id: str, lease_seconds: int
+) -> UpdateResults[Jobs]:
+    """
+    not_found when the worker lost the lease
+    """
+    return _update_job(
+        {
+            Jobs.Fields.id: ObjectId(job_id),
+            Jobs.Fields.status: JobStatus.RUNNING,
+            Jobs.Fields.locked_by: worker_id,
+        },
+        {
+            "$set": {
+                Jobs.Fields.lease_expires_at: datetime.utcnow()
+                + timedelta(seconds=lease_seconds),
+            }
+        },
+    )
+
+
+def complete_job(
+    job_id: Union[ObjectId, str], worker_id: str, result: Any = None
+) -> UpdateResults[Jobs]:
+    return _update_job(
+        {
+            Jobs.Fields.id: ObjectId(job_id),
+            Jobs.Fields.status: JobStatus.RUNNING,
+            Jobs.Fields.locked_by: worker_id,
+        },
+        {
+            "$set": {
+                Jobs.Fields.status: JobStatus.SUCCEEDED,
+                Jobs.Fields.result: result,
+                Jobs.Fields.error: None,
+                Jobs.Fields.finished_at: datetime.utcnow(),
+                Jobs.Fields.lease_expires_at: None,
+            }
+        },
+    )
+
+
+def fail_job(
+    job_id: Union[ObjectId, str],
+    worker_id: str,
+    error: str,
+    retry_at: Optional[datetime] = None,
+) -> UpdateResults[Jobs]:
+    """
+    with `retry_at` the job is pending again until then, otherwise it is failed for good
+    """
+    update = {
+        Jobs.Fields.error: error,
+        Jobs.Fields.lease_expires_at: None,
+        Jobs.Fields.locked_by: None,
+    }
+
+    if retry_at is None:
+        update[Jobs.Fields.status] = JobStatus.FAILED
+        update[Jobs.Fields.finished_at] = datetime.utcnow()
+    else:
+        update[Jobs.Fields.status] = JobStatus.PENDING
+        update[Jobs.Fields.run_at] = retry_at
+
+    return _update_job(
+        {
+            Jobs.Fields.id: ObjectId(job_id),
+            Jobs.Fields.status: JobStatus.RUNNING,
+            Jobs.Fields.locked_by: worker_id,
+        },
+        {"$set": update},
+    )
+
+
+def clear_job_idempotency_key(job_id: Union[ObjectId, str]) -> UpdateResults[Jobs]:
+    """
+    release the key of a failed job, so the same work can be enqueued again
+    """
+    return _update_job(
+        {Jobs.Fields.id: ObjectId(job_id), Jobs.Fields.status: JobStatus.FAILED},
+        {"$set": {Jobs.Fields.idempotency_key: None}},
+    )
@@ -13,7 +13,8 @@ def _update_many_archived_lessons(
         res = db.PUBLISHED_LESSONS_COLLECTION.update_many(
             filters, add_update_at_to_update(update), **kwargs
         )
-    except:
+    except Exception as e:
+        db.raise_if_transient(e)
         return UpdateResults(failure=True)
 
     if res is None:
@@ -28,7 +28,8 @@ def _delete_draft_lessons(filter: dict, **kwargs) -> UpdateResults[DraftLessons]
 
     try:
         res = db.DRAFT_LESSONS_COLLECTION.find_one_and_delete(filter, **kwargs)
-    except:
+    except Exception as e:
+        db.raise_if_transient(e)
         return UpdateResults(failure=True)
 
     if res is None:
@@ -41,7 +42,8 @@ def _delete_many_draft_lessons(filter: dict, **kwargs) -> UpdateResults[int]:
 
     try:
         res = db.DRAFT_LESSONS_COLLECTION.delete_many(filter, **kwargs)
-    except:
+    except Exception as e:
+        db.raise_if_transient(e)
         return UpdateResults(failure=True)
 
     if res is None:
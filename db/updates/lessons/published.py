@@ -6,8 +6,11 @@ from ...models import (
     Actions,
     Resources,
     LessonPart,
+    Ratings,
+    RatingStats,
 )
 import db
+from pymongo import UpdateOne
 from helpers.types import UpdateResults, RequestWithFullUser
 from typing import Union, Optional
 from bson import ObjectId
@@ -15,13 +18,22 @@ from helpers.secuirty import permissions
 
 
 def _update_published_lessons(
-    filters: dict, update: Union[list[dict], dict], **kwargs
+    filters: dict,
+    update: Union[list[dict], dict],
+    profile: Optional[db.OperationProfiles] = None,
+    **kwargs,
 ) -> UpdateResults[PublishedLessons]:
+    collection = db.PUBLISHED_LESSONS_COLLECTION
+
+    if profile is not None:
+        collection = db.with_profile(collection, profile)
+
     try:
-        res = db.PUBLISHED_LESSONS_COLLECTION.find_one_and_update(
+        res = collection.find_one_and_update(
             filters, add_update_at_to_update(update), **kwargs
         )
     except Exception as e:
+        db.raise_if_transient(e)
         print(e)
         return UpdateResults(failure=True)
 
@@ -38,7 +50,8 @@ def _update_many_published_lessons(
         res = db.PUBLISHED_LESSONS_COLLECTION.update_many(
             filters, add_update_at_to_update(update), **kwargs
         )
-    except:
+    except Exception as e:
+        db.raise_if_transient(e)
         return UpdateResults(failure=True)
 
     if res is None:
@@ -404,7 +417,87 @@ def add_view_to_published_lesson(lesson_id: Union[ObjectId, str], views: int = 1
         }
     }
 
-    return _update_published_lessons(filters, update, return_document=True)
+    return _update_published_lessons(
+        filters,
+        update,
+        profile=db.OperationProfiles.COUNTER_WRITE,
+        return_document=True,
+    )
+
+
+def add_views_to_published_lessons(views: dict[str, int]) -> UpdateResults[int]:
+    """
+    add many views to many lessons in one bulk write, views is a dict of lesson id -> views to add
+    """
+    operations = [
+        UpdateOne(
+            {PublishedLessons.Fields.id: ObjectId(lesson_id)},
+            add_update_at_to_update({"$inc": {PublishedLessons.Fields.viewed: count}}),
+        )
+        for lesson_id, count in views.items()
+    ]
+
+    try:
+        res = db.with_profile(
+            db.PUBLISHED_LESSONS_COLLECTION, db.OperationProfiles.COUNTER_WRITE
+        ).bulk_write(operations, ordered=False)
+    except Exception as e:
+        print(e)
+        return UpdateResults(failure=True)
+
+    return UpdateResults(success=True, value=res.modified_count)
+
+
+def _review_stats_update(ratings: list[Ratings], remove: bool = False) -> list[dict]:
+    """
+    returns an update pipeline that adds (or removes) the ratings of one review to the lesson review stats
+    """
+    sign = -1 if remove else 1
+
+    totals = {}
+    averages = {}
+
+    for rating in ratings:
+        path = f"{PublishedLessons.Fields.review_stats}.{rating.name.value}"
+        count_path = f"{path}.{RatingStats.Fields.count}"
+        sum_path = f"{path}.{RatingStats.Fields.sum}"
+
+        totals[count_path] = {
+            "$max": [0, {"$add": [{"$ifNull": [f"${count_path}", 0]}, sign]}]
+        }
+        totals[sum_path] = {
+            "$max": [
+                0,
+                {"$add": [{"$ifNull": [f"${sum_path}", 0]}, sign * rating.rating]},
+            ]
+        }
+        averages[f"{path}.{RatingStats.Fields.average}"] = {
+            "$cond": [
+                {"$gt": [f"${count_path}", 0]},
+                {"$divide": [f"${sum_path}", f"${count_path}"]},
+                0,
+            ]
+        }
+
+    # the averages are calculated from the updated totals
+    return [{"$set": totals}, {"$set": averages}]
+
+
+def update_published_lesson_review_stats(
+    lesson_id: Union[ObjectId, str], ratings: list[Ratings], remove: bool = False
+) -> UpdateResults[PublishedLessons]:
+    """
+    add the ratings of a new review to the lesson review stats, or remove the ratings of a deleted review
+    """
+    filters = {
+        PublishedLessons.Fields.id: ObjectId(lesson_id),
+    }
+
+    return _update_published_lessons(
+        filters,
+        _review_stats_update(ratings, remove),
+        profile=db.OperationProfiles.COUNTER_WRITE,
+    )
 
 
 def update_lesson_part_panoramic(
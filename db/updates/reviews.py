@@ -6,6 +6,7 @@ from typing import Union, Optional
 from bson import ObjectId
 from pymongo.errors import DuplicateKeyError
 from helpers.secuirty import permissions
+from .lessons.published import update_published_lesson_review_stats
 
 
 def _delete_review(filters: dict, **kwargs) -> UpdateResults[LessonsReviews]:
@@ -19,7 +20,11 @@ def _delete_review(filters: dict, **kwargs) -> UpdateResults[LessonsReviews]:
     if review is None:
         return UpdateResults(success=True, not_found=True)
 
-    return UpdateResults(success=True, value=LessonsReviews(**review))
+    review = LessonsReviews(**review)
+
+    update_published_lesson_review_stats(review.lesson, review.ratings, remove=True)
+
+    return UpdateResults(success=True, value=review)
 
 
 def delete_review_by_id(
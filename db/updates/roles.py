@@ -1,4 +1,5 @@
 import db
+from db import cache
 from db.models import (
     add_update_at_to_update,
     Roles,
@@ -29,6 +30,9 @@ def _update_role(
     if user is None:
         return UpdateResults(success=True, not_found=True)
 
+    # every instance reloads its roles
+    cache.roles.invalidate()
+
     return UpdateResults(success=True, value=Roles(**user))
 
 
@@ -17,6 +17,7 @@ def _update_site_help(
     except DuplicateKeyError:
         return UpdateResults(exists=True)
     except Exception as e:
+        db.raise_if_transient(e)
         return UpdateResults(failure=True)
 
     if site_help is None:
@@ -1,4 +1,6 @@
 import db
+from db import cache
+from db.transactions.common import defer_after_commit
 from db.models import Users, add_update_at_to_update, Roles, Actions, Resources
 from db.queries import get_guest_role
 from helpers.types import UpdateResults, RequestWithFullUser
@@ -18,12 +20,16 @@ def _update_user(
     except DuplicateKeyError:
         return UpdateResults(exists=True)
     except Exception as e:
+        db.raise_if_transient(e)
         print(e)
         return UpdateResults(failure=True)
 
     if user is None:
         return UpdateResults(success=True, not_found=True)
 
+    # after the commit when in a transaction, a check in between would cache the old user again
+    defer_after_commit(cache.users.invalidate_users, user[Users.Fields.id])
+
     return UpdateResults(success=True, value=Users(**user))
 
 
@@ -31,12 +37,15 @@ def _delete_user(filters: dict, **kwargs) -> UpdateResults[Users]:
     try:
         user = db.USER_COLLECTION.find_one_and_delete(filters, **kwargs)
     except Exception as e:
+        db.raise_if_transient(e)
         print(e)
         return UpdateResults(failure=True)
 
     if user is None:
         return UpdateResults(success=True, not_found=True)
 
+    defer_after_commit(cache.users.invalidate_users, user[Users.Fields.id])
+
     return UpdateResults(success=True, value=Users(**user))
 
 
@@ -44,6 +53,7 @@ def _delete_many_users(filters: dict, **kwargs) -> UpdateResults[int]:
     try:
         res = db.USER_COLLECTION.delete_many(filters, **kwargs)
     except Exception as e:
+        db.raise_if_transient(e)
         print(e)
         return UpdateResults(failure=True)
 
@@ -210,7 +220,12 @@ def delete_many_users_by_ids(
             )
         )
 
-    return _delete_many_users(filters, **kwargs)
+    res = _delete_many_users(filters, **kwargs)
+
+    if res.success:
+        defer_after_commit(cache.users.invalidate_users, *user_ids)
+
+    return res
 
 
 def change_user_password_with_token(
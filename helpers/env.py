@@ -23,6 +23,18 @@ class EnvVariabels(BaseSettings):
 
     DB_CONNECTION_STRING: str = "mongodb://localhost:27017"
     DB_NAME: str
+    # mongo client tuning, see `db.profiles`
+    DB_MAX_POOL_SIZE: int = 100
+    DB_MIN_POOL_SIZE: int = 0
+    # comma separated, in order of preference, the server picks the first one it supports
+    # snappy needs python-snappy installed
+    DB_COMPRESSORS: str = "zstd,zlib"
+    # milliseconds, the client timeout, sent to the server as maxTimeMS. 0 disables it
+    DB_MAX_TIME_MS: int = 0
+    # read preference of the catalogue reads (public lists), the other reads use the primary
+    DB_CATALOGUE_READ_PREFERENCE: str = "secondaryPreferred"
+    # write concern ("w") of the counters writes (views, review stats)
+    DB_COUNTER_WRITE_CONCERN: int = 1
 
     PORT: int = 8000
 
@@ -30,6 +42,21 @@ class EnvVariabels(BaseSettings):
     REDIS_PORT: int = 6379
     REDIS_PASSWORD: str = None
 
+    # seconds, how long a populated user is cached for the permissions check
+    USER_CACHE_TTL: int = 60
+    USER_LOCAL_CACHE_TTL: int = 10
+    USER_LOCAL_CACHE_SIZE: int = 2048
+    ROLES_CACHE_CHECK_INTERVAL: int = 60
+    ROLES_CACHE_MAX_AGE: int = 900
+    # 0 uses the number of cpus
+    PASSWORD_HASHING_WORKERS: int = 0
+    PASSWORD_HASHING_QUEUE_SIZE: int = 256
+
+    # "memory" or "redis", where the lessons views are counted until they are flushed to the db
+    VIEWS_COUNTER_BACKEND: str = "memory"
+    # seconds
+    VIEWS_FLUSH_INTERVAL: int = 10
+
     SITE_URL: str = "http://localhost:3000"
 
     SEND_GRID_KEY: str
@@ -38,6 +65,41 @@ class EnvVariabels(BaseSettings):
 
     BUCKET_NAME: str
     BUCKET_ALLOWED_ORIGINS: str
+    # how many signed urls are generated concurrently
+    SIGNING_WORKERS: int = 16
+    # how many blobs are copied concurrently inside the bucket
+    STORAGE_COPY_WORKERS: int = 16
+    # signed urls cache, a cached url is reused while this fraction of its lifetime remains
+    SIGNING_CACHE_SIZE: int = 8192
+    SIGNING_CACHE_MIN_REMAINING: float = 0.5
+    SIGNING_CACHE_REDIS: bool = False
+    # bytes, the largest file the browser can upload directly to the bucket
+    MAX_IMAGE_UPLOAD_SIZE: int = 5 * 1024 * 1024
+    MAX_DOCUMENT_UPLOAD_SIZE: int = 20 * 1024 * 1024
+
+    # jobs queue, see `services.jobs`
+    # how many jobs this instance runs concurrently, 0 to only enqueue (a separate worker runs them)
+    JOBS_WORKERS: int = 2
+    # seconds a worker waits before looking again when the queue is empty
+    JOBS_POLL_INTERVAL: int = 2
+    # seconds a claimed job is leased, renewed while it runs, then another worker may claim it
+    JOBS_LEASE_SECONDS: int = 300
+    JOBS_MAX_ATTEMPTS: int = 5
+    # seconds before the first retry, doubled on every attempt
+    JOBS_RETRY_DELAY: int = 30
+
+    # scheduled tasks, see `services.scheduler`
+    # seconds between the scheduler checks, and the leadership renewals
+    SCHEDULER_TICK: int = 30
+    # seconds, after this the leadership of a dead instance is taken by another one
+    SCHEDULER_LEADER_TTL: int = 90
+    # seconds between the purges of the expired archived lessons
+    ARCHIVE_PURGE_INTERVAL: int = 24 * 60 * 60
+    # how many lessons are deleted in one transaction
+    ARCHIVE_PURGE_BATCH_SIZE: int = 500
+
+    # when set, /metrics requires "Authorization: Bearer <METRICS_TOKEN>"
+    METRICS_TOKEN: Optional[str] = None
 
     COOKIE_DOMAIN: Optional[str] = None
     CORS_ORIGINS: Union[list[str], str] = []
@@ -186,3 +186,20 @@ class Base64PdfField(str):
             raise ValueError("Invalid PDF")
 
         return file, content_type
+
+
+class UploadPathField(str):
+    """
+    the path of a file the browser uploaded to the uploads folder, verified by the route
+    """
+
+    @classmethod
+    def __get_validators__(cls):
+        yield cls.validate
+
+    @classmethod
+    def validate(cls, value):
+        if not isinstance(value, str) or not value.startswith("uploads/"):
+            raise ValueError("Invalid Upload")
+
+        return value
@@ -26,6 +26,16 @@ def get_image_mime_type(file_extension: str) -> Union[str, None]:
     return mime_type
 
 
+def get_document_mime_type(file_extension: str) -> Union[str, None]:
+
+    mime_type, _ = mimetypes.guess_type("document." + file_extension)
+
+    if mime_type is None or not varify_document_content_type(mime_type):
+        return None
+
+    return mime_type
+
+
 def decode_base64_image(
     base64_image: str,
 ) -> Union[tuple[BytesIO, str], tuple[None, None]]:
@@ -0,0 +1,191 @@
+"""
+Prometheus metrics of the api, exposed at /metrics.
+
+- request latency, per route template (not per url, so the labels stay bounded)
+- mongo commands, their count and duration per command, and how many each request issued
+- gcs requests and redis round trips, per request
+- jobs runs, per job name and outcome
+- password hashing, the queue depth of the engine and the time per operation (queue wait included)
+
+The per request counts are collected in a context variable that `MetricsMiddleware` sets,
+work that runs outside the request context (plain thread pools) is counted only globally.
+"""
+import time
+from contextvars import ContextVar
+from typing import Optional
+from pymongo import monitoring
+from prometheus_client import (
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    CONTENT_TYPE_LATEST,
+)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "request latency",
+    ["route", "method", "status"],
+)
+MONGO_COMMANDS = Counter(
+    "mongo_commands_total", "mongo commands", ["command", "status"]
+)
+MONGO_COMMAND_LATENCY = Histogram(
+    "mongo_command_duration_seconds", "mongo command latency", ["command"]
+)
+MONGO_COMMANDS_PER_REQUEST = Histogram(
+    "mongo_commands_per_request",
+    "mongo commands issued by one request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55),
+)
+MONGO_TIME_PER_REQUEST = Histogram(
+    "mongo_seconds_per_request", "time spent in mongo by one request", ["route"]
+)
+GCS_REQUESTS = Counter("gcs_requests_total", "gcs requests", ["route", "method"])
+REDIS_ROUND_TRIPS = Counter("redis_round_trips_total", "redis round trips", ["route"])
+JOBS = Counter("jobs_total", "jobs run by the workers", ["name", "status"])
+JOB_DURATION = Histogram("job_duration_seconds", "jobs run time", ["name"])
+PASSWORD_QUEUE_DEPTH = Gauge(
+    "password_hashing_queue_depth", "password operations waiting or running"
+)
+PASSWORD_HASHING = Histogram(
+    "password_hashing_seconds",
+    "password operations time, queue wait included",
+    ["operation"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+PASSWORD_HASHING_REJECTED = Counter(
+    "password_hashing_rejected_total",
+    "password operations rejected, the queue was full",
+    ["operation"],
+)
+
+
+class _RequestStats:
+    __slots__ = ("mongo_commands", "mongo_seconds", "gcs", "redis")
+
+    def __init__(self) -> None:
+        self.mongo_commands = 0
+        self.mongo_seconds = 0.0
+        # method -> count
+        self.gcs: dict[str, int] = {}
+        self.redis = 0
+
+
+_current_request: ContextVar[Optional[_RequestStats]] = ContextVar(
+    "metrics_current_request", default=None
+)
+
+
+class MongoCommandsListener(monitoring.CommandListener):
+    """
+    pass it to the mongo clients `event_listeners`
+    """
+
+    def _record(self, command_name: str, status: str, duration_micros: int):
+        seconds = duration_micros / 1_000_000
+
+        MONGO_COMMANDS.labels(command_name, status).inc()
+        MONGO_COMMAND_LATENCY.labels(command_name).observe(seconds)
+
+        stats = _current_request.get()
+        if stats is not None:
+            stats.mongo_commands += 1
+            stats.mongo_seconds += seconds
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._record(event.command_name, "success", event.duration_micros)
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._record(event.command_name, "failure", event.duration_micros)
+
+
+def count_gcs_request(method: str, count: int = 1):
+    stats = _current_request.get()
+
+    if stats is None:
+        GCS_REQUESTS.labels("background", method).inc(count)
+    else:
+        stats.gcs[method] = stats.gcs.get(method, 0) + count
+
+
+def count_redis_round_trip():
+    stats = _current_request.get()
+
+    if stats is None:
+        REDIS_ROUND_TRIPS.labels("background").inc()
+    else:
+        stats.redis += 1
+
+
+# endpoint -> route template, built on the first request
+_routes_templates: dict = {}
+
+
+def _route_template(scope: dict) -> str:
+    endpoint = scope.get("endpoint")
+
+    if endpoint is None:
+        return "unmatched"
+
+    if not _routes_templates:
+        for route in scope["app"].routes:
+            if hasattr(route, "endpoint"):
+                _routes_templates.setdefault(route.endpoint, route.path)
+
+    return _routes_templates.get(endpoint, "unmatched")
+
+
+class MetricsMiddleware:
+    """
+    asgi middleware, records the request latency and the per request counts under the route template
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not scope["type"] == "http":
+            return await self.app(scope, receive, send)
+
+        stats = _RequestStats()
+        token = _current_request.set(stats)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _current_request.reset(token)
+
+            route = _route_template(scope)
+
+            REQUEST_LATENCY.labels(route, scope["method"], str(status)).observe(
+                time.perf_counter() - start
+            )
+            MONGO_COMMANDS_PER_REQUEST.labels(route).observe(stats.mongo_commands)
+            MONGO_TIME_PER_REQUEST.labels(route).observe(stats.mongo_seconds)
+
+            for method, count in stats.gcs.items():
+                GCS_REQUESTS.labels(route, method).inc(count)
+
+            if stats.redis:
+                REDIS_ROUND_TRIPS.labels(route).inc(stats.redis)
+
+
+def render() -> tuple[bytes, str]:
+    """
+    returns the metrics in the prometheus text format, and its content type
+    """
+    return generate_latest(), CONTENT_TYPE_LATEST
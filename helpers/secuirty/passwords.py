@@ -1,27 +1,193 @@
+"""
+Argon2 hashing of the passwords, in a pool of processes.
+
+Argon2 is slow on purpose, run in the request threads a burst of logins holds the shared
+threadpool and every other route waits for it. The engine runs it in `PASSWORD_HASHING_WORKERS`
+processes (the number of cpus by default), the callers only wait for the result.
+At most `PASSWORD_HASHING_QUEUE_SIZE` operations wait or run at once, past that `PasswordEngineBusy`
+is raised (answered with a 503) instead of queuing logins for longer than a client would wait.
+
+- `hash_password_async` / `check_password_async` for `async def` routes
+- `hash_password` / `check_password` block the calling thread (sync routes, jobs) until the pool answers
+- `needs_rehash` tells if a hash was made with other `PasswordHasher` parameters, login rehashes it
+
+The workers are forked by `start_engine` at the app startup, other processes (the jobs worker,
+scripts) start the pool on their first hash.
+"""
+import os
+import time
+import asyncio
 import secrets
 import string
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from typing import Callable, Optional
 from argon2 import PasswordHasher
-from argon2.exceptions import VerifyMismatchError
+from argon2.exceptions import VerifyMismatchError, InvalidHash
+from helpers.env import EnvVars
+from helpers import metrics
 
 ph = PasswordHasher()
 
 ALPHABET = string.ascii_letters + string.digits
 
 
+class PasswordEngineBusy(Exception):
+    """
+    too many password operations are waiting, try again later
+    """
+
+
 def generate_password() -> str:
 
     return "".join(secrets.choice(ALPHABET) for _ in range(16))
 
 
-def hash_password(password: str) -> str:
+# run in the pool processes
+
+
+def _hash(password: str) -> str:
     return ph.hash(password)
 
 
 # compare a given password with a hashed password
-def check_password(hashed_password: str, password: str) -> bool:
+def _verify(hashed_password: str, password: str) -> bool:
 
     try:
         ph.verify(hashed_password, password)
         return True
     except VerifyMismatchError:
         return False
+
+
+def _ready() -> bool:
+    return True
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+# operations submitted and not finished yet
+_pending = 0
+_lock = Lock()
+
+
+def _workers() -> int:
+    return EnvVars.PASSWORD_HASHING_WORKERS or os.cpu_count() or 1
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=_workers())
+
+        return _pool
+
+
+def _replace_pool(broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+    """
+    a worker died (oom kill, segfault) and the pool can't be used anymore, start a new one
+    """
+    global _pool
+
+    with _lock:
+        # another thread may have replaced it already
+        if _pool is broken or _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=_workers())
+
+        pool = _pool
+
+    broken.shutdown(wait=False, cancel_futures=True)
+
+    return pool
+
+
+def _done(operation: str, submitted_at: float, _: Future):
+    global _pending
+
+    with _lock:
+        _pending -= 1
+        metrics.PASSWORD_QUEUE_DEPTH.set(_pending)
+
+    metrics.PASSWORD_HASHING.labels(operation).observe(
+        time.perf_counter() - submitted_at
+    )
+
+
+def _submit(operation: str, func: Callable, *args) -> Future:
+    global _pending
+
+    pool = _get_pool()
+
+    with _lock:
+        if _pending >= EnvVars.PASSWORD_HASHING_QUEUE_SIZE:
+            metrics.PASSWORD_HASHING_REJECTED.labels(operation).inc()
+            raise PasswordEngineBusy()
+
+        _pending += 1
+        metrics.PASSWORD_QUEUE_DEPTH.set(_pending)
+
+    submitted_at = time.perf_counter()
+
+    try:
+        try:
+            future = pool.submit(func, *args)
+        except BrokenProcessPool as e:
+            print(e)
+            future = _replace_pool(pool).submit(func, *args)
+    except Exception:
+        _done(operation, submitted_at, None)
+        raise
+
+    future.add_done_callback(lambda f: _done(operation, submitted_at, f))
+
+    return future
+
+
+def start_engine():
+    """
+    start the pool processes, call it before the other background threads start
+    """
+    futures = [_get_pool().submit(_ready) for _ in range(_workers())]
+
+    for future in futures:
+        future.result()
+
+
+def stop_engine():
+    global _pool
+
+    with _lock:
+        pool, _pool = _pool, None
+
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def hash_password(password: str) -> str:
+    return _submit("hash", _hash, password).result()
+
+
+def check_password(hashed_password: str, password: str) -> bool:
+    return _submit("verify", _verify, hashed_password, password).result()
+
+
+async def hash_password_async(password: str) -> str:
+    return await asyncio.wrap_future(_submit("hash", _hash, password))
+
+
+async def check_password_async(hashed_password: str, password: str) -> bool:
+    return await asyncio.wrap_future(
+        _submit("verify", _verify, hashed_password, password)
+    )
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    if the hash was made with other parameters than the current `PasswordHasher`, cheap (no hashing)
+    """
+    try:
+        return ph.check_needs_rehash(hashed_password)
+    except InvalidHash:
+        return False
@@ -1,111 +1,191 @@
-from typing import Any, Literal, Optional
-from db.models import Actions, Resources, Permissions, DynamicSources
-from db.models.roles import ResourcesFilterOperators
+from typing import Any, Literal, Optional, Callable, NamedTuple
+from operator import attrgetter
+from threading import Lock
+from cachetools import LRUCache
+from db.models import Actions, Resources, Permissions, DynamicSources, Users
+from db.models.roles import ResourcesFilterOperators, ResourcesFilter
 from fastapi import Request
 from helpers.types import RequestWithFullUser
 
 
-def build_filters(
-    request: RequestWithFullUser, resource: Resources, action: Actions
-) -> Optional[dict[str, Any]]:
+class _PlanFilter(NamedTuple):
+    field: str
+    operator: ResourcesFilterOperators
+    # the static value, ignored when `resolve` is set
+    value: Any
+    # gets the value from the current user, None for static filters
+    resolve: Optional[Callable[[Users], Any]]
+    is_or: bool
+    is_and: bool
 
-    permission: Permissions
 
-    try:
-        permission = request.state.permissions[resource]
-    except KeyError:
-        for p in request.state.user.role.permissions:
-            if p.resource == resource:
-                permission = p
-                break
+def _compile_filter(filter_: ResourcesFilter) -> _PlanFilter:
+    resolve = None
 
-    if not permission:
-        return None
+    if filter_.dynamic:
+        if not filter_.dynamic_source == DynamicSources.CURRENT_USER:
+            print(filter_.dynamic_source)
+            raise Exception("Unknown dynamic source")
 
-    filters = {}
-
-    or_filters = []
-    and_filters = []
-
-    for filter_ in permission.filters:
-        if action in filter_.apply_to:
-            if filter_.dynamic:
-                if filter_.dynamic_source == DynamicSources.CURRENT_USER:
-                    value = request.state.user
-                    for field in filter_.dynamic_field:
-                        value = value[field]
-                    filter_.value = value
-                else:
-                    print(filter_.dynamic_source)
-                    raise Exception("Unknown dynamic source")
-            if filter_.is_or:
-                or_filters.append(
-                    {filter_.field: {filter_.operator.value: filter_.value}}
-                )
-            elif filter_.is_and:
-                and_filters.append(
-                    {filter_.field: {filter_.operator.value: filter_.value}}
-                )
-            else:
-                filters[filter_.field] = {filter_.operator.value: filter_.value}
+        # the same path the models `__getitem__` walks, "_id" is the alias of "id"
+        resolve = attrgetter(
+            ".".join(
+                "id" if field == "_id" else field for field in filter_.dynamic_field
+            )
+        )
 
-    if or_filters:
-        filters["$or"] = or_filters
-    if and_filters:
-        filters["$and"] = and_filters
+    return _PlanFilter(
+        field=filter_.field,
+        operator=filter_.operator,
+        value=filter_.value,
+        resolve=resolve,
+        is_or=filter_.is_or,
+        is_and=filter_.is_and,
+    )
 
-    return filters
 
+class PermissionPlan:
+    """
+    The filters of a permission that apply to a single action, compiled once per role version.
+    The plan is never modified after it is built, only the dynamic values are resolved per user.
+    """
 
-def verify_put_values(
-    request: Request,
-    resource: Resources,
-    values: dict[str, Any],
-    action: Literal[Actions.UPDATE_LIMITES, Actions.CREATE_LIMITES],
-) -> bool:
+    __slots__ = ("filters",)
 
-    permission: Permissions
+    def __init__(self, permission: Permissions, action: Actions) -> None:
+        self.filters: tuple[_PlanFilter, ...] = tuple(
+            _compile_filter(filter_)
+            for filter_ in permission.filters
+            if action in filter_.apply_to
+        )
 
-    try:
-        permission = request.state.permissions[resource]
-    except KeyError:
-        for p in request.state.user.role.permissions:
-            if p.resource == resource:
-                permission = p
-                break
+    def build_filters(self, user: Users) -> dict[str, Any]:
+
+        filters = {}
+
+        or_filters = []
+        and_filters = []
+
+        for filter_ in self.filters:
+            value = filter_.value if filter_.resolve is None else filter_.resolve(user)
+
+            if filter_.is_or:
+                or_filters.append({filter_.field: {filter_.operator.value: value}})
+            elif filter_.is_and:
+                and_filters.append({filter_.field: {filter_.operator.value: value}})
+            else:
+                filters[filter_.field] = {filter_.operator.value: value}
+
+        if or_filters:
+            filters["$or"] = or_filters
+        if and_filters:
+            filters["$and"] = and_filters
 
-    for filter_ in permission.filters:
-        if action in filter_.apply_to and filter_.field in values:
+        return filters
+
+    def verify_values(self, user: Users, values: dict[str, Any]) -> bool:
+
+        for filter_ in self.filters:
+            if not filter_.field in values:
+                continue
 
             # when there is a edit limit and a wildcard,
             # that means that the field is not editable
             if filter_.value == "*":
                 return False
 
-            if filter_.dynamic:
-                if filter_.dynamic_source == DynamicSources.CURRENT_USER:
-                    value = request.state.user
-                    for field in filter_.dynamic_field:
-                        value = value[field]
-                    filter_.value = value
-                else:
-                    raise Exception("Unknown dynamic source")
+            value = filter_.value if filter_.resolve is None else filter_.resolve(user)
+
             match filter_.operator:
                 case ResourcesFilterOperators.EQUAL:
-                    if not values[filter_.field] == filter_.value:
+                    if not values[filter_.field] == value:
                         return False
                 case ResourcesFilterOperators.NOT_EQUAL:
-                    if values[filter_.field] == filter_.value:
+                    if values[filter_.field] == value:
                         return False
                 case ResourcesFilterOperators.IN:
-                    if not values[filter_.field] in filter_.value:
+                    if not values[filter_.field] in value:
                         return False
                 case ResourcesFilterOperators.NOT_IN:
-                    if values[filter_.field] in filter_.value:
+                    if values[filter_.field] in value:
                         return False
                 case _:
                     raise NotImplementedError(
                         f"Operator {filter_.operator} not implemented"
                     )
 
-    return True
+        return True
+
+
+# (role id, role updated_at, resource, action) -> plan
+# the updated_at stamp makes an edited role compile a new plan
+_plans: LRUCache = LRUCache(maxsize=1024)
+_plans_lock = Lock()
+
+
+def _get_permission(
+    request: RequestWithFullUser, resource: Resources
+) -> Optional[Permissions]:
+    try:
+        return request.state.permissions[resource]
+    except (KeyError, AttributeError):
+        for p in request.state.user.role.permissions:
+            if p.resource == resource:
+                return p
+
+    return None
+
+
+def get_permission_plan(
+    request: RequestWithFullUser, resource: Resources, action: Actions
+) -> Optional[PermissionPlan]:
+
+    permission = _get_permission(request, resource)
+
+    if permission is None:
+        return None
+
+    role = request.state.user.role
+
+    if role.id is None:
+        return PermissionPlan(permission, action)
+
+    key = (role.id, role.updated_at, resource, action)
+
+    with _plans_lock:
+        plan = _plans.get(key)
+
+    if plan is None:
+        plan = PermissionPlan(permission, action)
+
+        with _plans_lock:
+            _plans[key] = plan
+
+    return plan
+
+
+def build_filters(
+    request: RequestWithFullUser, resource: Resources, action: Actions
+) -> Optional[dict[str, Any]]:
+
+    plan = get_permission_plan(request, resource, action)
+
+    if plan is None:
+        return None
+
+    return plan.build_filters(request.state.user)
+
+
+def verify_put_values(
+    request: Request,
+    resource: Resources,
+    values: dict[str, Any],
+    action: Literal[Actions.UPDATE_LIMITES, Actions.CREATE_LIMITES],
+) -> bool:
+
+    plan = get_permission_plan(request, resource, action)
+
+    if plan is None:
+        return False
+
+    return plan.verify_values(request.state.user, values)
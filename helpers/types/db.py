@@ -13,12 +13,14 @@ class QueryResults(Generic[T]):
         success: bool = False,
         failure: bool = False,
         not_found: bool = False,
+        not_valid: bool = False,
         value: T = None,
     ):
         self.value = value
         self.success = success
-        self.failure = failure or not_found
+        self.failure = failure or not_found or not_valid
         self.not_found = not_found
+        self.not_valid = not_valid
 
     def into_response(
         self,
@@ -8,7 +8,7 @@ from db.models import (
     DynamicSources,
 )
 from db.models.roles import ResourcesFilterOperators
-from typing import Any, Literal
+from typing import Any, Literal, Optional
 
 
 class RequestWithUserId(Request):
@@ -51,6 +51,7 @@ class RequestWithPaginationAndFullUser(RequestWithFullUser):
         page: int
         limit: int
         offset: int
+        cursor: Optional[list]
 
     @property
     def state(self) -> State:
@@ -63,6 +64,7 @@ class RequestWithPagination(Request):
         page: int
         limit: int
         offset: int
+        cursor: Optional[list]
 
     @property
     def state(self) -> State:
@@ -1,15 +1,59 @@
+import orjson
+from hashlib import sha1
 from fastapi.responses import JSONResponse, Response
-from fastapi import HTTPException
+from fastapi import HTTPException, Request
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel, Field
-from typing import Any
+from typing import Any, Optional
+from types import GeneratorType
+from collections import deque
 from bson import ObjectId
 from pymongo.errors import DuplicateKeyError
 from io import BytesIO
 from .errors import ErrorType
 
 
-class _Response(JSONResponse):
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _orjson_default(obj):
+    """
+    the types orjson doesn't serialize itself
+    datetime, date, enum, uuid and dataclasses are native
+    """
+    if isinstance(obj, ObjectId):
+        return str(obj)
+
+    if isinstance(obj, BaseModel):
+        # the model values are left as they are, orjson serializes them in the same pass
+        data = obj.dict(by_alias=True)
+        return data["__root__"] if "__root__" in data else data
+
+    if isinstance(obj, (set, frozenset, GeneratorType, deque)):
+        return list(obj)
+
+    return jsonable_encoder(obj, custom_encoder={ObjectId: str})
+
+
+class OrjsonResponse(JSONResponse):
+    """
+    json response serialized by orjson, the content can hold models, ObjectIds and datetimes as they are
+    """
+
+    def render(self, content: Any) -> bytes:
+        try:
+            return orjson.dumps(
+                content, default=_orjson_default, option=_ORJSON_OPTIONS
+            )
+        except TypeError:
+            # e.g dict keys orjson can't serialize, like ObjectId
+            return orjson.dumps(
+                jsonable_encoder(content, custom_encoder={ObjectId: str}),
+                option=_ORJSON_OPTIONS,
+            )
+
+
+class _Response(OrjsonResponse):
     def __init__(
         self,
         code: int,
@@ -23,9 +67,7 @@ class _Response(JSONResponse):
         self.content = {"success": success}
 
         if data is not None:
-            self.content["content"] = jsonable_encoder(
-                data, custom_encoder={ObjectId: str}
-            )
+            self.content["content"] = data
         if message is not None:
             self.content["message"] = message
 
@@ -42,16 +84,90 @@ class ApiError(_Response):
         super().__init__(code, False, error_code=error_code, *args, **kwargs)
 
 
+def make_etag(*stamps: Any) -> str:
+    """
+    a weak etag of the stamps the response is built from (updated_at stamps, query params, filters)
+    """
+    return f'W/"{sha1(repr(stamps).encode()).hexdigest()}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    # weak comparison, the W/ prefix is ignored
+    opaque_tag = etag.removeprefix("W/")
+
+    return any(
+        tag.strip().removeprefix("W/") == opaque_tag for tag in if_none_match.split(",")
+    )
+
+
+def _cache_headers(etag: str) -> dict[str, str]:
+    # the responses are per user, and the client must revalidate before using its copy
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+class NotModifiedResponse(Response):
+    def __init__(self, etag: str):
+        super().__init__(status_code=304, headers=_cache_headers(etag))
+
+
+def not_modified(request: Request, etag: str) -> Optional[NotModifiedResponse]:
+    """
+    304 response if the client already has the representation of the etag, None otherwise
+    check it before building the response, when the etag is known from stamps
+    """
+    if _etag_matches(request, etag):
+        return NotModifiedResponse(etag)
+
+    return None
+
+
 class ApiSuccess(_Response):
-    def __init__(self, code: int = 200, success: bool = True, *args, **kwargs):
+    """
+    pass the `request` to answer a conditional get, with the `etag` of the stamps the data is built from
+    or, without an `etag`, with a hash of the content
+    a matching If-None-Match turns the response into a 304 without a body
+    """
+
+    def __init__(
+        self,
+        code: int = 200,
+        success: bool = True,
+        *args,
+        request: Optional[Request] = None,
+        etag: Optional[str] = None,
+        **kwargs,
+    ):
         super().__init__(code, success, *args, **kwargs)
 
+        if request is None and etag is None:
+            return
+
+        if etag is None:
+            etag = f'W/"{sha1(self.body).hexdigest()}"'
+
+        self.headers.update(_cache_headers(etag))
+
+        if request is not None and _etag_matches(request, etag):
+            self.status_code = 304
+            self.body = b""
+            del self.headers["content-length"]
+            del self.headers["content-type"]
+
 
 class PaginationResponse(ApiSuccess):
     def __init__(
         self,
         data: list[dict],
         count: int,
+        next_cursor: Optional[str] = None,
         *args,
         **kwargs,
     ):
@@ -59,6 +175,7 @@ class PaginationResponse(ApiSuccess):
             data={
                 "count": count,
                 "data": data,
+                "next_cursor": next_cursor,
             },
             *args,
             **kwargs,
@@ -2,12 +2,19 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+import asyncio
 from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from helpers import metrics
 from helpers.exceptions.redirect import RedirectException
 from helpers.env import EnvVars
+from helpers.types import responses
+from helpers.secuirty import passwords
 from api import v2
+from db import counters, cache
+from services import registry, jobs, scheduler
+import db
 
 app = FastAPI(
     title="API",
@@ -35,13 +42,100 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# added last so it wraps the other middlewares, and measures the whole request
+app.add_middleware(metrics.MetricsMiddleware)
+
 
 app.include_router(v2.router, prefix="/api/v2")
 
 
+@app.get("/metrics", include_in_schema=False)
+def get_metrics(request: Request):
+    """
+    prometheus metrics of this instance
+    """
+    if (
+        EnvVars.METRICS_TOKEN
+        and not request.headers.get("Authorization")
+        == f"Bearer {EnvVars.METRICS_TOKEN}"
+    ):
+        return JSONResponse(status_code=401, content={"message": "unauthorized"})
+
+    content, content_type = metrics.render()
+
+    return Response(content, media_type=content_type)
+
+
+@app.on_event("startup")
+def start_password_engine():
+    # registered first, the pool processes are forked before the background threads start
+    passwords.start_engine()
+
+
+@app.on_event("startup")
+async def warm_up():
+    """
+    open the mongo pools, create the services managers and fetch the gcs token in parallel,
+    so the first requests don't pay for them. failures are printed, not raised
+    """
+    results = await asyncio.gather(
+        asyncio.to_thread(db.warm_up),
+        db.warm_up_async(),
+        registry.warm_up(),
+        return_exceptions=True,
+    )
+
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"warm up failed: {result}")
+
+
+@app.on_event("startup")
+async def start_background_flushers():
+    counters.views.start_flusher()
+
+
+@app.on_event("startup")
+async def start_jobs_workers():
+    jobs.start_workers()
+
+
+@app.on_event("startup")
+async def start_scheduler():
+    # Things that should only run in the cloud
+    if not EnvVars.IS_LOCAL:
+        scheduler.start_scheduler()
+
+
+@app.on_event("shutdown")
+async def flush_background_counters():
+    await counters.views.stop_flusher()
+
+
+@app.on_event("shutdown")
+async def stop_jobs_workers():
+    await jobs.stop_workers()
+
+
+@app.on_event("shutdown")
+async def stop_scheduler():
+    await scheduler.stop_scheduler()
+
+
+@app.on_event("shutdown")
+def stop_roles_cache_listener():
+    cache.roles.stop_listener()
+
+
+@app.on_event("shutdown")
+def stop_password_engine():
+    passwords.stop_engine()
+
+
 @app.exception_handler(HTTPException)
 def http_exception_handler(request: Request, exc: HTTPException):
-    return JSONResponse(
+    # the detail of `responses.ApiRaiseError` is the response content, not encoded yet
+    return responses.OrjsonResponse(
         status_code=exc.status_code,
         content=exc.detail,
         headers=exc.headers,
@@ -63,6 +157,15 @@ def handle_redirect_exception(request: Request, exc: RedirectException):
     return response
 
 
+@app.exception_handler(passwords.PasswordEngineBusy)
+def password_engine_busy_handler(request: Request, exc: passwords.PasswordEngineBusy):
+    return responses.ApiError(
+        code=503,
+        message="too many requests, try again in a few seconds",
+        headers={"Retry-After": "5"},
+    )
+
+
 @app.exception_handler(RequestValidationError)
 def validation_exception_handler(request: Request, exc: RequestValidationError):
     return JSONResponse(
@@ -82,16 +185,11 @@ if __name__ == "__main__":
     # migrations.add_lesson_part_type_and_gcp_path_for_draft_lessons()
     # migrations.add_lesson_part_type_and_gcp_path_for_published_lessons()
     # migrations.add_lesson_part_type_and_gcp_path_for_archive_lessons()
+    # migrations.rebuild_published_lessons_review_stats()
 
     if EnvVars.is_production:
         print("Running in production mode")
 
-    # Things that should only run in the cloud
-    if not EnvVars.IS_LOCAL:
-        from services.cron import create_all_cron_tesks
-
-        create_all_cron_tesks()
-
     import uvicorn
 
     import db
@@ -1,9 +1,15 @@
 from google.cloud import storage
 from .buckets import BucketManager
 from helpers.env import EnvVars
+from helpers import metrics
+from services import registry
 from io import BytesIO
 import time, urllib
-from .types import FoldersNames
+from .types import FoldersNames, UploadAssets, StagedUpload
+from .uploads import get_upload_mime_type, is_valid_upload
+from typing import Union, Optional
+from datetime import timedelta
+import uuid
 from google.cloud.storage import Blob
 import google.auth
 
@@ -39,15 +45,90 @@ def make_authorized_get_request(endpoint, audience):
 class GCPManager:
     def __init__(self) -> None:
         self.storage_client = storage.Client()
+        # count every request the storage client sends in the request metrics
+        self.storage_client._http.hooks["response"].append(
+            lambda response, *args, **kwargs: metrics.count_gcs_request(
+                response.request.method
+            )
+        )
 
         creadentials, _ = google.auth.default()
 
+        # no request, the bucket metadata is not needed to use it
         self.bucket_manager = BucketManager(
-            self.storage_client.get_bucket(EnvVars.BUCKET_NAME), creadentials
+            self.storage_client.bucket(EnvVars.BUCKET_NAME), creadentials
         )
 
+    def warm_up(self):
+        self.bucket_manager.refresh_credentials()
+
+    @staticmethod
+    def _staged_upload_prefix(asset: UploadAssets, user_id: str) -> str:
+        return f"{FoldersNames.UPLOADS}/{user_id}/{asset}-"
+
+    def generate_staged_upload_url(
+        self, asset: UploadAssets, user_id: str, file_type: str
+    ) -> Optional[dict[str, str]]:
+        """
+        generate a signed url for the browser to upload a file of the asset to the uploads folder
+        returns the upload link, the upload path to send back in the payload and the content type
+        the file must be uploaded with, None if the file type is not allowed for the asset
+        """
+        mime_type = get_upload_mime_type(asset, file_type)
+
+        if mime_type is None:
+            return None
+
+        upload_path = f"{self._staged_upload_prefix(asset, user_id)}{uuid.uuid4().hex}.{file_type}"
+
+        upload_link = self.bucket_manager.generate_file_upload_url(
+            upload_path, mime_type, expiration=timedelta(hours=1)
+        )
+
+        return {
+            "upload_link": upload_link,
+            "upload_path": upload_path,
+            "content_type": mime_type,
+        }
+
+    def get_staged_upload(
+        self, asset: UploadAssets, upload_path: str, user_id: str
+    ) -> Optional[tuple[StagedUpload, str]]:
+        """
+        verify a file the user uploaded to the uploads folder, from the blob metadata
+        returns the staged upload and its content type, in the same shape as the base64 fields,
+        None if the file doesn't exist, isn't the user's or doesn't match the asset (then it is deleted)
+        """
+        if not upload_path.startswith(self._staged_upload_prefix(asset, user_id)):
+            return None
+
+        blob = self.bucket_manager.bucket.get_blob(upload_path)
+
+        if blob is None:
+            return None
+
+        if not is_valid_upload(asset, blob.content_type, blob.size):
+            blob.delete()
+            return None
+
+        return StagedUpload(upload_path, blob.content_type), blob.content_type
+
+    def staged_upload_exists(self, upload: StagedUpload) -> bool:
+        return self.bucket_manager.bucket.blob(upload.path).exists()
+
+    def delete_staged_upload(self, upload: StagedUpload):
+        """
+        delete a staged upload that was copied with `keep_source`, a missing one is ignored
+        """
+        self.bucket_manager.delete_blobs([upload.path])
+
     def upload_account_logo(
-        self, file: BytesIO, account_id: str, file_type: str, content_type: str
+        self,
+        file: Union[BytesIO, StagedUpload],
+        account_id: str,
+        file_type: str,
+        content_type: str,
+        keep_source: bool = False,
     ):
         """
         upload a lesson thumbnail to the storage bucket for a given lesson, returns the public link
@@ -56,7 +137,9 @@ class GCPManager:
             f"{FoldersNames.ACCOUNTS}/{account_id}/logo-{time.time()}.{file_type}"
         )
 
-        self.bucket_manager.upload_file_from_bytes(file, filename, content_type, True)
+        self.bucket_manager.upload_file_from_bytes(
+            file, filename, content_type, True, keep_source
+        )
 
         return self.bucket_manager.generate_link_for_open_file(filename)
 
@@ -70,7 +153,7 @@ class GCPManager:
 
     def upload_lesson_thumbnail(
         self,
-        file: BytesIO,
+        file: Union[BytesIO, StagedUpload],
         lesson_id: str,
         file_type: str,
         content_type: str,
@@ -100,7 +183,7 @@ class GCPManager:
         return self.bucket_manager.generate_link_for_open_file(filename)
 
     def upload_lesson_description_file(
-        self, file: BytesIO, lesson_id: str, edit: bool = False
+        self, file: Union[BytesIO, StagedUpload], lesson_id: str, edit: bool = False
     ):
         """
         upload a lesson description file to the storage bucket for a given lesson, returns the public link
@@ -153,6 +236,18 @@ class GCPManager:
 
         self.bucket_manager.bucket.delete_blobs(blobs)
 
+    def delete_lessons(self, lessons_ids: list[str]) -> int:
+        """
+        delete many lessons (and their edits) from the storage bucket, returns how many files were deleted
+        """
+        prefixes = []
+
+        for lesson_id in lessons_ids:
+            prefixes.append(f"{FoldersNames.LESSONS}/{lesson_id}")
+            prefixes.append(f"{FoldersNames.LESSON_EDITS}/{lesson_id}")
+
+        return self.bucket_manager.delete_blobs_by_prefixes(prefixes)
+
     def delete_lesson_old_thumbnail(self, lesson_id: str):
         blobs = self.storage_client.list_blobs(
             self.bucket_manager.bucket,
@@ -188,9 +283,16 @@ class GCPManager:
         """
         duplicate a lesson in the storage bucket
         """
-        self.bucket_manager.duplicate_folder(
+
+        def print_progress(done: int, total: int):
+            # about every 10%
+            if done == total or done % max(total // 10, 1) == 0:
+                print(f"duplicating lesson {lesson_id}: {done}/{total} files")
+
+        return self.bucket_manager.duplicate_folder(
             f"{FoldersNames.LESSONS}/{lesson_id}",
             f"{FoldersNames.LESSONS}/{new_lesson_id}",
+            print_progress,
         )
 
     def delete_lesson_edit_folder(self, lesson_id: str):
@@ -203,54 +305,43 @@ class GCPManager:
             prefix=f"{FoldersNames.LESSON_EDITS}/{lesson_id}",
         )
 
-        blobs = list(blobs)
-
-        self.bucket_manager.bucket.delete_blobs(blobs)
+        self.bucket_manager.delete_blobs([blob.name for blob in blobs])
 
     def delete_list_of_lessons_files(self, lesson_id: str, files: list[str]):
         """
-        delete a list of files from a lesson folder
+        delete a list of files from a lesson folder, by name without listing the folders
+        files outside the lesson folders are ignored
         """
-        blobs = self.storage_client.list_blobs(
-            self.bucket_manager.bucket, prefix=f"{FoldersNames.LESSONS}/{lesson_id}"
+        prefixes = (
+            f"{FoldersNames.LESSONS}/{lesson_id}/",
+            f"{FoldersNames.LESSON_EDITS}/{lesson_id}/",
         )
 
-        blobs_ = self.storage_client.list_blobs(
-            self.bucket_manager.bucket,
-            prefix=f"{FoldersNames.LESSON_EDITS}/{lesson_id}",
+        self.bucket_manager.delete_blobs(
+            [file for file in files if file.startswith(prefixes)]
         )
 
-        blobs = list(blobs) + list(blobs_)
-
-        blobs = [blob for blob in blobs if blob.name in files]
-
-        self.bucket_manager.bucket.delete_blobs(blobs)
-
     def move_edit_files_to_publish_folder(self, lesson_id: str, files: list[str]):
-        # rename a folder in the storage bucket
-
+        """
+        move the given files from the lesson edit folder to the lesson folder, with their acl
+        then delete what is left in the edit folder.
+        the moved files are deleted by name with the move, the folder is still listed once after it,
+        the files the edit replaced or dropped (older edit thumbnails, removed parts, abandoned uploads)
+        are not referenced by the lesson anymore, so the listing is the only way to find them
+        """
         folder_to_rename = f"{FoldersNames.LESSON_EDITS}/{lesson_id}"
 
         new_folder_name = f"{FoldersNames.LESSONS}/{lesson_id}"
 
-        blobs = self.storage_client.list_blobs(
-            self.bucket_manager.bucket, prefix=folder_to_rename
+        self.bucket_manager.move_blobs(
+            {
+                file: file.replace(folder_to_rename, new_folder_name, 1)
+                for file in files
+                if file.startswith(f"{folder_to_rename}/")
+            }
         )
 
-        blobs = list(blobs)
-
-        for blob in blobs:
-            blob: Blob
-            if blob.name in files:
-                new_name = blob.name.replace(folder_to_rename, new_folder_name, 1)
-                was_public = "READER" in blob.acl.all().get_roles()
-                new_blob = self.bucket_manager.bucket.copy_blob(
-                    blob, self.bucket_manager.bucket, new_name, preserve_acl=True
-                )
-                if was_public:
-                    new_blob.make_public()
-                blob.delete()
-
+        # only the leftovers are listed, the moved files are gone already
         self.delete_lesson_edit_folder(lesson_id)
 
     def delete_account_folder(self, account_id: str):
@@ -268,7 +359,7 @@ class GCPManager:
 
     def upload_site_help_background_image(
         self,
-        file: BytesIO,
+        file: Union[BytesIO, StagedUpload],
         help_id: str,
         file_type: str,
         content_type: str,
@@ -289,7 +380,7 @@ class GCPManager:
 
         self.bucket_manager.bucket.delete_blobs(list(blobs))
 
-    def upload_site_help_pdf(self, file: BytesIO, help_id: str):
+    def upload_site_help_pdf(self, file: Union[BytesIO, StagedUpload], help_id: str):
         filename = f"{FoldersNames.SITE_HELP}/{help_id}/pdf.pdf"
 
         self.bucket_manager.upload_file_from_bytes(
@@ -380,4 +471,4 @@ class GCPManager:
         self.bucket_manager.bucket.delete_blobs(blobs)
 
 
-GCP_MANAGER = GCPManager()
+GCP_MANAGER = registry.register("gcp", GCPManager)
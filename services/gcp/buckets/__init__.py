@@ -1,11 +1,28 @@
 from io import BytesIO
 from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from google.cloud.storage import Blob, Bucket
+from google.cloud.storage.batch import _FutureDict
 from helpers.env import EnvVars
+from helpers import metrics
 from google.auth import compute_engine
-from typing import Optional, Literal
+from typing import Optional, Literal, Union, Callable, NamedTuple
 from google.auth.transport import requests
 from google.auth.exceptions import TransportError
+from google.api_core.exceptions import PreconditionFailed, NotFound
+from google.cloud.storage.retry import DEFAULT_RETRY
+from .cache import SIGNED_URLS_CACHE
+from ..types import FoldersNames, StagedUpload
+
+
+# the most requests gcs accepts in one batch
+BATCH_SIZE = 100
+
+
+class CopyReport(NamedTuple):
+    copied: int
+    # the names of the source blobs that failed, after their retries
+    failed: list[str]
 
 
 class BucketManager:
@@ -14,7 +31,22 @@ class BucketManager:
     ) -> None:
         self.bucket = bucket
 
-        # configre the bucket cors
+        self.credentials = credentials
+
+        # used to sign many urls at once, with compute engine credentials
+        # each signature is a network call (iam signBlob)
+        self.signing_executor = ThreadPoolExecutor(
+            max_workers=EnvVars.SIGNING_WORKERS, thread_name_prefix="url-signing"
+        )
+        # bounds the concurrent copies (rewrites) inside the bucket
+        self.copy_executor = ThreadPoolExecutor(
+            max_workers=EnvVars.STORAGE_COPY_WORKERS, thread_name_prefix="storage-copy"
+        )
+
+    def configure_cors(self):
+        """
+        set the bucket cors, run once when the allowed origins change (see `services.gcp.configure_bucket`)
+        """
         self.bucket.cors = [
             {
                 "origin": EnvVars.BUCKET_ALLOWED_ORIGINS.split(","),
@@ -25,25 +57,57 @@ class BucketManager:
         ]
         self.bucket.patch()
 
-        self.credentials = credentials
+    def configure_uploads_lifecycle(self, max_age_days: int = 1):
+        """
+        delete the files of the uploads folder that were not moved to their place after `max_age_days`
+        """
+        prefix = [f"{FoldersNames.UPLOADS.value}/"]
 
-    def _signed_url_creator(
+        self.bucket.reload()
+
+        # replace the rule of the uploads folder, keep the others
+        self.bucket.lifecycle_rules = [
+            rule
+            for rule in self.bucket.lifecycle_rules
+            if not rule.get("condition", {}).get("matchesPrefix") == prefix
+        ]
+        self.bucket.add_lifecycle_delete_rule(age=max_age_days, matches_prefix=prefix)
+        self.bucket.patch()
+
+    def refresh_credentials(self):
+        """
+        populate the access token used for signing, if it is missing
+        """
+        if not EnvVars.IS_LOCAL and self.credentials.token is None:
+            print("refreshing token")
+            # Perform a refresh request to populate the access token of the
+            # current credentials.
+            self.credentials.refresh(requests.Request())
+
+    def _signing_kwargs(self) -> dict:
+        kwargs = {}
+        if not EnvVars.IS_LOCAL:
+            self.refresh_credentials()
+            kwargs["service_account_email"] = self.credentials.service_account_email
+            kwargs["access_token"] = self.credentials.token
+
+        return kwargs
+
+    @staticmethod
+    def _count_signatures(count: int):
+        # only the remote signatures are requests (iam signBlob), local ones use the key file
+        if count and not EnvVars.IS_LOCAL:
+            metrics.count_gcs_request("SIGN", count)
+
+    def _sign_url(
         self,
         filename: str,
         expiration: timedelta,
         method: Literal["PUT", "GET"],
         content_type: str = None,
         counter: int = 0,
-    ):
-        kwargs = {}
-        if not EnvVars.IS_LOCAL:
-            if self.credentials.token is None:
-                print("refreshing token")
-                # Perform a refresh request to populate the access token of the
-                # current credentials.
-                self.credentials.refresh(requests.Request())
-            kwargs["service_account_email"] = self.credentials.service_account_email
-            kwargs["access_token"] = self.credentials.token
+    ) -> str:
+        kwargs = self._signing_kwargs()
 
         if content_type:
             kwargs["content_type"] = content_type
@@ -60,10 +124,28 @@ class BucketManager:
             if counter > 3:
                 raise e
             self.credentials.token = None
-            return self._signed_url_creator(
+            return self._sign_url(
                 filename, expiration, method, content_type, counter + 1
             )
 
+    def _signed_url_creator(
+        self,
+        filename: str,
+        expiration: timedelta,
+        method: Literal["PUT", "GET"],
+        content_type: str = None,
+    ) -> str:
+        key = (filename, method, content_type)
+
+        url = SIGNED_URLS_CACHE.get(key, expiration)
+
+        if url is None:
+            self._count_signatures(1)
+            url = self._sign_url(filename, expiration, method, content_type)
+            SIGNED_URLS_CACHE.set(key, url, expiration)
+
+        return url
+
     def generate_file_upload_url(
         self,
         filename: str,
@@ -83,6 +165,49 @@ class BucketManager:
         """
         return self._signed_url_creator(filename, expiration, "GET")
 
+    def generate_files_download_urls(
+        self, filenames: list[str], expiration: timedelta = timedelta(hours=1)
+    ) -> dict[str, str]:
+        """
+        generate signed urls for downloading many files at once, returns a dict of filename -> url
+        the credentials are refreshed once for the whole batch and the urls are signed concurrently
+        """
+        # drop duplicates, keep the order
+        filenames = list(dict.fromkeys(filenames))
+
+        if not filenames:
+            return {}
+
+        cached = SIGNED_URLS_CACHE.get_many(
+            [(filename, "GET", None) for filename in filenames], expiration
+        )
+        urls = {filename: url for (filename, _, _), url in cached.items()}
+        missing = [filename for filename in filenames if filename not in urls]
+
+        # counted here, the signing workers don't run in the request context
+        self._count_signatures(len(missing))
+
+        if len(missing) == 1:
+            signed = [self._sign_url(missing[0], expiration, "GET")]
+        elif missing:
+            # refresh the token before the batch, so the workers don't all refresh it
+            self._signing_kwargs()
+
+            signed = self.signing_executor.map(
+                lambda filename: self._sign_url(filename, expiration, "GET"), missing
+            )
+        else:
+            signed = []
+
+        signed = dict(zip(missing, signed))
+        SIGNED_URLS_CACHE.set_many(
+            {(filename, "GET", None): url for filename, url in signed.items()},
+            expiration,
+        )
+        urls.update(signed)
+
+        return {filename: urls[filename] for filename in filenames}
+
     def generate_link_for_open_file(self, filename: str):
         """
         generate a public link for opening a file from the storage bucket
@@ -91,14 +216,28 @@ class BucketManager:
         return f"https://storage.googleapis.com/{self.bucket.name}/{filename}"
 
     def upload_file_from_bytes(
-        self, file: BytesIO, filename: str, content_type: str, public: bool = False
+        self,
+        file: Union[BytesIO, StagedUpload],
+        filename: str,
+        content_type: str,
+        public: bool = False,
+        keep_source: bool = False,
     ):
         """
         upload a file to the storage bucket from a bytes object
+        a staged upload (already in the bucket) is moved instead, with a copy inside the bucket,
+        with `keep_source` it is only copied, the caller deletes it when it doesn't need it anymore
         """
-        blob = self.bucket.blob(filename)
+        if isinstance(file, StagedUpload):
+            source = self.bucket.blob(file.path)
+            blob = self.bucket.copy_blob(source, self.bucket, filename)
 
-        blob.upload_from_file(file, content_type=content_type)
+            if not keep_source:
+                source.delete()
+        else:
+            blob = self.bucket.blob(filename)
+
+            blob.upload_from_file(file, content_type=content_type)
 
         if public:
             blob.make_public()
@@ -109,23 +248,202 @@ class BucketManager:
         """
         return self.bucket.blob(path)
 
-    def duplicate_folder(self, source_folder_name: str, destination_folder_name: str):
+    def copy_blob(self, source: Blob, new_name: str, overwrite: bool = False):
         """
-        duplicate a folder in the storage bucket
+        copy a blob inside the bucket, with the acl of the source in the same request
+        the source must be listed (or loaded) with projection="full" for its acl to be known.
+        transient errors are retried, without `overwrite` a destination that already exists counts as copied
         """
+        new_blob = self.bucket.blob(new_name)
 
-        blobs: list[Blob] = self.bucket.list_blobs(prefix=source_folder_name)
+        acl = source._properties.get("acl")
 
-        for blob in blobs:
-            # the list_blobs method returns the source folder as well
-            if not blob.name == source_folder_name:
-                new_name = blob.name.replace(
-                    source_folder_name, destination_folder_name
+        if acl:
+            # the rewrite request body is the destination metadata, the acl is applied with the copy
+            new_blob._properties["acl"] = [
+                {"entity": entry["entity"], "role": entry["role"]} for entry in acl
+            ]
+
+        token = None
+
+        try:
+            while True:
+                # if_generation_match=0, only if the destination doesn't exist, makes the retries safe
+                token, _, _ = new_blob.rewrite(
+                    source,
+                    token=token,
+                    if_generation_match=None if overwrite else 0,
+                    retry=DEFAULT_RETRY,
                 )
-                # copy the new blob to the destination folder and save the acl if it has one
-                new_bucket = self.bucket.copy_blob(blob, self.bucket, new_name)
-                if blob.acl:
-                    new_bucket.acl.save(blob.acl)
+
+                # a rewrite inside the same bucket is usually done in one request
+                if token is None:
+                    break
+        except PreconditionFailed:
+            # already copied, e.g by a retry whose response was lost
+            pass
+
+        return new_blob
+
+    def copy_blobs(
+        self,
+        names: dict[str, str],
+        blobs: Optional[dict[str, Blob]] = None,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        overwrite: bool = False,
+    ) -> CopyReport:
+        """
+        copy many blobs inside the bucket concurrently, names is a dict of source name -> new name
+        `blobs` are the listed source blobs (with their acl) by name, missing ones are copied without acl
+        `on_progress` is called with (done, total) after each blob
+        """
+        blobs = blobs or {}
+        total = len(names)
+        done = 0
+        failed = []
+
+        futures = {
+            self.copy_executor.submit(
+                self.copy_blob,
+                blobs.get(name) or self.bucket.blob(name),
+                new_name,
+                overwrite,
+            ): name
+            for name, new_name in names.items()
+        }
+
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(e)
+                failed.append(futures[future])
+
+            done += 1
+
+            if on_progress is not None:
+                on_progress(done, total)
+
+        return CopyReport(copied=total - len(failed), failed=failed)
+
+    def get_blobs(self, names: list[str]) -> dict[str, Blob]:
+        """
+        load the metadata (with the acl) of many blobs by name, in batches
+        returns the blobs that exist by name
+        """
+        blobs = [self.bucket.blob(name) for name in dict.fromkeys(names)]
+
+        for start in range(0, len(blobs), BATCH_SIZE):
+            try:
+                with self.bucket.client.batch():
+                    for blob in blobs[start : start + BATCH_SIZE]:
+                        blob.reload(projection="full")
+            except NotFound:
+                # the batch raises on the first missing blob, after loading all the others
+                pass
+
+        # a loaded blob gets the metadata of its response, a blob that was not found keeps
+        # the placeholder of the batch (a dict that raises on any read)
+        return {
+            blob.name: blob
+            for blob in blobs
+            if not isinstance(blob._properties, _FutureDict)
+        }
+
+    def delete_blobs(self, names: list[str]):
+        """
+        delete many blobs by name, in batches, blobs that don't exist are ignored
+        """
+        names = list(dict.fromkeys(names))
+
+        for start in range(0, len(names), BATCH_SIZE):
+            try:
+                with self.bucket.client.batch():
+                    for name in names[start : start + BATCH_SIZE]:
+                        self.bucket.delete_blob(name)
+            except NotFound:
+                # the batch raises on the first missing blob, after deleting all the others
+                pass
+
+    def delete_blobs_by_prefixes(self, prefixes: list[str]) -> int:
+        """
+        delete all the blobs under many prefixes, the prefixes are listed concurrently
+        and the blobs deleted in batches, returns how many blobs were deleted
+        """
+        # the listings share the copies pool, both are bounded network calls
+        listings = self.copy_executor.map(
+            lambda prefix: [
+                blob.name for blob in self.bucket.list_blobs(prefix=prefix)
+            ],
+            prefixes,
+        )
+
+        names = [name for listing in listings for name in listing]
+
+        self.delete_blobs(names)
+
+        return len(names)
+
+    def move_blobs(
+        self,
+        names: dict[str, str],
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> CopyReport:
+        """
+        move many blobs inside the bucket by name, names is a dict of source name -> new name
+        the sources are loaded in batches, copied concurrently with their acl, and deleted in batches.
+        existing destinations are overwritten, missing sources are skipped.
+        raises if some blobs failed to copy, the sources that were not copied are kept
+        """
+        blobs = self.get_blobs(list(names))
+
+        names = {name: new_name for name, new_name in names.items() if name in blobs}
+
+        report = self.copy_blobs(names, blobs, on_progress, overwrite=True)
+
+        self.delete_blobs([name for name in names if name not in report.failed])
+
+        if report.failed:
+            raise Exception(
+                f"failed to move {len(report.failed)} of {len(names)} blobs"
+            )
+
+        return report
+
+    def duplicate_folder(
+        self,
+        source_folder_name: str,
+        destination_folder_name: str,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> CopyReport:
+        """
+        duplicate a folder in the storage bucket, the blobs are copied concurrently with their acl
+        raises if some blobs failed to copy
+        """
+
+        # full projection, to get the acl of the blobs with the listing
+        blobs = {
+            blob.name: blob
+            for blob in self.bucket.list_blobs(
+                prefix=source_folder_name, projection="full"
+            )
+            # the list_blobs method returns the source folder as well
+            if not blob.name == source_folder_name
+        }
+
+        names = {
+            name: name.replace(source_folder_name, destination_folder_name, 1)
+            for name in blobs
+        }
+
+        report = self.copy_blobs(names, blobs, on_progress)
+
+        if report.failed:
+            raise Exception(
+                f"failed to copy {len(report.failed)} of {len(names)} blobs of {source_folder_name}"
+            )
+
+        return report
 
     def delete_blobs_by_prefix(self, prefix: str):
         """
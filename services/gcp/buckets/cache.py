@@ -0,0 +1,146 @@
+"""
+Cache of the signed urls that the bucket manager generates.
+
+A signed url is valid for its whole expiration, so the same url can be handed out again
+as long as enough of its lifetime remains: a cached url is returned only if at least
+`SIGNING_CACHE_MIN_REMAINING` of the requested expiration is still left on it.
+
+There are two tiers:
+- process memory, lru eviction (`SIGNING_CACHE_SIZE` entries, 0 disables the cache)
+- redis, shared between the instances, only when `SIGNING_CACHE_REDIS` is set
+"""
+from cachetools import LRUCache
+from threading import Lock
+from datetime import timedelta
+from typing import Optional
+from hashlib import sha1
+import time
+from helpers.env import EnvVars
+
+# (path, method, content type)
+SignedUrlKey = tuple[str, str, Optional[str]]
+
+
+class SignedUrlsCache:
+    def __init__(self, maxsize: int, min_remaining: float, shared: bool) -> None:
+        self.enabled = maxsize > 0
+        self.min_remaining = min_remaining
+        self.shared = shared and self.enabled
+
+        self._local: LRUCache = LRUCache(maxsize=max(maxsize, 1))
+        self._lock = Lock()
+
+    @staticmethod
+    def _shared_id(key: SignedUrlKey) -> str:
+        path, method, content_type = key
+        return sha1(f"{method}:{content_type or ''}:{path}".encode()).hexdigest()
+
+    def _is_fresh(self, expires_at: float, expiration: timedelta) -> bool:
+        return (
+            expires_at - time.time() >= expiration.total_seconds() * self.min_remaining
+        )
+
+    def _get_local(
+        self, keys: list[SignedUrlKey], expiration: timedelta
+    ) -> dict[SignedUrlKey, str]:
+        found = {}
+
+        with self._lock:
+            for key in keys:
+                entry = self._local.get(key)
+
+                if entry is None:
+                    continue
+
+                url, expires_at = entry
+
+                if self._is_fresh(expires_at, expiration):
+                    found[key] = url
+                else:
+                    del self._local[key]
+
+        return found
+
+    def _get_shared(
+        self, keys: list[SignedUrlKey], expiration: timedelta
+    ) -> dict[SignedUrlKey, str]:
+        # imported here, redis is only needed when the shared tier is enabled
+        from services.redis import REDIS_DB
+
+        found = {}
+        values = REDIS_DB.get_signed_urls([self._shared_id(key) for key in keys])
+
+        for key, value in zip(keys, values):
+            if value is None:
+                continue
+
+            expires_at, url = value.decode().split(":", 1)
+
+            if self._is_fresh(float(expires_at), expiration):
+                found[key] = url
+
+                with self._lock:
+                    self._local[key] = (url, float(expires_at))
+
+        return found
+
+    def get_many(
+        self, keys: list[SignedUrlKey], expiration: timedelta
+    ) -> dict[SignedUrlKey, str]:
+        """
+        returns the cached urls of the given keys that are still fresh enough for `expiration`
+        """
+        if not self.enabled or not keys:
+            return {}
+
+        found = self._get_local(keys, expiration)
+        missing = [key for key in keys if key not in found]
+
+        if self.shared and missing:
+            try:
+                found.update(self._get_shared(missing, expiration))
+            except Exception as e:
+                # redis is only a cache, the url can always be signed again
+                print(e)
+
+        return found
+
+    def get(self, key: SignedUrlKey, expiration: timedelta) -> Optional[str]:
+        return self.get_many([key], expiration).get(key)
+
+    def set_many(self, urls: dict[SignedUrlKey, str], expiration: timedelta):
+        """
+        cache freshly signed urls, that were signed now with the given expiration
+        """
+        if not self.enabled or not urls:
+            return
+
+        expires_at = time.time() + expiration.total_seconds()
+
+        with self._lock:
+            for key, url in urls.items():
+                self._local[key] = (url, expires_at)
+
+        if self.shared:
+            try:
+                from services.redis import REDIS_DB
+
+                REDIS_DB.set_signed_urls(
+                    {
+                        self._shared_id(key): f"{expires_at}:{url}"
+                        for key, url in urls.items()
+                    },
+                    int(expiration.total_seconds()),
+                )
+            except Exception as e:
+                print(e)
+
+    def set(self, key: SignedUrlKey, url: str, expiration: timedelta):
+        self.set_many({key: url}, expiration)
+
+
+SIGNED_URLS_CACHE = SignedUrlsCache(
+    EnvVars.SIGNING_CACHE_SIZE,
+    EnvVars.SIGNING_CACHE_MIN_REMAINING,
+    EnvVars.SIGNING_CACHE_REDIS,
+)
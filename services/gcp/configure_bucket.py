@@ -0,0 +1,29 @@
+"""
+Set the bucket settings:
+- the cors, from BUCKET_ALLOWED_ORIGINS
+- the lifecycle rule that deletes the unclaimed browser uploads
+
+The bucket keeps its settings, so this runs once, when they change, not on every start.
+
+usage (from the project root):
+
+    python -m services.gcp.configure_bucket
+"""
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from helpers.env import EnvVars
+from services.gcp import GCP_MANAGER
+
+
+if __name__ == "__main__":
+    GCP_MANAGER.bucket_manager.configure_cors()
+
+    print(
+        f"cors of {EnvVars.BUCKET_NAME} set to {EnvVars.BUCKET_ALLOWED_ORIGINS.split(',')}"
+    )
+
+    GCP_MANAGER.bucket_manager.configure_uploads_lifecycle()
+
+    print(f"uploads lifecycle rule of {EnvVars.BUCKET_NAME} set")
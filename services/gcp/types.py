@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import NamedTuple
 
 
 class FoldersNames(str, Enum):
@@ -7,3 +8,22 @@ class FoldersNames(str, Enum):
     LOGOS = "logos"
     ACCOUNTS = "accounts"
     SITE_HELP = "site_help"
+    # files uploaded by the browser, until they are moved to their place
+    UPLOADS = "uploads"
+
+
+class UploadAssets(str, Enum):
+    LESSON_THUMBNAIL = "lesson_thumbnail"
+    LESSON_DESCRIPTION_FILE = "lesson_description_file"
+    ACCOUNT_LOGO = "account_logo"
+    SITE_HELP_BACKGROUND_IMAGE = "site_help_background_image"
+    SITE_HELP_PDF = "site_help_pdf"
+
+
+class StagedUpload(NamedTuple):
+    """
+    a verified file in the uploads folder, the `upload_*` methods move it instead of uploading bytes
+    """
+
+    path: str
+    content_type: str
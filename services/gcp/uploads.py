@@ -0,0 +1,65 @@
+"""
+What the browser may upload directly to the bucket, per asset.
+
+The browser gets a signed PUT url to the uploads folder (`GCPManager.generate_staged_upload_url`),
+uploads the file, and sends its path in the payload instead of the base64 file.
+The path is verified from the blob metadata (`GCPManager.get_staged_upload`)
+and the file is then moved to its place by the `upload_*` methods, without passing through the api.
+Files that are never claimed are deleted by the bucket lifecycle rule (`services.gcp.configure_bucket`).
+"""
+from typing import Callable, NamedTuple, Optional
+from helpers.env import EnvVars
+from helpers.files import (
+    get_image_mime_type,
+    get_document_mime_type,
+    varify_image_content_type,
+    varify_document_content_type,
+)
+from .types import UploadAssets
+
+
+class UploadRule(NamedTuple):
+    # file extension -> mime type, None if the extension is not allowed
+    get_mime_type: Callable[[str], Optional[str]]
+    verify_content_type: Callable[[str], bool]
+    max_size: int
+
+
+_IMAGE_RULE = UploadRule(
+    get_image_mime_type, varify_image_content_type, EnvVars.MAX_IMAGE_UPLOAD_SIZE
+)
+_DOCUMENT_RULE = UploadRule(
+    get_document_mime_type,
+    varify_document_content_type,
+    EnvVars.MAX_DOCUMENT_UPLOAD_SIZE,
+)
+
+UPLOAD_RULES: dict[UploadAssets, UploadRule] = {
+    UploadAssets.LESSON_THUMBNAIL: _IMAGE_RULE,
+    UploadAssets.LESSON_DESCRIPTION_FILE: _DOCUMENT_RULE,
+    UploadAssets.ACCOUNT_LOGO: _IMAGE_RULE,
+    UploadAssets.SITE_HELP_BACKGROUND_IMAGE: _IMAGE_RULE,
+    UploadAssets.SITE_HELP_PDF: _DOCUMENT_RULE,
+}
+
+
+def get_upload_mime_type(asset: UploadAssets, file_type: str) -> Optional[str]:
+    """
+    the mime type the file will be uploaded with, None if the file type is not allowed for the asset
+    """
+    rule = UPLOAD_RULES[asset]
+    mime_type = rule.get_mime_type(file_type)
+
+    if mime_type is None or not rule.verify_content_type(mime_type):
+        return None
+
+    return mime_type
+
+
+def is_valid_upload(asset: UploadAssets, content_type: str, size: int) -> bool:
+    """
+    check the uploaded file metadata against the asset rule
+    """
+    rule = UPLOAD_RULES[asset]
+
+    return rule.verify_content_type(content_type or "") and size <= rule.max_size
@@ -0,0 +1,107 @@
+"""
+Durable jobs queue, backed by the jobs collection.
+
+Heavy work (deleting an account, creating its manager, uploading a logo) used to run as
+`BackgroundTasks` on the instance that served the request, and was lost when the instance was recycled.
+It is enqueued instead, and run by the workers (`services.jobs.worker`):
+
+- a worker claims a due job with a lease, and renews it while the job runs.
+  a job whose lease expired (its instance died) is claimed again, so handlers must be idempotent
+- a failed job is retried after `JOBS_RETRY_DELAY` seconds, doubled on every attempt,
+  until `max_attempts`, then it is failed
+- an idempotency key returns the existing job instead of enqueuing the same work twice
+
+The handlers are registered with `handler` at import, they get the job payload (a bson document)
+and what they return is saved as the job result.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional, Union
+from bson import ObjectId
+from db import inserts, updates
+from db.models import Jobs, JobStatus
+from helpers.env import EnvVars
+
+JobHandler = Callable[[dict], Any]
+
+
+class JobError(Exception):
+    """
+    raised by a handler when the job failed, it is retried until its max attempts
+    """
+
+
+# job name -> handler
+_HANDLERS: dict[str, JobHandler] = {}
+
+
+def handler(name: str) -> Callable[[JobHandler], JobHandler]:
+    """
+    register the decorated function as the handler of the jobs named `name`
+    """
+
+    def register(func: JobHandler) -> JobHandler:
+        if name in _HANDLERS:
+            raise ValueError(f"job handler {name} is already registered")
+
+        _HANDLERS[name] = func
+
+        return func
+
+    return register
+
+
+def get_handler(name: str) -> Optional[JobHandler]:
+    return _HANDLERS.get(name)
+
+
+def handlers_names() -> list[str]:
+    return list(_HANDLERS)
+
+
+def enqueue(
+    name: str,
+    payload: Optional[dict] = None,
+    idempotency_key: Optional[str] = None,
+    creator: Optional[Union[ObjectId, str]] = None,
+    max_attempts: Optional[int] = None,
+    delay: int = 0,
+) -> Optional[Jobs]:
+    """
+    add a job, returns it (or the job of the idempotency key), None if it could not be saved
+    """
+    if name not in _HANDLERS:
+        raise ValueError(f"no job handler is registered for {name}")
+
+    def insert():
+        return inserts.insert_new_job(
+            name,
+            payload or {},
+            max_attempts or EnvVars.JOBS_MAX_ATTEMPTS,
+            idempotency_key=idempotency_key,
+            creator=creator,
+            run_at=datetime.utcnow() + timedelta(seconds=delay),
+        )
+
+    job_res = insert()
+
+    if job_res.exists:
+        # a failed job doesn't block the key, the work is tried again
+        if not job_res.value.status == JobStatus.FAILED:
+            return job_res.value
+
+        if updates.clear_job_idempotency_key(job_res.value.id).failure:
+            return job_res.value
+
+        job_res = insert()
+
+        if job_res.exists:
+            return job_res.value
+
+    if job_res.failure:
+        print(f"failed to enqueue job {name}")
+        return None
+
+    return job_res.value
+
+
+from .worker import start_workers, stop_workers
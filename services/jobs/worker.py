@@ -0,0 +1,150 @@
+"""
+The jobs workers, `JOBS_WORKERS` of them run in the app event loop (started on the app startup).
+
+To keep the jobs off the api instances set `JOBS_WORKERS=0` there, and run the workers alone:
+
+    python -m services.jobs.worker
+"""
+import os
+import time
+import socket
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+from db import updates
+from db.models import Jobs
+from helpers import metrics
+from helpers.env import EnvVars
+from . import get_handler, handlers_names
+
+_workers: list[asyncio.Task] = []
+
+
+def _retry_at(job: Jobs) -> Optional[datetime]:
+    if job.attempts >= job.max_attempts:
+        return None
+
+    delay = EnvVars.JOBS_RETRY_DELAY * 2 ** (job.attempts - 1)
+
+    return datetime.utcnow() + timedelta(seconds=delay)
+
+
+async def _keep_lease(worker_id: str, job: Jobs):
+    # renew well before the lease expires
+    interval = max(EnvVars.JOBS_LEASE_SECONDS // 3, 1)
+
+    while True:
+        await asyncio.sleep(interval)
+
+        res = await asyncio.to_thread(
+            updates.extend_job_lease, job.id, worker_id, EnvVars.JOBS_LEASE_SECONDS
+        )
+
+        if res.not_found:
+            print(f"job {job.id} lease was lost by {worker_id}")
+            return
+
+
+async def _run_job(worker_id: str, job: Jobs):
+    job_handler = get_handler(job.name)
+
+    # a job that keeps killing its workers is claimed again after every lease expiry
+    if job.attempts > job.max_attempts or job_handler is None:
+        await asyncio.to_thread(
+            updates.fail_job,
+            job.id,
+            worker_id,
+            "out of attempts" if job_handler else "no handler",
+        )
+        metrics.JOBS.labels(job.name, "failed").inc()
+        return
+
+    lease = asyncio.create_task(_keep_lease(worker_id, job))
+    start = time.perf_counter()
+
+    try:
+        result = await asyncio.to_thread(job_handler, job.payload)
+    except Exception as e:
+        print(f"job {job.name} {job.id} failed (attempt {job.attempts}): {e}")
+
+        retry_at = _retry_at(job)
+
+        await asyncio.to_thread(updates.fail_job, job.id, worker_id, str(e), retry_at)
+        metrics.JOBS.labels(job.name, "retried" if retry_at else "failed").inc()
+    else:
+        res = await asyncio.to_thread(updates.complete_job, job.id, worker_id, result)
+
+        if res.not_found:
+            print(f"job {job.id} finished after its lease was lost")
+
+        metrics.JOBS.labels(job.name, "succeeded").inc()
+    finally:
+        lease.cancel()
+        metrics.JOB_DURATION.labels(job.name).observe(time.perf_counter() - start)
+
+
+async def _run_worker(worker_id: str):
+    while True:
+        try:
+            job_res = await asyncio.to_thread(
+                updates.claim_next_job,
+                worker_id,
+                handlers_names(),
+                EnvVars.JOBS_LEASE_SECONDS,
+            )
+
+            if job_res.failure:
+                # empty queue (not_found) or the db is unavailable
+                await asyncio.sleep(EnvVars.JOBS_POLL_INTERVAL)
+                continue
+
+            await _run_job(worker_id, job_res.value)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(e)
+            await asyncio.sleep(EnvVars.JOBS_POLL_INTERVAL)
+
+
+def start_workers(count: Optional[int] = None):
+    """
+    start the workers in the running event loop
+    """
+    count = EnvVars.JOBS_WORKERS if count is None else count
+
+    if _workers:
+        return
+
+    loop = asyncio.get_running_loop()
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    for index in range(count):
+        _workers.append(loop.create_task(_run_worker(f"{prefix}:{index}")))
+
+
+async def stop_workers():
+    """
+    stop claiming jobs, the running jobs are claimed again when their lease expires
+    """
+    for worker in _workers:
+        worker.cancel()
+
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+
+
+async def _run_forever():
+    start_workers(max(EnvVars.JOBS_WORKERS, 1))
+
+    await asyncio.gather(*_workers)
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    # registers the handlers
+    from api import v2
+
+    asyncio.run(_run_forever())
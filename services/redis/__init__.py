@@ -1,17 +1,78 @@
 from helpers.env import EnvVars
+from helpers import metrics
+from services import registry
 from .types import RedisKeyActions, RedisKeyTypes
 import redis
-from typing import Union
+from redis.client import Pipeline, PubSub, PubSubWorkerThread
+import uuid
+from typing import Union, Optional, Callable
+
+
+class _CountedPipeline(Pipeline):
+    def execute(self, raise_on_error=True):
+        # the whole pipeline is sent in one round trip
+        metrics.count_redis_round_trip()
+        return super().execute(raise_on_error)
+
+
+class _CountedRedis(redis.Redis):
+    """
+    redis client that counts its round trips in the request metrics
+    """
+
+    def execute_command(self, *args, **options):
+        metrics.count_redis_round_trip()
+        return super().execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return _CountedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+# take the lease if it is free, or renew it if the holder already has it
+_ACQUIRE_LEASE = """
+local current = redis.call("get", KEYS[1])
+if not current or current == ARGV[1] then
+    redis.call("set", KEYS[1], ARGV[1], "EX", ARGV[2])
+    return 1
+end
+return 0
+"""
+
+_RELEASE_LEASE = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+# bump a version and publish it to the instances, in one round trip
+_BUMP_VERSION = """
+local version = redis.call("incr", KEYS[1])
+redis.call("publish", ARGV[1], version)
+return version
+"""
 
 
 class RedisManager:
     def __init__(self):
-        self.redis_client = redis.Redis(
+        self.redis_client = _CountedRedis(
             host=EnvVars.REDIS_HOST,
             port=EnvVars.REDIS_PORT,
             password=EnvVars.REDIS_PASSWORD,
         )
 
+        # registering doesn't call redis, the scripts are loaded on their first use
+        self._acquire_lease = self.redis_client.register_script(_ACQUIRE_LEASE)
+        self._release_lease = self.redis_client.register_script(_RELEASE_LEASE)
+        self._bump_version = self.redis_client.register_script(_BUMP_VERSION)
+
+    def warm_up(self):
+        """
+        open the first connection of the pool
+        """
         if not self.redis_client.ping():
             raise Exception("Redis is not available")
 
@@ -74,5 +135,175 @@ class RedisManager:
         else:
             return []
 
+    def get_cached_user(self, user_id: str) -> tuple[Optional[bytes], int]:
+        """
+        get the cached user document and the current users cache generation in one round trip,
+        the caller should ignore the document if it was cached under a different generation
+        """
+        user_key = self.get_key(RedisKeyTypes.USER, RedisKeyActions.USER_DATA, user_id)
+        generation_key = self.get_key(
+            RedisKeyTypes.CACHE, RedisKeyActions.GENERATION, RedisKeyTypes.USER.value
+        )
+
+        data, generation = self.redis_client.mget(user_key, generation_key)
+
+        return data, int(generation or 0)
+
+    def set_cached_user(self, user_id: str, data: str, ttl: int):
+        """
+        cache a user document (already encoded) for `ttl` seconds
+        """
+        key = self.get_key(RedisKeyTypes.USER, RedisKeyActions.USER_DATA, user_id)
+
+        self.redis_client.set(key, data, ex=ttl)
+
+    def delete_cached_users(self, user_ids: list[str]):
+        """
+        delete the cached documents of the given users
+        """
+        keys = [
+            self.get_key(RedisKeyTypes.USER, RedisKeyActions.USER_DATA, user_id)
+            for user_id in user_ids
+        ]
+
+        if keys:
+            self.redis_client.delete(*keys)
+
+    def bump_users_cache_generation(self) -> int:
+        """
+        invalidate every cached user document at once (used when roles or accounts change)
+        """
+        key = self.get_key(
+            RedisKeyTypes.CACHE, RedisKeyActions.GENERATION, RedisKeyTypes.USER.value
+        )
+
+        return self.redis_client.incr(key)
+
+    def get_signed_urls(self, url_ids: list[str]) -> list[Optional[bytes]]:
+        """
+        get the cached signed urls (already encoded) in one round trip, none for the missing ones
+        """
+        keys = [
+            self.get_key(RedisKeyTypes.CACHE, RedisKeyActions.SIGNED_URL, url_id)
+            for url_id in url_ids
+        ]
+
+        if not keys:
+            return []
+
+        return self.redis_client.mget(keys)
+
+    def set_signed_urls(self, urls: dict[str, str], ttl: int):
+        """
+        cache signed urls (already encoded) for `ttl` seconds
+        """
+        pipe = self.redis_client.pipeline(transaction=False)
+
+        for url_id, data in urls.items():
+            key = self.get_key(RedisKeyTypes.CACHE, RedisKeyActions.SIGNED_URL, url_id)
+            pipe.set(key, data, ex=ttl)
+
+        pipe.execute()
+
+    def increment_lesson_views(self, lesson_id: str, views: int = 1):
+        """
+        add views to the pending views of a lesson, until they are flushed to the db
+        """
+        key = self.get_key(RedisKeyTypes.LESSON, RedisKeyActions.VIEWS, "published")
+
+        self.redis_client.hincrby(key, lesson_id, views)
+
+    def pop_lessons_views(self) -> dict[str, int]:
+        """
+        take all the pending lessons views, the views added from now on are kept for the next pop
+        """
+        key = self.get_key(RedisKeyTypes.LESSON, RedisKeyActions.VIEWS, "published")
+        # renaming is atomic, other instances keep incrementing the original key
+        flush_key = f"{key}:{uuid.uuid4().hex}"
+
+        try:
+            self.redis_client.rename(key, flush_key)
+        except redis.ResponseError:
+            # there are no pending views
+            return {}
+
+        pipe = self.redis_client.pipeline()
+        pipe.hgetall(flush_key)
+        pipe.delete(flush_key)
+        views, _ = pipe.execute()
+
+        return {lesson_id.decode(): int(count) for lesson_id, count in views.items()}
+
+    def acquire_scheduler_leadership(self, holder: str, ttl: int) -> bool:
+        """
+        become (or stay) the instance that runs the scheduled tasks for `ttl` seconds
+        """
+        key = self.get_key(RedisKeyTypes.SCHEDULER, RedisKeyActions.LEADER, "main")
+
+        return bool(self._acquire_lease(keys=[key], args=[holder, ttl]))
+
+    def release_scheduler_leadership(self, holder: str):
+        """
+        give up the leadership if the holder has it, another instance takes it on its next tick
+        """
+        key = self.get_key(RedisKeyTypes.SCHEDULER, RedisKeyActions.LEADER, "main")
+
+        self._release_lease(keys=[key], args=[holder])
+
+    def get_scheduled_task_last_run(self, task_name: str) -> Optional[float]:
+        """
+        the timestamp of the last run of a scheduled task, by any instance
+        """
+        key = self.get_key(RedisKeyTypes.SCHEDULER, RedisKeyActions.LAST_RUN, task_name)
+
+        last_run = self.redis_client.get(key)
+
+        return float(last_run) if last_run else None
+
+    def set_scheduled_task_last_run(self, task_name: str, timestamp: float):
+        key = self.get_key(RedisKeyTypes.SCHEDULER, RedisKeyActions.LAST_RUN, task_name)
+
+        self.redis_client.set(key, timestamp)
+
+    def get_roles_version(self) -> int:
+        """
+        the version of the roles, bumped on every write to the roles
+        """
+        key = self.get_key(
+            RedisKeyTypes.CACHE, RedisKeyActions.VERSION, RedisKeyTypes.ROLE.value
+        )
+
+        return int(self.redis_client.get(key) or 0)
+
+    def bump_roles_version(self) -> int:
+        """
+        bump the version of the roles and publish it to the `subscribe_roles_versions` listeners
+        """
+        key = self.get_key(
+            RedisKeyTypes.CACHE, RedisKeyActions.VERSION, RedisKeyTypes.ROLE.value
+        )
+
+        return int(self._bump_version(keys=[key], args=[key]))
+
+    def subscribe_roles_versions(
+        self,
+        on_version: Callable[[int], None],
+        on_error: Callable[[BaseException, PubSub, PubSubWorkerThread], None],
+    ) -> PubSubWorkerThread:
+        """
+        call `on_version` with every published roles version, from a daemon thread
+        the subscription is restored after a connection error, `on_error` is called with the error
+        """
+        channel = self.get_key(
+            RedisKeyTypes.CACHE, RedisKeyActions.VERSION, RedisKeyTypes.ROLE.value
+        )
+
+        pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{channel: lambda message: on_version(int(message["data"]))})
+
+        return pubsub.run_in_thread(
+            sleep_time=1, daemon=True, exception_handler=on_error
+        )
+
 
-REDIS_DB = RedisManager()
+REDIS_DB = registry.register("redis", RedisManager)
@@ -3,8 +3,19 @@ from enum import Enum
 
 class RedisKeyTypes(str, Enum):
     USER = "user"
+    CACHE = "cache"
+    LESSON = "lesson"
+    SCHEDULER = "scheduler"
+    ROLE = "role"
 
 
 class RedisKeyActions(str, Enum):
     PERMISSIONS = "pr"
     ACCESS_TOKEN = "at"
+    USER_DATA = "ud"
+    GENERATION = "gen"
+    SIGNED_URL = "su"
+    VIEWS = "views"
+    LEADER = "leader"
+    LAST_RUN = "last_run"
+    VERSION = "version"
@@ -0,0 +1,89 @@
+"""
+Registry of the external services managers (gcp, redis, email).
+
+A manager is created on its first use instead of at import, so a cold start doesn't pay
+for their network round trips before it can serve, and an unavailable service fails only
+the requests that use it, not the import of the app.
+`warm_up` creates the registered managers ahead of the first request, from the app startup.
+"""
+import asyncio
+from threading import Lock
+from typing import Callable, Generic, TypeVar, Optional
+
+T = TypeVar("T")
+
+
+class LazyService(Generic[T]):
+    """
+    proxy of a manager, the manager is created by `factory` on the first attribute access
+    if the creation fails, the next access tries again
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T]) -> None:
+        self._name = name
+        self._factory = factory
+        self._instance: Optional[T] = None
+        self._lock = Lock()
+
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
+
+    def get(self) -> T:
+        instance = self._instance
+
+        if instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+
+                instance = self._instance
+
+        return instance
+
+    def __getattr__(self, name: str):
+        return getattr(self.get(), name)
+
+    def __repr__(self) -> str:
+        state = "initialized" if self.initialized else "not initialized"
+        return f"<LazyService {self._name} ({state})>"
+
+
+_SERVICES: dict[str, LazyService] = {}
+
+
+def register(name: str, factory: Callable[[], T]) -> T:
+    """
+    register a manager, returns its proxy that is used exactly like the manager
+    """
+    service = LazyService(name, factory)
+    _SERVICES[name] = service
+
+    return service
+
+
+def _warm_up_service(name: str):
+    instance = _SERVICES[name].get()
+
+    # managers can prepare more than their creation, e.g open a connection or fetch a token
+    warm_up = getattr(instance, "warm_up", None)
+
+    if warm_up is not None:
+        warm_up()
+
+
+async def warm_up(names: Optional[list[str]] = None):
+    """
+    create the managers (all of them by default) and warm them up, in parallel
+    a failure is printed and skipped, the manager will be created again on its first use
+    """
+    names = list(_SERVICES) if names is None else names
+
+    results = await asyncio.gather(
+        *(asyncio.to_thread(_warm_up_service, name) for name in names),
+        return_exceptions=True,
+    )
+
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            print(f"failed to warm up {name}: {result}")
@@ -0,0 +1,128 @@
+"""
+In-process scheduler of the periodic tasks, it replaces the system crontab the app used to install.
+
+Every instance runs the scheduler loop, but only the leader runs the tasks: the leadership is a redis
+lease (`SCHEDULER_LEADER_TTL` seconds) renewed on every tick, when the leader dies another instance
+takes it after the lease expires. The last run of every task is kept in redis, so a task runs once
+per interval across the instances and the restarts.
+
+On cloud run the instances must have the cpu always allocated for the loop to run between requests.
+"""
+import os
+import time
+import socket
+import asyncio
+from typing import Callable, NamedTuple, Optional
+from helpers.env import EnvVars
+from services.redis import REDIS_DB
+
+
+class ScheduledTask(NamedTuple):
+    name: str
+    # seconds between two runs
+    interval: int
+    func: Callable[[], None]
+
+
+_TASKS: dict[str, ScheduledTask] = {}
+_scheduler: Optional[asyncio.Task] = None
+
+# identifies this instance as the leader
+_holder = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def every(name: str, interval: int) -> Callable[[Callable], Callable]:
+    """
+    run the decorated (sync) function every `interval` seconds, on the leader only
+    """
+
+    def register(func: Callable) -> Callable:
+        _TASKS[name] = ScheduledTask(name, interval, func)
+
+        return func
+
+    return register
+
+
+def _acquire_leadership() -> bool:
+    try:
+        return REDIS_DB.acquire_scheduler_leadership(
+            _holder, EnvVars.SCHEDULER_LEADER_TTL
+        )
+    except Exception as e:
+        print(f"scheduler leader election failed: {e}")
+        return False
+
+
+def _is_due(task: ScheduledTask, now: float) -> bool:
+    last_run = REDIS_DB.get_scheduled_task_last_run(task.name)
+
+    return last_run is None or now - last_run >= task.interval
+
+
+async def _run_task(task: ScheduledTask):
+    run = asyncio.create_task(asyncio.to_thread(task.func))
+
+    # keep the leadership while the task runs, a task can take longer than the lease
+    while not run.done():
+        await asyncio.wait({run}, timeout=EnvVars.SCHEDULER_TICK)
+
+        if not run.done():
+            await asyncio.to_thread(_acquire_leadership)
+
+    try:
+        run.result()
+    except Exception as e:
+        # the next run is in an interval, not on the next tick
+        print(f"scheduled task {task.name} failed: {e}")
+
+
+async def _run_due_tasks():
+    for task in _TASKS.values():
+        now = time.time()
+
+        if not await asyncio.to_thread(_is_due, task, now):
+            continue
+
+        await asyncio.to_thread(REDIS_DB.set_scheduled_task_last_run, task.name, now)
+
+        print(f"running scheduled task {task.name}")
+
+        await _run_task(task)
+
+
+async def _run_scheduler():
+    while True:
+        try:
+            if await asyncio.to_thread(_acquire_leadership):
+                await _run_due_tasks()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(e)
+
+        await asyncio.sleep(EnvVars.SCHEDULER_TICK)
+
+
+def start_scheduler():
+    global _scheduler
+
+    if _scheduler is None:
+        _scheduler = asyncio.get_running_loop().create_task(_run_scheduler())
+
+
+async def stop_scheduler():
+    global _scheduler
+
+    if _scheduler is not None:
+        _scheduler.cancel()
+        _scheduler = None
+
+        try:
+            # let another instance take over without waiting for the lease to expire
+            await asyncio.to_thread(REDIS_DB.release_scheduler_leadership, _holder)
+        except Exception as e:
+            print(e)
+
+
+from . import tasks
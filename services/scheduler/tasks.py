@@ -0,0 +1,31 @@
+from db import queries, transactions
+from helpers.env import EnvVars
+from . import every
+
+
+@every("purge_expired_archived_lessons", EnvVars.ARCHIVE_PURGE_INTERVAL)
+def purge_expired_archived_lessons():
+    """
+    delete the lessons that are archived for more than 30 days, in batches
+    """
+    lessons_res = queries.get_expired_archive_lessons_ids()
+
+    if lessons_res.failure:
+        raise Exception("Failed to get expired lessons ids")
+
+    lessons_ids = lessons_res.value
+    deleted = 0
+
+    for start in range(0, len(lessons_ids), EnvVars.ARCHIVE_PURGE_BATCH_SIZE):
+        batch = lessons_ids[start : start + EnvVars.ARCHIVE_PURGE_BATCH_SIZE]
+
+        res = transactions.delete_archived_lessons(batch)
+
+        if not res.success:
+            # the next batches are independent, this one is retried on the next run
+            print(f"Failed to delete expired lessons: {res.message}")
+            continue
+
+        deleted += res.value
+
+    print(f"deleted {deleted} expired archived lessons")
@@ -3,6 +3,7 @@ from helpers.env import EnvVars
 from typing import Union
 import jinja2, base64
 from .types import FileAttachment
+from services import registry
 import sendgrid
 from sendgrid.helpers.mail import (
     Mail,
@@ -149,4 +150,4 @@ class EmailManager:
         self.send(to, subject, content, send_to_3wall=send_to_3wall)
 
 
-EMAIL_SERVICE = EmailManager()
+EMAIL_SERVICE = registry.register("email", EmailManager)